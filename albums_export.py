@@ -0,0 +1,164 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A streaming export of the albums of artists (from 'scrape_artist_data') - one dataset of
+(artist, album, track_no, song) rows for all the artists, in CSV/TSV, JSON Lines or Parquet.
+
+The rows of an artist are parsed from the artist's page lazily and written as they are parsed (instead of
+building a ragged dict of albums and a padded DataFrame), so the memory use per artist is flat, and the rows of
+all the artists are appended to the same dataset. CSV/TSV/JSON Lines files are appended (a rerun adds to the file),
+and a Parquet dataset is a directory of files (a file per run, with a row group per batch of rows) - pyarrow is
+imported only for Parquet (when the dataset is opened, so a missing pyarrow fails before the scrape).
+pandas is imported only when a DataFrame is asked for ('read_dataframe').
+"""
+
+import os
+import csv
+import json
+import threading
+from time import strftime
+from uuid import uuid4
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+COLUMNS = ("artist", "album", "track_no", "song")
+FORMATS = {".csv": "csv", ".tsv": "tsv", ".jsonl": "jsonl", ".parquet": "parquet"}  # extension --> format
+BATCH_SIZE = 1000  # number of rows in a row group (Parquet)
+
+
+class AlbumsExporter:
+
+    def __init__(self, out_path, fmt=None, batch_size=BATCH_SIZE, encoding='utf-8'):
+        """
+        creates new instance of AlbumsExporter Object - opens the dataset for appending
+        :param out_path: path to the dataset (a file - CSV/TSV/JSON Lines, or a directory - Parquet)
+        :param fmt: 'csv', 'tsv', 'jsonl' or 'parquet', or None - by the extension of the path
+        :param batch_size: number of rows in a row group (Parquet)
+        :param encoding: the encoding of a CSV/TSV file ('utf-8-sig' - for Excel)
+        """
+        self.fmt = fmt or FORMATS.get(os.path.splitext(out_path)[1].lower())
+        if self.fmt not in FORMATS.values():
+            raise ValueError("unsupported format of %s (csv, tsv, jsonl or parquet)" % out_path)
+        self.out_path = out_path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()  # (the artists might be exported by several threads)
+        self.count = 0  # number of rows that were written
+        self.out_f = None
+        self.writer = None
+        self.batch = []  # rows that wait for a row group (Parquet)
+        if os.path.dirname(out_path):
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        if self.fmt in ("csv", "tsv"):
+            is_new = not os.path.isfile(out_path) or not os.path.getsize(out_path)
+            self.out_f = open(out_path, 'a', encoding=encoding, newline='')
+            self.writer = csv.writer(self.out_f, delimiter='\t' if self.fmt == "tsv" else ',')
+            if is_new:
+                self.writer.writerow(COLUMNS)
+        elif self.fmt == "jsonl":
+            self.out_f = open(out_path, 'a', encoding='utf-8')
+        else:
+            import pyarrow.parquet  # (fails now - before the rows are scraped - if pyarrow is not installed)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_rows(self, rows):
+        """
+        appends rows to the dataset
+        :param rows: iterable of tuples (artist, album, track_no, song)
+        :return: number of rows that were written
+        """
+        count = 0
+        with self.lock:
+            for row in rows:
+                if self.fmt == "jsonl":
+                    self.out_f.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False) + "\n")
+                elif self.fmt == "parquet":
+                    self.batch.append(row)
+                    if len(self.batch) >= self.batch_size:
+                        self._write_batch()
+                else:
+                    self.writer.writerow(row)
+                count += 1
+            self.count += count
+            if self.out_f is not None:
+                self.out_f.flush()
+        return count
+
+    def _write_batch(self):
+        """
+        writes the waiting rows as a row group of the Parquet file of this run (called with the lock)
+        :return:
+        """
+        import pyarrow as pa  # (imported only for Parquet)
+        import pyarrow.parquet as pq
+        schema = pa.schema([("artist", pa.string()), ("album", pa.string()), ("track_no", pa.int32()),
+                            ("song", pa.string())])
+        if self.writer is None:
+            os.makedirs(self.out_path, exist_ok=True)
+            # (a unique suffix - two runs of the same process in the same second don't overwrite each other)
+            file_path = os.path.join(self.out_path, "part-%s-%d-%s.parquet" % (strftime("%Y%m%d-%H%M%S"), os.getpid(),
+                                                                              uuid4().hex[:8]))
+            self.writer = pq.ParquetWriter(file_path, schema)
+        columns = list(zip(*self.batch))
+        self.writer.write_table(pa.Table.from_arrays([pa.array(column, type=field.type)
+                                                      for column, field in zip(columns, schema)], schema=schema))
+        self.batch = []
+
+    def close(self):
+        """
+        writes the rest of the rows, and closes the dataset
+        :return:
+        """
+        with self.lock:
+            if self.fmt == "parquet":
+                if self.batch:
+                    self._write_batch()
+                if self.writer is not None:
+                    self.writer.close()
+                    self.writer = None
+            elif self.out_f is not None:
+                self.out_f.close()
+                self.out_f = None
+
+
+def iter_album_rows(soup_obj, artist):
+    """
+    parses the albums&songs of an artist's page lazily
+    :param soup_obj: Beautifulsoup obj (of an artist's page)
+    :param artist: the name of the artist (string)
+    :return: generator of tuples (artist, album, track_no, song)
+    """
+    for album_elem in soup_obj.find_all(class_='clearfix'):  # find tags by class
+        album_title_elem = album_elem.find(class_='artist-album-label')  # find tag by class
+        album_title = album_title_elem.get_text() if album_title_elem else None
+        if not album_title:
+            continue
+        track_no = 0
+        for tr in album_elem.select('table tbody tr'):  # select tr tags from table's body
+            song_name_elem = tr.find('td')  # find first td elems
+            song_name = song_name_elem.get_text() if song_name_elem else None
+            if song_name:
+                track_no += 1
+                yield artist, album_title, track_no, song_name
+
+
+def read_dataframe(out_path, fmt=None):
+    """
+    reads a dataset into a pandas DataFrame (pandas is imported only here)
+    :param out_path: path to the dataset
+    :param fmt: 'csv', 'tsv', 'jsonl' or 'parquet', or None - by the extension of the path
+    :return: pandas DataFrame
+    """
+    import pandas as pd
+    fmt = fmt or FORMATS.get(os.path.splitext(out_path)[1].lower())
+    if fmt == "parquet":
+        return pd.read_parquet(out_path)
+    if fmt == "jsonl":
+        return pd.read_json(out_path, lines=True)
+    return pd.read_csv(out_path, sep='\t' if fmt == "tsv" else ',', encoding='utf-8-sig')  # (with or without a BOM)
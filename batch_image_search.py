@@ -0,0 +1,275 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A headless batch mode of 'reverse_image_search' - a reverse image search (Google) of every image in a directory.
+
+Each image is uploaded through the file input of the page ('send_keys' with the path of the file), instead of
+opening the OS file dialog/explorer and dragging the file with pyautogui, and the results are awaited by the DOM
+(the URL of the results, and a settled page) instead of a fixed 10-20 seconds.
+The images are handed out from one work queue to several browser sessions (from the pool of 'driver_pool'),
+and an image that failed because of a broken session is put back in the queue (for another session).
+
+The result of each image is written as a structured record (one JSON object per line) - the URL of the results,
+whether pages with matching images were found, the best guess of the search, and the links of the results.
+Images that already have a record in the output file are skipped (a rerun continues the batch).
+With the perceptual-hash index of 'image_index', near-duplicates of a searched image are skipped too,
+and only one representative of each group of near-duplicates is searched (the others get a record
+that points to it).
+The images are downscaled and re-encoded before the upload (by the process pool of 'upload_prep' - ahead of
+the browser sessions), so the uploads are small.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\batch_image_search.py -d "path\\to\\images" -o "results.jsonl" -w 3
+"""
+
+import os
+import json
+import queue
+import argparse
+import threading
+from time import strftime
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException, NoSuchElementException
+from pacing import PACER
+from page_waits import wait_until, settle, dom_present, url_changed
+from driver_pool import ChromeDriverPool
+from image_index import ImageIndex, INDEX_NAME, THRESHOLD, images_in_tree
+from upload_prep import UploadPreprocessor, MAX_DIM
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+BASE_URL = "https://www.google.com/imghp?hl=en"  # Google image search URL
+FILE_INPUT = (By.CSS_SELECTOR, "input[type='file']")
+SEARCH_BY_IMAGE = (By.CSS_SELECTOR, "[aria-label='Search by image']")  # the button that opens the upload box
+WORKERS = 3  # number of browser sessions
+MAX_RETRIES = 2  # number of times an image is put back in the queue (after a broken session)
+RESULTS_TIMEOUT = 30  # max time (seconds) to wait for the results of an image
+MAX_LINKS = 20  # max number of result links in a record
+MATCHING_PAGES = "pages that include matching images"
+
+# returns the best guess of the search, and the links of the results (not of Google itself)
+RESULTS_SCRIPT = """
+var links = [], max_links = arguments[0];
+document.querySelectorAll('a[href^="http"]').forEach(function (link) {
+    if (links.length < max_links && !/(^|\\.)google\\./.test(link.hostname) && link.innerText.trim()) {
+        links.push({url: link.href, title: link.innerText.trim().split('\\n')[0]});
+    }
+});
+var guess = document.querySelector('input[name="q"], textarea[name="q"]');
+return {links: links, best_guess: guess ? guess.value : null, text: document.body.innerText.toLowerCase()};
+"""
+
+
+class BatchImageSearch:
+
+    def __init__(self, image_paths, out_path, workers=WORKERS, index=None, preprocessor=None):
+        """
+        creates new instance of BatchImageSearch Object
+        :param image_paths: paths to the images (list)
+        :param out_path: path to the output file (JSON Lines - appended)
+        :param workers: number of browser sessions
+        :param index: ImageIndex object (of the images) - to skip near-duplicates, or None
+        :param preprocessor: UploadPreprocessor object - to downscale the images before the upload,
+        or None - the original files are uploaded
+        """
+        self.out_path = out_path
+        self.workers = workers
+        self.index = index
+        self.preprocessor = preprocessor
+        self.prepared = {}  # path to an image --> a Future of the path of the prepared image
+        self.tasks = queue.Queue()  # tuples (path to an image, number of tries)
+        self.duplicates = {}  # representative --> the other images of its group
+        done = searched_images(out_path)
+        pending = [os.path.abspath(image_path) for image_path in image_paths
+                   if os.path.abspath(image_path) not in done]
+        if index is None:
+            groups = [[image_path] for image_path in pending]
+        else:
+            index.mark_searched(done)
+            groups = index.groups(pending)
+        for group in groups:
+            if index is not None and index.is_searched(group[0]):
+                print("%s --> a near-duplicate was already searched" % ", ".join(group))
+                continue
+            self.duplicates[group[0]] = group[1:]
+            self.tasks.put((group[0], 0))
+        self.lock = threading.Lock()
+        self.out_f = None
+        self.count = 0
+
+    def run(self):
+        """
+        searches all the images with the browser sessions, and writes a record of each image
+        :return: number of records that were written
+        """
+        if self.preprocessor is not None:
+            # (the pool of processes prepares the images ahead of the browser sessions)
+            self.prepared = {image_path: self.preprocessor.submit(image_path) for image_path in self.duplicates}
+        self.out_f = open(self.out_path, 'a', encoding='utf-8')
+        try:
+            with ChromeDriverPool(size=self.workers) as pool:
+                threads = [threading.Thread(target=self.worker, args=(pool,), daemon=True)
+                           for _ in range(self.workers)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            # images that were left in the queue (no browser could take them) - an error record each (retried
+            # on the next run)
+            while not self.tasks.empty():
+                image_path, tries = self.tasks.get_nowait()
+                self.write({"image": image_path, "error": "not searched - no browser session"})
+        finally:
+            self.out_f.close()
+            if self.index is not None:
+                self.index.save()
+        return self.count
+
+    def worker(self, pool):
+        """
+        a worker - takes images from the queue, and searches them in its browser session
+        :param pool: ChromeDriverPool object
+        :return:
+        """
+        driver = None
+        try:
+            while True:
+                try:
+                    image_path, tries = self.tasks.get_nowait()
+                except queue.Empty:
+                    return
+                if driver is None:
+                    try:
+                        driver = pool.acquire(timeout=60)
+                    except WebDriverException as e:  # (no browser can be launched)
+                        print("no browser session --> %s" % e)
+                    if driver is None:
+                        self.tasks.put((image_path, tries))  # (for a worker with a browser - or reported by 'run')
+                        return
+                try:
+                    upload_path = self.prepared[image_path].result() if image_path in self.prepared else image_path
+                except Exception as e:  # (like a broken/huge image, or a broken pool of processes)
+                    self.write({"image": image_path, "error": "failed to prepare the image --> %s" % e})
+                    continue
+                try:
+                    record = search_image(driver, image_path, upload_path)
+                except WebDriverException as e:
+                    pool.discard(driver)  # (the session might be broken - a new one for the next image)
+                    driver = None
+                    if tries < MAX_RETRIES:
+                        self.tasks.put((image_path, tries + 1))
+                        continue
+                    record = {"image": image_path, "error": str(e).strip()}
+                except Exception as e:  # (like unexpected results of the page - the image fails, not the worker)
+                    record = {"image": image_path, "error": "failed to search the image --> %s" % e}
+                self.write(record)
+        finally:
+            pool.release(driver)
+
+    def write(self, record):
+        """
+        writes the record of an image to the output file (one JSON object per line)
+        :param record: dict
+        :return:
+        """
+        record["time"] = strftime("%Y-%m-%d %H:%M:%S")
+        records = [record]
+        if not record.get("error"):
+            # (the near-duplicates of the image point to its record)
+            records.extend({"image": image_path, "duplicate_of": record["image"], "error": None,
+                            "time": record["time"]} for image_path in self.duplicates.get(record["image"], []))
+        with self.lock:
+            for current in records:
+                self.out_f.write(json.dumps(current, ensure_ascii=False) + "\n")
+            self.out_f.flush()
+            self.count += len(records)
+            if self.index is not None and not record.get("error"):
+                self.index.mark_searched([current["image"] for current in records])
+        print("%s --> %s" % (record["image"], record.get("results_url") or record.get("error")))
+
+
+def search_image(driver, image_path, upload_path=None):
+    """
+    a reverse image search of an image - uploads the file through the file input of the page,
+    and waits for the results
+    :param driver: the WebDriver
+    :param image_path: absolute path to the image
+    :param upload_path: absolute path to the file to upload (the prepared image), or None - the image itself
+    :return: the record of the image (dict)
+    """
+    PACER.get(driver, BASE_URL)  # (waits for the turn of the host)
+    try:
+        file_input = dom_present(FILE_INPUT)(driver)
+    except NoSuchElementException:
+        # the file input is added to the page with the upload box
+        wait_until(driver, dom_present(SEARCH_BY_IMAGE)).click()
+        file_input = wait_until(driver, dom_present(FILE_INPUT))
+    old_url = driver.current_url
+    file_input.send_keys(upload_path or image_path)  # uploads the file (without the OS file dialog)
+    try:
+        results_url = wait_until(driver, url_changed(old_url), timeout=RESULTS_TIMEOUT)
+    except TimeoutException:
+        return {"image": image_path, "error": "no results after %d seconds" % RESULTS_TIMEOUT}
+    settle(driver)  # wait till the results are rendered (no requests, no DOM changes)
+    results = driver.execute_script(RESULTS_SCRIPT, MAX_LINKS)
+    PACER.report(BASE_URL, text=results["text"])  # (a block page slows down the next uploads)
+    return {"image": image_path, "results_url": results_url, "matching_pages": MATCHING_PAGES in results["text"],
+            "best_guess": results["best_guess"], "links": results["links"], "error": None}
+
+
+def searched_images(out_path):
+    """
+    :param out_path: path to the output file (JSON Lines)
+    :return: set of the images that already have a record (without an error)
+    """
+    done = set()
+    if os.path.isfile(out_path):
+        with open(out_path, encoding='utf-8') as in_f:
+            for line in in_f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # (a torn line - after a crash)
+                if not record.get("error"):
+                    done.add(record["image"])
+    return done
+
+
+def main():
+    """
+    The main function - a reverse image search of every image in a directory
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-d", "--DIR", dest="dir_path", type=str, required=True,
+                        help="Enter a path to a directory with images")
+    parser.add_argument("-o", "--OUTPUT", dest="out_path", type=str, default="image_search_results.jsonl",
+                        help="Enter a path to the output file (JSON Lines)")
+    parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                        help="Enter the number of browser sessions")
+    parser.add_argument("-t", "--THRESHOLD", dest="threshold", type=int, default=THRESHOLD,
+                        help="Enter the max pHash distance (0-64) of near-duplicates")
+    parser.add_argument("-a", "--ALL", dest="search_all", action="store_true",
+                        help="Search every image (without skipping near-duplicates)")
+    parser.add_argument("-m", "--MAX-DIM", dest="max_dim", type=int, default=MAX_DIM,
+                        help="Enter the max width/height (pixels) of an uploaded image (0 - upload the original files)")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    index = None
+    if not args.search_all:
+        index = ImageIndex(os.path.join(args.dir_path, INDEX_NAME), threshold=args.threshold)
+        index.update(args.dir_path)  # (hashes only new and changed images)
+    preprocessor = UploadPreprocessor(max_dim=args.max_dim) if args.max_dim > 0 else None
+    try:
+        print("%d records written" % BatchImageSearch(images_in_tree(args.dir_path), args.out_path,
+                                                      workers=args.workers, index=index,
+                                                      preprocessor=preprocessor).run())
+    finally:
+        if preprocessor is not None:
+            preprocessor.close()
+
+
+if __name__ == '__main__':
+    main()
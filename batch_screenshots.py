@@ -0,0 +1,290 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A batch mode of 'web_pages_screenshots' - full-page screenshots of large URL lists (tens of thousands of pages),
+with a pool of headless browsers.
+
+The URLs are read lazily from a text file (one URL per line), and handed out to N workers (each with its own
+headless browser). A per-domain cap limits the number of pages of the same domain that are captured at the
+same time (the other workers take pages of other domains meanwhile), and the requests to each host are paced.
+The output path of each page is deterministic - '<domain>/<slugified URL>.png' - so a rerun skips the pages
+that were already captured. A progress report is printed while running, and a throughput report at the end.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\batch_screenshots.py -f "urls.txt" -w 8 -d 2
+"""
+
+import os
+import hashlib
+import argparse
+import threading
+from collections import deque, Counter
+from time import time
+from urllib.parse import urlparse
+from slugify import slugify
+from validators import url
+from selenium.common.exceptions import WebDriverException
+from username_stream import iter_lines
+from pacing import PACER
+from page_waits import settle
+from web_pages_screenshots import new_headless_driver, full_page_png, create_dir, SCREENSHOTS_PATH
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+WORKERS = 4  # number of headless browsers
+PER_DOMAIN = 2  # max number of pages of the same domain that are captured at the same time
+MAX_DEFERRED = 10000  # max number of URLs that wait for their domain (before reading more URLs)
+SETTLE_TIMEOUT = 5  # max time (seconds) to wait for a page to settle before the capture
+MAX_SLUG = 100  # max length of the slugified part of a file name
+REPORT_EVERY = 100  # print progress every 100 pages
+
+
+class DomainScheduler:
+
+    def __init__(self, urls, per_domain=PER_DOMAIN, max_deferred=MAX_DEFERRED):
+        """
+        creates new instance of DomainScheduler Object - hands out URLs to the workers, with a cap on the
+        number of pages of the same domain at the same time
+        :param urls: iterable of URLs (read lazily)
+        :param per_domain: max number of pages of the same domain at the same time
+        :param max_deferred: max number of URLs that wait for their domain (memory bound)
+        """
+        self.urls = iter(urls)
+        self.per_domain = per_domain
+        self.max_deferred = max_deferred
+        self.active = Counter()  # domain --> number of pages that are captured now
+        self.deferred = {}  # domain --> deque of URLs that wait for the domain
+        self.deferred_count = 0
+        self.exhausted = False
+        self.condition = threading.Condition()
+
+    def next_url(self):
+        """
+        takes the next URL (of a domain that is under the cap) - waits while all the waiting URLs are of
+        domains at the cap
+        :return: URL (string), or None - no more URLs
+        """
+        with self.condition:
+            while True:
+                # URLs that waited for their domain first
+                for domain, waiting in self.deferred.items():
+                    if self.active[domain] < self.per_domain:
+                        return self._take(domain, waiting.popleft(), deferred=True)
+                if not self.exhausted and self.deferred_count < self.max_deferred:
+                    current_url = next(self.urls, None)
+                    if current_url is None:
+                        self.exhausted = True
+                        continue
+                    domain = domain_of(current_url)
+                    if self.active[domain] < self.per_domain:
+                        return self._take(domain, current_url)
+                    self.deferred.setdefault(domain, deque()).append(current_url)
+                    self.deferred_count += 1
+                    continue
+                if self.exhausted and not self.deferred_count:
+                    return None
+                self.condition.wait()  # till a page is done
+
+    def _take(self, domain, current_url, deferred=False):
+        """
+        marks a URL as active (called with the lock)
+        :return: the URL
+        """
+        if deferred:
+            self.deferred_count -= 1
+            if not self.deferred[domain]:
+                del self.deferred[domain]
+        self.active[domain] += 1
+        return current_url
+
+    def done(self, current_url):
+        """
+        marks a page as done (frees a place of its domain)
+        :param current_url: URL (string)
+        :return:
+        """
+        with self.condition:
+            self.active[domain_of(current_url)] -= 1
+            self.condition.notify_all()
+
+
+class BatchScreenshots:
+
+    def __init__(self, urls, workers=WORKERS, per_domain=PER_DOMAIN, browser='firefox', out_dir=SCREENSHOTS_PATH):
+        """
+        creates new instance of BatchScreenshots Object
+        :param urls: iterable of URLs (read lazily)
+        :param workers: number of headless browsers
+        :param per_domain: max number of pages of the same domain at the same time
+        :param browser: 'firefox' or 'chrome'
+        :param out_dir: path to dir to save the screenshots
+        """
+        self.scheduler = DomainScheduler(urls, per_domain=per_domain)
+        self.workers = workers
+        self.browser = browser
+        self.out_dir = out_dir
+        self.counts = Counter()  # 'captured' / 'skipped' / 'failed' --> number of pages
+        self.lock = threading.Lock()
+        self.start_time = None
+
+    def run(self):
+        """
+        captures all the pages with the workers, and prints a throughput report
+        :return: the counts (Counter)
+        """
+        self.start_time = time()
+        threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.report(final=True)
+        return self.counts
+
+    def worker(self):
+        """
+        a worker - takes URLs from the scheduler, and captures them with its own headless browser
+        :return:
+        """
+        driver = None
+        try:
+            current_url = self.scheduler.next_url()
+            while current_url is not None:
+                result = 'failed'
+                try:
+                    file_path = output_path(current_url, self.out_dir)
+                    if os.path.isfile(file_path):
+                        result = 'skipped'  # captured in a previous run
+                    else:
+                        if driver is None:
+                            driver = new_headless_driver(self.browser)
+                        result = 'captured' if capture_page(driver, current_url, file_path) else 'failed'
+                except WebDriverException as e:
+                    print("failed to capture %s --> %s" % (current_url, e))
+                    if driver is not None:
+                        quit_quietly(driver)  # (the browser might be broken - a new one for the next page)
+                        driver = None
+                except Exception as e:  # (like a failed write, or a broken image - the page fails, not the worker)
+                    print("failed to capture %s --> %s" % (current_url, e))
+                finally:
+                    self.scheduler.done(current_url)  # (frees the place of the domain - for the other workers)
+                self.count(result)
+                current_url = self.scheduler.next_url()
+        finally:
+            if driver is not None:
+                quit_quietly(driver)
+
+    def count(self, result):
+        """
+        counts a page, and prints progress every 'REPORT_EVERY' pages
+        :param result: 'captured' / 'skipped' / 'failed'
+        :return:
+        """
+        with self.lock:
+            self.counts[result] += 1
+            if sum(self.counts.values()) % REPORT_EVERY == 0:
+                self.report()
+
+    def report(self, final=False):
+        """
+        prints the progress (and the throughput)
+        :param final: True - the final report, or False
+        :return:
+        """
+        elapsed = time() - self.start_time
+        total = sum(self.counts.values())
+        print("%s%d pages (%d captured, %d skipped, %d failed) in %.0f seconds - %.1f pages per minute"
+              % ("finished: " if final else "", total, self.counts['captured'], self.counts['skipped'],
+                 self.counts['failed'], elapsed, self.counts['captured'] * 60 / max(elapsed, 1)))
+
+
+def capture_page(driver, current_url, file_path):
+    """
+    loads a page, and saves a full-page screenshot of it
+    :param driver: the WebDriver (headless)
+    :param current_url: URL (string)
+    :param file_path: the path of the output file
+    :return: True - if the page was captured, or False
+    """
+    PACER.get(driver, current_url)  # (waits for the turn of the host)
+    settle(driver, timeout=SETTLE_TIMEOUT)
+    png = full_page_png(driver)
+    if not create_dir(os.path.dirname(file_path)):
+        return False
+    with open(file_path + ".part", 'wb') as out_f:
+        out_f.write(png)
+    os.replace(file_path + ".part", file_path)  # (a complete file, or no file - after a crash)
+    return True
+
+
+def output_path(current_url, out_dir=SCREENSHOTS_PATH):
+    """
+    :param current_url: URL (string)
+    :param out_dir: path to dir to save the screenshots
+    :return: a deterministic path of the screenshot of the URL - '<domain>/<slugified URL>.png'
+    (with a short hash of the URL - two URLs with the same slug don't collide)
+    """
+    parsed = urlparse(current_url)
+    slug = slugify(parsed.path + ("?" + parsed.query if parsed.query else ""), lowercase=False)[:MAX_SLUG]
+    digest = hashlib.sha1(current_url.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(out_dir, slugify(domain_of(current_url)), "%s-%s.png" % (slug or "index", digest))
+
+
+def domain_of(current_url):
+    """
+    :param current_url: URL (string)
+    :return: the domain of the URL (lowercase, without 'www.')
+    """
+    host = (urlparse(current_url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def quit_quietly(driver):
+    """
+    closes the browser (ignores errors of a browser that is already closed)
+    :param driver: the WebDriver
+    :return:
+    """
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+def valid_urls(f_path):
+    """
+    reads URLs lazily from a text file (one URL per line), and skips invalid lines
+    :param f_path: path to a file (string)
+    :return: generator of URLs
+    """
+    for line in iter_lines(f_path):
+        if line and url(line):  # Return whether or not given value is a valid URL.
+            yield line
+
+
+def main():
+    """
+    The main function - takes full-page screenshots of the URLs in a text file, with a pool of headless browsers
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILE", dest="file_name", type=str, required=True,
+                        help="Enter a path to a text file with URLs (one URL per line)")
+    parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                        help="Enter the number of headless browsers")
+    parser.add_argument("-d", "--PER-DOMAIN", dest="per_domain", type=int, default=PER_DOMAIN,
+                        help="Enter the max number of pages of the same domain at the same time")
+    parser.add_argument("-b", "--BROWSER", dest="browser", type=str, default="firefox",
+                        choices=["firefox", "chrome"], help="Enter the browser")
+    parser.add_argument("-o", "--OUTPUT", dest="out_dir", type=str, default=SCREENSHOTS_PATH,
+                        help="Enter a path to a dir to save the screenshots")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    BatchScreenshots(valid_urls(args.file_name), workers=args.workers, per_domain=args.per_domain,
+                     browser=args.browser, out_dir=args.out_dir).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -8,10 +8,10 @@ and to save the HTML source of the result from 'Wikipedia'.
 
 import os
 import unittest
-from time import sleep
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+from page_waits import wait_until, all_of, dom_present, url_changed, dom_ready
 
 __email__ = "knifef@protonmail.com"
 
@@ -50,21 +50,22 @@ class TestSeleniumFireFox(unittest.TestCase):  # A class whose instances are sin
         self.driver.get(BASE_URL)
         # WebDriver waits up to 10 seconds before throwing a TimeoutException
         # unless it finds the element (search box) to return within 10 seconds.
-        search_box = WebDriverWait(self.driver, 10).until(lambda driver: self.driver.find_element_by_name('q'))
-        sleep(2)  # delay
+        search_box = wait_until(self.driver, dom_present((By.NAME, 'q')))
+        old_url = self.driver.current_url
         # Clears the text if it's a text entry element.
         search_box.clear()
-        search_box.send_keys("Unit testing")  # Sends keys to current focused element.
-        sleep(1)  # delay
-        search_box.send_keys(Keys.ENTER)  # hit Enter to search
-        sleep(2)  # delay
+        search_box.send_keys("Unit testing", Keys.ENTER)  # Sends keys to current focused element, and hit Enter
+        # wait for the results page (a new URL, with the results element)
+        wait_until(self.driver, all_of(url_changed(old_url), dom_present((By.ID, 'b_results'))))
         # Just like self.assertTrue(a not in b), but with a nicer default message.
         self.assertNotIn("There are no results for", self.driver.page_source)
         # WebDriver waits up to 10 seconds before throwing a TimeoutException
         # unless it finds the element (search box) to return within 10 seconds.
-        link_elem = WebDriverWait(self.driver, 10).until(lambda driver: self.driver.find_element_by_xpath(WIKI_LINK))
+        link_elem = wait_until(self.driver, dom_present((By.XPATH, WIKI_LINK)))
+        old_url = self.driver.current_url
         link_elem.click()  # Clicks the element.
-        sleep(3)  # delay
+        # wait for the page of 'Wikipedia' (a new URL, that finished loading)
+        wait_until(self.driver, all_of(url_changed(old_url), dom_ready()))
 
         # Just like self.assertTrue(a in b), but with a nicer default message.
         self.assertIn("wikipedia", self.driver.title.lower())
@@ -0,0 +1,282 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A pool of warm (already launched) headless Chrome browsers, for the Selenium scrapers.
+
+Launching chromedriver & Chrome takes most of the time of a short scraping job, so the pool starts
+one chromedriver service (that is reused by all the browsers), pre-launches N headless browsers in the
+background, and hands them out already warm. A returned browser is recycled (cookies are deleted,
+extra windows are closed and the page is blank) and handed out again, instead of quitting it and
+launching a new one. The user agent of a browser is switched with Chrome DevTools, without a relaunch.
+"""
+
+import os
+import queue
+import threading
+from time import time
+from concurrent.futures import ThreadPoolExecutor
+from selenium import webdriver
+from selenium.webdriver import DesiredCapabilities
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import WebDriverException
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+CHROME_DRIVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chromedriver')
+WITHOUT_EXTENSIONS = "--disable-extensions"  # disable extensions
+POOL_SIZE = 3  # number of browsers in pool
+PAGE_LOAD_TIMEOUT = 30  # the amount of time (seconds) to wait for a page load to complete
+BLANK_PAGE = "about:blank"
+POLL = 1.0  # time (seconds) between two checks that a browser can still come up (while waiting for one)
+
+
+class ChromeDriverPool:
+
+    def __init__(self, size=POOL_SIZE, arguments=None, prefs=None, proxy_server=None,
+                 driver_path=CHROME_DRIVER_PATH, capabilities=None):
+        """
+        creates new instance of ChromeDriverPool Object - starts chromedriver, and launches
+        the browsers in the background.
+        :param size: number of browsers in pool
+        :param arguments: extra arguments for ChromeOptions (list of strings), or None
+        :param prefs: Chrome preferences (dict), or None
+        :param proxy_server: proxy server (IP:PORT) that all the browsers use, or None
+        :param driver_path: path to chromedriver
+        :param capabilities: extra desired capabilities (dict, like performance logging), or None
+        """
+        self.size = size
+        self.arguments = arguments or []
+        self.prefs = prefs
+        self.proxy_server = proxy_server
+        self.capabilities = capabilities
+        self.idle = queue.Queue()  # warm browsers, ready to be handed out
+        self.lock = threading.Lock()
+        self.drivers = set()  # all the browsers of the pool (idle & in use)
+        self.launching = 0  # number of browsers that are being launched
+        self.launch_error = None  # the error of the last launch that failed
+        self.closed = False
+
+        # one chromedriver service for all the browsers (started once)
+        self.service = Service(driver_path)
+        self.service.start()
+
+        # launch & recycle browsers in the background
+        self.executor = ThreadPoolExecutor(max_workers=size)
+        for _ in range(size):
+            self._submit(self._launch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _launch(self):
+        """
+        launches a new headless browser (using the shared chromedriver service), and adds it to the idle queue
+        :return:
+        """
+        driver = None
+        try:
+            if not self.closed:
+                driver = new_remote_chrome(self.service.service_url, arguments=self.arguments, prefs=self.prefs,
+                                           proxy_server=self.proxy_server,
+                                           extra_capabilities=self.capabilities)
+        except WebDriverException as e:
+            print("failed to launch a browser --> %s" % e)
+            self.launch_error = e
+        finally:
+            with self.lock:
+                self.launching -= 1
+                if driver is not None:
+                    self.drivers.add(driver)
+        if driver is not None:
+            self.idle.put(driver)
+
+    def _submit(self, task, *args):
+        """
+        runs a task in the background (launch/recycle) - unless the pool is closed
+        :return: True - if the task was submitted, or False (the pool is closed)
+        """
+        with self.lock:  # (so a task is never submitted after the executor was shut down)
+            if self.closed:
+                return False
+            if task == self._launch:
+                self.launching += 1
+            self.executor.submit(task, *args)
+            return True
+
+    def _recycle(self, driver):
+        """
+        cleans a returned browser and adds it to the idle queue (or replaces it, if it doesn't respond)
+        :param driver: the WebDriver
+        :return:
+        """
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:  # close every window except the first one
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.delete_all_cookies()  # delete cookies in the scope of the session
+            driver.get(BLANK_PAGE)
+        except WebDriverException:
+            self.discard(driver)
+            return
+        if self.closed:
+            quit_driver(driver)
+        else:
+            self.idle.put(driver)
+
+    def acquire(self, user_agent=None, timeout=None):
+        """
+        hands out a warm browser (waits for one if all the browsers are in use)
+        :param user_agent: user agent to use in the browser (string), or None
+        :param timeout: max time (in seconds) to wait for a browser, or None (no limit)
+        :return: the WebDriver, or None (timeout) - raises WebDriverException if no browser can come up
+        (all the launches failed)
+        """
+        deadline = None if timeout is None else time() + timeout
+        while True:
+            try:
+                driver = self.idle.get(timeout=POLL if deadline is None else max(0, min(POLL, deadline - time())))
+                break
+            except queue.Empty:
+                with self.lock:
+                    if not self.drivers and not self.launching:
+                        raise WebDriverException("no browser could be launched --> %s" % self.launch_error)
+                if deadline is not None and time() >= deadline:
+                    return None
+        if user_agent:
+            set_user_agent(driver, user_agent)
+        return driver
+
+    def release(self, driver):
+        """
+        returns a browser to the pool (it is recycled in the background)
+        :param driver: the WebDriver
+        :return:
+        """
+        if driver is not None and not self._submit(self._recycle, driver):
+            self.discard(driver)  # (the pool is closed)
+
+    def owns(self, driver):
+        """
+        :param driver: the WebDriver
+        :return: True - if the browser belongs to the pool, or False
+        """
+        with self.lock:
+            return driver in self.drivers
+
+    def discard(self, driver):
+        """
+        quits a broken browser, and launches a new one instead (in the background)
+        :param driver: the WebDriver
+        :return:
+        """
+        self._submit(self._launch)  # (before the browser is removed - so the pool never looks empty)
+        with self.lock:
+            self.drivers.discard(driver)
+        quit_driver(driver)
+
+    def close(self):
+        """
+        quits all the browsers and stops chromedriver
+        :return:
+        """
+        with self.lock:
+            self.closed = True
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            drivers = list(self.drivers)
+            self.drivers.clear()
+        for driver in drivers:
+            quit_driver(driver)
+        self.service.stop()
+
+
+def chrome_options(arguments=None, prefs=None, proxy_server=None, user_agent=None, hide_window=True):
+    """
+    builds options for a Chrome browser
+    :param arguments: extra arguments for ChromeOptions (list of strings), or None
+    :param prefs: Chrome preferences (dict), or None
+    :param proxy_server: proxy server (IP:PORT), or None
+    :param user_agent: user agent (string), or None
+    :param hide_window: True - to use headless browser, or False
+    :return: webdriver.ChromeOptions
+    """
+    options = webdriver.ChromeOptions()  # build options for chrome.
+    options.add_argument("--incognito")  # incognito mode in chrome without using 'User Data'
+    if hide_window:
+        options.add_argument("--headless")  # headless browser
+    options.add_argument(WITHOUT_EXTENSIONS)  # disable extensions in chrome
+    for argument in arguments or []:
+        options.add_argument(argument)
+    if prefs:
+        options.add_experimental_option("prefs", prefs)
+    if proxy_server:
+        options.add_argument('--proxy-server=%s' % proxy_server)  # adds proxy as argument of ChromeOptions
+    if user_agent:
+        options.add_argument('--user-agent=%s' % user_agent)
+    return options
+
+
+def new_remote_chrome(service_url, arguments=None, prefs=None, proxy_server=None, extra_capabilities=None):
+    """
+    launches a headless Chrome browser through a running chromedriver service
+    :param service_url: the URL of the chromedriver service
+    :param extra_capabilities: extra desired capabilities (dict), or None
+    :return: the WebDriver (webdriver.Remote)
+    """
+    options = chrome_options(arguments=arguments, prefs=prefs, proxy_server=proxy_server)
+    # a copy of default supported desired capabilities of chrome browser
+    capabilities = DesiredCapabilities.CHROME.copy()
+    capabilities['acceptSslCerts'] = True  # accept all SSL certs by default
+    capabilities['acceptInsecureCerts'] = True  # accept Insecure Certs
+    capabilities.update(options.to_capabilities())
+    capabilities.update(extra_capabilities or {})
+
+    driver = webdriver.Remote(command_executor=service_url, desired_capabilities=capabilities)
+    # Set the amount of time to wait for a page load to complete before throwing an error.
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.delete_all_cookies()  # deletes all stored cookies
+    return driver
+
+
+def execute_cdp(driver, cmd, params=None):
+    """
+    executes a Chrome DevTools Protocol command (works with webdriver.Chrome and with webdriver.Remote)
+    :param driver: the WebDriver
+    :param cmd: the name of the command, like 'Network.setUserAgentOverride'
+    :param params: the parameters of the command (dict), or None
+    :return: the result of the command (dict)
+    """
+    if hasattr(driver, "execute_cdp_cmd"):
+        return driver.execute_cdp_cmd(cmd, params or {})
+    # webdriver.Remote doesn't know the chromedriver endpoint - register it
+    driver.command_executor._commands["executeCdpCommand"] = ("POST", "/session/$sessionId/goog/cdp/execute")
+    return driver.execute("executeCdpCommand", {"cmd": cmd, "params": params or {}})["value"]
+
+
+def set_user_agent(driver, user_agent):
+    """
+    switches the user agent of a running Chrome browser (without a relaunch)
+    :param driver: the WebDriver
+    :param user_agent: user agent (string)
+    :return:
+    """
+    execute_cdp(driver, "Network.setUserAgentOverride", {"userAgent": user_agent})
+
+
+def quit_driver(driver):
+    """
+    closes the browser (ignores errors of a browser that is already closed)
+    :param driver: the WebDriver
+    :return:
+    """
+    try:
+        driver.quit()  # Closes the browser and shuts down the session
+    except WebDriverException:
+        pass
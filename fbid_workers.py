@@ -0,0 +1,409 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A parallel (sharded) mode of 'scrape_fb_uids' - converts facebook usernames to uids with several
+FbidScraper workers, each in its own process, with its own browser and its own proxies.
+
+A coordinator splits the normalized usernames into small shards, and the workers take the shards from a shared
+queue (a worker that is done takes the next shard, so fast workers do more of the work).
+When the proxies of a worker die, the worker hands back the rest of its shard, and the coordinator gives it to
+the other workers. The results are merged in input order (and recorded in the uid cache and in the journal).
+
+Throughput grows with the number of workers, until the rate limit of "findmyfbid" is reached -
+an optional shared rate limit (lookups per minute, for all the workers together) keeps the workers below it.
+"""
+
+import os
+import argparse
+import multiprocessing
+from collections import deque
+from queue import Empty
+from random import seed
+from time import sleep, time
+from proxy_pool import ProxyPool
+from driver_pool import ChromeDriverPool
+from rotating_proxy import RotatingProxy
+from proxy_rotation import RotationService
+from uid_cache import UidCache
+from uid_journal import UidJournal
+from network_capture import enable_performance_log
+from pacing import PACER
+from scrape_fb_uids import FbidScraper, PREFERENCES, FIND_FBID, get_proxies
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+WORKERS = 4  # number of worker processes (browsers)
+SHARD_SIZE = 10  # number of usernames in a shard
+ROTATE_EVERY = 10  # a worker switches its proxy every 10 usernames (as in 'uids_from_users')
+MAX_RETRIES = 2  # number of times to search for a username (when the search box is not found)
+POLL_TIMEOUT = 5  # max time (seconds) to wait for a message of the workers (before checking that they're alive)
+SHARD_STARTED = "started"  # message of a worker - it took a shard from the queue
+SHARD_DONE = "done"  # message of a worker - the shard is done
+WORKER_DIED = "died"  # message of a worker - no working proxy (or a broken browser), the rest of the shard is back
+PENDING = object()  # result of a username that wasn't searched (no working proxy) - retried on restart
+SKIPPED = object()  # result of a username that was done in a previous run (in the journal)
+
+
+class SharedRateLimit:
+
+    def __init__(self, per_minute, context=multiprocessing):
+        """
+        creates new instance of SharedRateLimit Object - spaces the lookups of all the workers (processes)
+        :param per_minute: max number of lookups per minute (for all the workers together)
+        :param context: multiprocessing context (of the worker processes)
+        """
+        self.interval = 60.0 / per_minute  # seconds between two lookups
+        self.next_time = context.Value('d', 0.0)  # the time of the next allowed lookup (shared between processes)
+
+    def wait(self):
+        """
+        waits (sleeps) till the next allowed lookup
+        :return:
+        """
+        with self.next_time.get_lock():
+            now = time()
+            start = max(self.next_time.value, now)
+            self.next_time.value = start + self.interval
+        if start > now:
+            sleep(start - now)
+
+
+class FbidWorker:
+
+    def __init__(self, worker_id, proxies, tasks, results, rate_limit=None):
+        """
+        creates new instance of FbidWorker Object - an FbidScraper (with a browser and a local rotating proxy)
+        that resolves shards of usernames from a queue
+        :param worker_id: number of the worker
+        :param proxies: list of proxies (strings) of this worker
+        :param tasks: queue of shards (lists of (position, username) tuples), None - stop
+        :param results: queue of messages to the coordinator
+        :param rate_limit: SharedRateLimit object, or None
+        """
+        self.worker_id = worker_id
+        self.proxies = proxies
+        self.tasks = tasks
+        self.results = results
+        self.rate_limit = rate_limit
+        self.scraper = None
+        self.proxy_worked = False
+        self.count = 0  # number of searched usernames
+
+    def run(self):
+        """
+        resolves shards till the coordinator stops the worker, or till no proxy works
+        :return:
+        """
+        seed()  # (a forked process has the same random state as the coordinator, and as the other workers)
+        rotation = RotationService(self.proxies)
+        rotating_proxy = RotatingProxy(port=0, mode='sticky', chooser=rotation.draw_proxy, on_result=rotation.report)
+        rotating_proxy.start()
+        try:
+            driver_pool = ChromeDriverPool(size=1, arguments=["--window-size=1920,1080"], prefs=PREFERENCES,
+                                           proxy_server=rotating_proxy.address,
+                                           capabilities=enable_performance_log({}))
+        except Exception as e:  # the browser couldn't start - hand back a shard, so the coordinator knows
+            print("worker %d: %s" % (self.worker_id, e))
+            rotating_proxy.stop()
+            shard = self.tasks.get()
+            if shard is not None:
+                self.results.put((SHARD_STARTED, self.worker_id, [], shard))
+                self.results.put((WORKER_DIED, self.worker_id, [], shard))
+            return
+        self.scraper = FbidScraper(driver_pool=driver_pool, rotating_proxy=rotating_proxy, rotation=rotation,
+                                   capture_network=True)
+        self.scraper.proxies = list(self.proxies)
+        try:
+            for shard in iter(self.tasks.get, None):
+                self.results.put((SHARD_STARTED, self.worker_id, [], shard))  # (a crash hands it back too)
+                done = []
+                try:
+                    alive = self.resolve_shard(shard, done)
+                except Exception as e:  # a broken browser - hand back the rest of the shard
+                    print("worker %d: %s" % (self.worker_id, e))
+                    alive = False
+                if not alive:
+                    self.results.put((WORKER_DIED, self.worker_id, done, shard[len(done):]))
+                    break
+                self.results.put((SHARD_DONE, self.worker_id, done, []))
+        finally:
+            self.scraper.destroy_driver()
+            driver_pool.close()
+            rotating_proxy.stop()
+
+    def resolve_shard(self, shard, done):
+        """
+        searches for the uids of the usernames of a shard
+        :param shard: list of (position, username) tuples
+        :param done: list to append the results to - (position, username, uid) tuples, in shard order
+        :return: True - the shard is done, or False - no proxy works (the rest of the shard is not done)
+        """
+        retries = 0
+        while len(done) < len(shard):
+            position, user = shard[len(done)]
+            if not self.proxy_worked or (self.count % ROTATE_EVERY == 0 and self.count != 0):
+                # trying to change proxy - loop till the proxy will work
+                self.proxy_worked = self.scraper.till_proxy_work_loop()
+                if not self.proxy_worked:
+                    return False
+            if self.rate_limit is not None:
+                self.rate_limit.wait()
+            PACER.wait(FIND_FBID)  # wait for the turn of "findmyfbid" (adapts to the responses of this worker)
+            uid = self.scraper.scrape_find_my_fbid(user)
+            self.count += 1
+            if uid is None and retries < MAX_RETRIES:
+                self.proxy_worked = False  # the search box is not found (the proxy probably died) - search again
+                retries += 1
+                continue
+            done.append((position, user, uid))
+            retries = 0
+        return True
+
+
+def run_worker(worker_id, proxies, tasks, results, rate_limit=None):
+    """
+    the target of a worker process
+    :return:
+    """
+    FbidWorker(worker_id, proxies, tasks, results, rate_limit=rate_limit).run()
+
+
+def proxy_shares(proxies, workers):
+    """
+    :param proxies: list of proxies (strings)
+    :param workers: number of workers
+    :return: list of proxy lists - a separate share of proxies to each worker
+    (all the proxies to each worker - if there are not enough proxies for separate shares)
+    """
+    if len(proxies) < workers:
+        return [list(proxies) for _ in range(workers)]
+    return [proxies[i::workers] for i in range(workers)]
+
+
+class FbidCoordinator:
+
+    def __init__(self, users, proxies, workers=WORKERS, shard_size=SHARD_SIZE, per_minute=None,
+                 uid_cache=None, journal=None):
+        """
+        creates new instance of FbidCoordinator Object
+        :param users: iterable of normalized usernames (like 'FbidScraper.facebook_users')
+        :param proxies: list of working proxies (strings)
+        :param workers: number of worker processes
+        :param shard_size: number of usernames in a shard
+        :param per_minute: max number of lookups per minute (for all the workers together), or None - no limit
+        :param uid_cache: UidCache object (cached usernames are not sent to workers), or None
+        :param journal: UidJournal object (checkpoint/resume - in input order), or None
+        """
+        self.users = users
+        self.proxies = proxies
+        self.workers = workers
+        self.shard_size = shard_size
+        self.per_minute = per_minute
+        self.uid_cache = uid_cache
+        self.journal = journal
+        self.searched = 0  # number of usernames that were searched by the workers
+
+    def run(self):
+        """
+        resolves the usernames with the workers, and yields the results in input order
+        :return: generator of (username, uid) tuples - uid is a string, an empty string (not found),
+        or None (not searched)
+        """
+        context = multiprocessing.get_context()
+        tasks = context.Queue()
+        results = context.Queue()
+        rate_limit = SharedRateLimit(self.per_minute, context=context) if self.per_minute else None
+        processes = []
+        if self.proxies:  # (without proxies - only the cached usernames are resolved)
+            processes = [context.Process(target=run_worker, args=(worker_id, share, tasks, results, rate_limit),
+                                         daemon=True)
+                         for worker_id, share in enumerate(proxy_shares(self.proxies, self.workers))]
+        for process in processes:
+            process.start()
+
+        stream = enumerate(self.users)
+        finished = {}  # position --> (username, uid) - results that wait for the previous positions
+        issued = {}  # position --> username - usernames that were sent to the workers, and have no result yet
+        requeued = deque()  # shards that were handed back by dead workers
+        working = {}  # worker id --> the shard that the worker took from the queue (till its result)
+        dead = set()  # ids of the workers that died (or exited)
+        next_position = 0  # the next position to yield
+        queued = 0  # number of shards in the tasks queue (not taken by a worker yet)
+        exhausted = False
+        try:
+            while len(dead) < len(processes):
+                # keep a few shards per worker in the queue, so a worker that is done doesn't wait
+                while queued + len(working) < 2 * (len(processes) - len(dead)) and (requeued or not exhausted):
+                    if requeued:
+                        shard = requeued.popleft()
+                    else:
+                        shard, exhausted = self.next_shard(stream, finished)
+                        if not shard:
+                            break
+                        issued.update(shard)
+                    tasks.put(shard)
+                    queued += 1
+
+                # yield the results in input order
+                while next_position in finished:
+                    yield from self.emit(next_position, finished.pop(next_position))
+                    next_position += 1
+                if not queued and not working:
+                    break
+
+                try:
+                    kind, worker_id, done, remaining = results.get(timeout=POLL_TIMEOUT)
+                except Empty:
+                    kind = None
+                if kind == SHARD_STARTED:
+                    queued -= 1
+                    if worker_id in dead:  # (a message that was read after the worker died)
+                        requeued.append(remaining)
+                    else:
+                        working[worker_id] = remaining
+                elif kind is not None:
+                    shard = working.pop(worker_id, None)  # (None - the shard was handed back when the worker died)
+                    for position, user, uid in done:
+                        if position in issued:  # (not a duplicate of a shard that was handed back)
+                            del issued[position]
+                            finished[position] = (user, uid)
+                            self.searched += 1
+                    if kind == WORKER_DIED and worker_id not in dead:
+                        dead.add(worker_id)
+                        print("worker %d: no working proxy (%d workers left)"
+                              % (worker_id, len(processes) - len(dead)))
+                        if remaining and shard is not None:
+                            requeued.append(remaining)  # the other workers resolve the rest of the shard
+
+                # a worker that crashed (without a message) - the other workers resolve its shard
+                for worker_id, process in enumerate(processes):
+                    if worker_id not in dead and not process.is_alive():
+                        dead.add(worker_id)
+                        print("worker %d: exited with code %s (%d workers left)"
+                              % (worker_id, process.exitcode, len(processes) - len(dead)))
+                        shard = working.pop(worker_id, None)
+                        if shard:
+                            requeued.append([(position, user) for position, user in shard if position in issued])
+
+            if len(dead) == len(processes):
+                # no worker left (or no proxies) - the usernames that were read and not searched are pending
+                # (retried on restart), and the rest of the stream is resolved from the cache/journal only
+                for position, user in issued.items():
+                    finished[position] = (user, PENDING)
+                issued.clear()
+                while True:
+                    while next_position in finished:
+                        yield from self.emit(next_position, finished.pop(next_position))
+                        next_position += 1
+                    if exhausted:
+                        break
+                    shard, exhausted = self.next_shard(stream, finished)
+                    for position, user in shard:
+                        finished[position] = (user, PENDING)  # (a cache miss - not searched)
+            # the rest of the results (every result that was resolved is recorded in the cache and in the journal)
+            for position in sorted(finished):
+                yield from self.emit(position, finished.pop(position))
+            if self.journal is not None and exhausted:
+                self.journal.finish()  # every username was read (complete - unless some are pending)
+        finally:
+            for _ in processes:
+                tasks.put(None)  # stop the workers (that are still alive)
+            for process in processes:
+                process.join(timeout=30)
+
+    def next_shard(self, stream, finished):
+        """
+        reads the next shard of usernames that need to be searched (usernames that are in the uid cache,
+        or were done in a previous run, are not searched - their results are added to 'finished')
+        :param stream: iterator of (position, username) tuples
+        :param finished: dict of results that wait to be yielded
+        :return: tuple (shard, exhausted) - list of (position, username) tuples, and True - if the stream ended
+        """
+        shard = []
+        for position, user in stream:
+            if self.journal is not None and self.journal.is_done(position):
+                finished[position] = (user, SKIPPED)
+                continue
+            if self.uid_cache is not None:
+                found, uid = self.uid_cache.lookup(user)
+                if found:  # resolved before (uid, or a negative result)
+                    finished[position] = (user, uid or "")
+                    continue
+            shard.append((position, user))
+            if len(shard) >= self.shard_size:
+                return shard, False
+        return shard, True
+
+    def emit(self, position, result):
+        """
+        records a result (in the uid cache and in the journal)
+        :param position: position of the username in the input stream
+        :param result: tuple (username, uid)
+        :return: generator of the (username, uid) tuple - nothing for a username that was done in a previous run
+        """
+        user, uid = result
+        if uid is SKIPPED:
+            return
+        if uid is PENDING:
+            uid = None
+        elif self.uid_cache is not None and uid is not None:
+            self.uid_cache.put(user, uid)  # uid, or a negative result (empty string)
+        if self.journal is not None:
+            self.journal.record(position, user, uid, pending=uid is None)
+        yield user, uid
+
+
+def main():
+    """
+    The main function - converts facebook usernames (from a text file) to uids with several workers
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILE", dest="file_name", type=str, required=True,
+                        help="Enter a path to a text file with facebook usernames/uids/profile URLs")
+    parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                        help="Enter the number of workers (browsers)")
+    parser.add_argument("-s", "--SHARD", dest="shard_size", type=int, default=SHARD_SIZE,
+                        help="Enter the number of usernames in a shard")
+    parser.add_argument("-r", "--RATE", dest="per_minute", type=float, default=None,
+                        help="Enter the max number of lookups per minute (for all the workers together)")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    proxy_pool = ProxyPool()  # persistent pool of proxies (on desktop)
+    proxy_pool.evict()  # remove stale/failing proxies from the pool
+    uid_cache = UidCache()  # persistent cache of resolved usernames (on desktop)
+    uid_cache.evict()  # remove expired resolutions from the cache
+    # checkpoint/resume journal (next to the input file)
+    journal = UidJournal(args.file_name) if os.path.isfile(args.file_name) else None
+    scraper = FbidScraper(args.file_name, proxy_pool=proxy_pool, uid_cache=uid_cache, journal=journal)
+    if journal is not None:
+        scraper.facebook_uids.extend(journal.uids)  # uids that were resolved before a crash/stop
+
+    if scraper.facebook_users:  # check if there are facebook users to search for their uids
+        proxies = []
+        # proxies are needed only for usernames that are not in the uid cache
+        if scraper.has_uncached_users():
+            proxies = get_proxies(scraper, proxy_pool)
+
+        coordinator = FbidCoordinator(scraper.facebook_users, proxies, workers=args.workers,
+                                      shard_size=args.shard_size, per_minute=args.per_minute,
+                                      uid_cache=uid_cache, journal=journal)
+        start = time()
+        for user, uid in coordinator.run():
+            if uid:
+                scraper.facebook_uids.append(uid)
+        elapsed = time() - start
+        print("%d usernames searched by %d workers in %.0f seconds (%.1f per minute)"
+              % (coordinator.searched, args.workers, elapsed, coordinator.searched * 60 / max(elapsed, 1)))
+
+        # save the uids (if found) to a Text file on Desktop (called 'facebook_uids')
+        scraper.save_uids()
+    if journal is not None:
+        journal.close()
+    uid_cache.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""An off-thread encoder of screenshots (frames) - the capture loop hands raw frames to a bounded queue,
+and a pool of threads (or processes) encodes and saves them, so the capture doesn't wait for the encoding.
+
+Frames that are identical to the previous frame (a scroll that stalled), or within a perceptual-hash
+threshold of it (dHash - a difference hash of a 9x8 grayscale thumbnail), are dropped before they are encoded
+(the previous frame is forgotten with 'reset' - when a new page starts).
+The format (PNG, WebP or JPEG) and its compression level/quality are configurable.
+"""
+
+import os
+import threading
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from PIL import Image
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+FORMATS = {"png": "PNG", "webp": "WEBP", "jpeg": "JPEG"}  # format --> the format name of PIL
+EXTENSIONS = {"png": ".png", "webp": ".webp", "jpeg": ".jpg"}
+PNG_COMPRESS_LEVEL = 6  # zlib compression level of PNG (0-9)
+QUALITY = 85  # quality of WebP/JPEG (1-100)
+WORKERS = 2  # number of encoding threads/processes
+QUEUE_SIZE = 8  # max number of frames that wait to be encoded (the capture waits when the queue is full)
+THRESHOLD = 0  # max dHash distance (bits, 0-64) of a duplicate frame (0 - only identical frames are dropped)
+
+
+class FrameEncoder:
+
+    def __init__(self, fmt="png", quality=None, workers=WORKERS, queue_size=QUEUE_SIZE, threshold=THRESHOLD,
+                 use_processes=False):
+        """
+        creates new instance of FrameEncoder Object
+        :param fmt: 'png', 'webp' or 'jpeg'
+        :param quality: PNG - compression level (0-9), WebP/JPEG - quality (1-100), or None - the default
+        :param workers: number of encoding threads/processes
+        :param queue_size: max number of frames that wait to be encoded
+        :param threshold: max dHash distance (bits) of a duplicate frame - 0: only identical frames are dropped
+        :param use_processes: True - encode in a pool of processes, or False - in a pool of threads
+        """
+        if fmt not in FORMATS:
+            raise ValueError("unsupported format: %s" % fmt)
+        self.fmt = fmt
+        self.options = save_options(fmt, quality)
+        self.threshold = threshold
+        self.slots = threading.BoundedSemaphore(queue_size)  # the bounded queue
+        self.executor = (ProcessPoolExecutor if use_processes else ThreadPoolExecutor)(max_workers=workers)
+        self.use_processes = use_processes
+        self.last_digest = None  # exact digest of the last kept frame
+        self.last_hash = None  # dHash of the last kept frame
+        self.saved = 0  # number of saved frames
+        self.dropped = 0  # number of dropped (duplicate) frames
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_duplicate(self, image):
+        """
+        checks a frame against the last kept frame (and keeps it as the last frame - if it's not a duplicate)
+        :param image: PIL Image
+        :return: True - if the frame is identical to the last kept frame (or within the threshold), or False
+        """
+        digest = blake2b(image.tobytes(), digest_size=16).digest()
+        if digest == self.last_digest:
+            return True
+        frame_hash = dhash(image)
+        if self.threshold and self.last_hash is not None \
+                and hamming(frame_hash, self.last_hash) <= self.threshold:
+            return True
+        self.last_digest, self.last_hash = digest, frame_hash
+        return False
+
+    def reset(self):
+        """
+        forgets the last kept frame (a new page starts - its first frame is never a duplicate)
+        :return:
+        """
+        self.last_digest = self.last_hash = None
+
+    def submit(self, image, file_path):
+        """
+        hands a frame to the encoding pool (waits while the queue is full)
+        :param image: PIL Image
+        :param file_path: the path of the output file (the extension is replaced by the extension of the format)
+        :return: the path of the output file, or None - if the frame was dropped (a duplicate)
+        """
+        if self.is_duplicate(image):
+            with self.lock:
+                self.dropped += 1
+            return None
+        file_path = os.path.splitext(file_path)[0] + EXTENSIONS[self.fmt]
+        self.slots.acquire()
+        if self.use_processes:  # (a frame is sent to another process as raw bytes)
+            future = self.executor.submit(encode_raw, image.mode, image.size, image.tobytes(), file_path,
+                                          self.fmt, self.options)
+        else:
+            future = self.executor.submit(encode_image, image, file_path, self.fmt, self.options)
+        future.add_done_callback(self._done)
+        return file_path
+
+    def _done(self, future):
+        """
+        frees a place in the queue when a frame is saved
+        :param future: the Future of the encoding
+        :return:
+        """
+        self.slots.release()
+        error = future.exception()
+        with self.lock:
+            if error is None:
+                self.saved += 1
+        if error is not None:
+            print("An error occurred while trying to save a screenshot --> %s" % error)
+
+    def close(self):
+        """
+        waits for the frames in the queue to be saved, and stops the pool
+        :return:
+        """
+        self.executor.shutdown(wait=True)
+
+
+def save_options(fmt, quality=None):
+    """
+    :param fmt: 'png', 'webp' or 'jpeg'
+    :param quality: PNG - compression level (0-9), WebP/JPEG - quality (1-100), or None - the default
+    :return: keyword arguments for 'Image.save' (dict)
+    """
+    if fmt == "png":
+        return {"compress_level": PNG_COMPRESS_LEVEL if quality is None else quality}
+    if fmt == "webp":
+        return {"quality": QUALITY if quality is None else quality, "method": 4}
+    return {"quality": QUALITY if quality is None else quality, "optimize": True}
+
+
+def encode_image(image, file_path, fmt, options):
+    """
+    encodes a frame and saves it to a file
+    :param image: PIL Image
+    :param file_path: the path of the output file
+    :param fmt: 'png', 'webp' or 'jpeg'
+    :param options: keyword arguments for 'Image.save' (dict)
+    :return: the path of the output file
+    """
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")  # (JPEG has no alpha channel)
+    image.save(file_path, FORMATS[fmt], **options)
+    return file_path
+
+
+def encode_raw(mode, size, data, file_path, fmt, options):
+    """
+    encodes a frame (given as raw bytes - from another process) and saves it to a file
+    :return: the path of the output file
+    """
+    return encode_image(Image.frombytes(mode, size, data), file_path, fmt, options)
+
+
+def dhash(image, hash_size=8):
+    """
+    :param image: PIL Image
+    :param hash_size: the size of the hash (8 --> 64 bits)
+    :return: the difference hash of the image (int) - each bit tells if a pixel is brighter than its right neighbour
+    (in a (hash_size+1)x(hash_size) grayscale thumbnail)
+    """
+    pixels = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR).tobytes()  # (a byte per pixel)
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(hash1, hash2):
+    """
+    :return: number of different bits between two hashes (int)
+    """
+    return bin(hash1 ^ hash2).count("1")
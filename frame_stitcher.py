@@ -0,0 +1,274 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Stitches the overlapping screenshots of a scrolled page (the frames of 'scroll_down_and_grab_screen')
+into one tall image, with NumPy.
+
+Each frame is reduced to a row profile (every row --> a few grayscale averages), and the vertical shift between
+two consecutive frames is found by matching the profiles (the RMS difference of the overlapping rows, for every
+possible shift at once - the cross term is an FFT correlation of the profiles, so a pair of frames is O(n log n),
+not O(n^2)). Rows at the top/bottom that don't move between the frames (a fixed header/footer) are kept only
+once. Only the new rows of each frame are appended.
+
+The frames are streamed - only two frames are in memory at any time: a first pass finds the rows to take from
+each frame, and a second pass writes them row by row into a PNG file (zlib-compressed on the fly), so the tall
+image itself is never held in memory.
+"""
+
+import os
+import re
+import zlib
+import struct
+import argparse
+import numpy as np
+from PIL import Image
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+PROFILE_WIDTH = 32  # number of grayscale averages in the profile of a row
+TOLERANCE = 2.0  # max mean/RMS difference (gray levels) of matching rows (lossy frames are not identical)
+MIN_OVERLAP = 20  # min number of overlapping rows, to trust a shift
+SHIFT_EPSILON = 1e-3  # shifts whose errors differ by less than this (gray levels) are a tie (FFT rounding)
+IDAT_SIZE = 1 << 20  # size (bytes) of the compressed data chunks of the PNG file
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class PngRowWriter:
+
+    def __init__(self, file_path, width, height, compress_level=6):
+        """
+        creates new instance of PngRowWriter Object - writes an RGB PNG file row by row (streaming)
+        :param file_path: the path of the output file
+        :param width: the width (pixels) of the image
+        :param height: the height (pixels) of the image
+        :param compress_level: zlib compression level (0-9)
+        """
+        self.out_f = open(file_path, 'wb')
+        self.width = width
+        self.compressor = zlib.compressobj(compress_level)
+        self.pending = []  # compressed data that is not written yet
+        self.pending_size = 0
+        self.out_f.write(PNG_SIGNATURE)
+        # 8 bits per channel, color type 2 (RGB), default compression/filter, no interlace
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _chunk(self, kind, data):
+        """
+        writes a PNG chunk (length, type, data, CRC)
+        :return:
+        """
+        self.out_f.write(struct.pack(">I", len(data)) + kind + data)
+        self.out_f.write(struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff))
+
+    def _compressed(self, data):
+        """
+        collects compressed data, and writes it in chunks of 'IDAT_SIZE' bytes
+        :return:
+        """
+        if data:
+            self.pending.append(data)
+            self.pending_size += len(data)
+        if self.pending_size >= IDAT_SIZE:
+            self._chunk(b"IDAT", b"".join(self.pending))
+            self.pending, self.pending_size = [], 0
+
+    def write_rows(self, rows):
+        """
+        :param rows: NumPy array of rows (height, width, 3), uint8
+        :return:
+        """
+        rows = rows.reshape(rows.shape[0], self.width * 3)
+        # each row starts with its filter type (0 - no filter)
+        filtered = np.hstack([np.zeros((rows.shape[0], 1), dtype=np.uint8), rows])
+        self._compressed(self.compressor.compress(filtered.tobytes()))
+
+    def close(self):
+        """
+        writes the rest of the data, and closes the file
+        :return:
+        """
+        if self.out_f:
+            self._compressed(self.compressor.flush())
+            if self.pending:
+                self._chunk(b"IDAT", b"".join(self.pending))
+            self._chunk(b"IEND", b"")
+            self.out_f.close()
+            self.out_f = None
+
+
+def load_frame(file_path):
+    """
+    :param file_path: path to an image file
+    :return: NumPy array (height, width, 3) of the image, uint8
+    """
+    with Image.open(file_path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def row_profile(frame, width=PROFILE_WIDTH):
+    """
+    :param frame: NumPy array (height, width, 3)
+    :param width: number of averages per row
+    :return: NumPy array (height, width) - the grayscale averages of 'width' column bands of each row
+    """
+    gray = frame.astype(np.float32).mean(axis=2)
+    bands = np.array_split(np.arange(gray.shape[1]), width)
+    return np.stack([gray[:, band].mean(axis=1) for band in bands], axis=1)
+
+
+def fixed_rows(prev, cur, tolerance=TOLERANCE):
+    """
+    :param prev: row profile of the previous frame
+    :param cur: row profile of the current frame
+    :param tolerance: max mean difference of matching rows
+    :return: tuple (header, footer) - number of rows at the top/bottom that are the same in both frames
+    """
+    same = np.abs(prev - cur).mean(axis=1) <= tolerance
+    header = len(same) if same.all() else int(np.argmin(same))
+    footer = len(same) if same.all() else int(np.argmin(same[::-1]))
+    return header, footer
+
+
+def find_shift(prev, cur, top, bottom, tolerance=TOLERANCE, min_overlap=MIN_OVERLAP):
+    """
+    finds the vertical shift (scrolled rows) between two frames - the shift that matches the body of the
+    previous frame (after the shift) with the body of the current frame
+    :param prev: row profile of the previous frame
+    :param cur: row profile of the current frame
+    :param top: number of header rows (not part of the body)
+    :param bottom: number of footer rows
+    :param tolerance: max RMS difference of the overlapping rows
+    :param min_overlap: min number of overlapping rows
+    :return: the shift (rows), or None - if no shift matches
+    """
+    body_prev = prev[top:len(prev) - bottom].astype(np.float64)
+    body_cur = cur[top:len(cur) - bottom].astype(np.float64)
+    body = len(body_prev)
+    shifts = np.arange(1, body - min_overlap + 1)
+    if not len(shifts):
+        return None
+    overlap = body - shifts  # number of overlapping rows of each shift
+    # the sum of squared differences of the overlapping rows, for all the shifts at once:
+    # sum(prev[shift:]**2) + sum(cur[:body-shift]**2) - 2*sum(prev[shift+i]*cur[i])
+    squares_prev = np.cumsum((body_prev ** 2).sum(axis=1)[::-1])[::-1]  # [shift] --> sum of prev[shift:]
+    squares_cur = np.cumsum((body_cur ** 2).sum(axis=1))  # [rows-1] --> sum of cur[:rows]
+    # (the cross term is the correlation of the profiles - by FFT, zero-padded so it doesn't wrap around)
+    size = 1 << (2 * body - 1).bit_length()
+    spectrum = np.fft.rfft(body_prev, size, axis=0) * np.conj(np.fft.rfft(body_cur, size, axis=0))
+    cross = np.fft.irfft(spectrum, size, axis=0).sum(axis=1)[shifts]
+    squared = squares_prev[shifts] + squares_cur[overlap - 1] - 2 * cross
+    errors = np.sqrt(np.maximum(squared, 0) / (overlap * body_prev.shape[1]))  # RMS difference of each shift
+    best_error = errors.min()
+    if best_error > tolerance:
+        return None
+    # (ties - like blank areas - go to the larger shift, so no content is lost)
+    return int(shifts[errors <= best_error + SHIFT_EPSILON][-1])
+
+
+def plan_segments(frame_paths, tolerance=TOLERANCE, min_overlap=MIN_OVERLAP):
+    """
+    the first pass - finds the rows to take from each frame (two frames in memory at any time)
+    :param frame_paths: paths of the frames, in scroll order
+    :return: tuple (width, segments) - segments is a list of (frame index, first row, end row)
+    """
+    segments = []
+    prev = None
+    width = height = None
+    last_footer = 0
+    for index, file_path in enumerate(frame_paths):
+        frame = load_frame(file_path)
+        if width is None:
+            height, width = frame.shape[:2]
+        elif frame.shape[:2] != (height, width):
+            raise ValueError("frame %s has a different size" % file_path)
+        cur = row_profile(frame)
+        del frame
+        if prev is None:
+            segments.append([index, 0, height])
+        else:
+            header, footer = fixed_rows(prev, cur, tolerance)
+            if header + footer >= height - min_overlap:
+                prev = cur
+                continue  # the page didn't move - a duplicate frame
+            shift = find_shift(prev, cur, header, footer, tolerance, min_overlap)
+            # the previous segment ends above the footer (the footer is taken once - from the last frame)
+            segments[-1][2] = max(segments[-1][1], min(segments[-1][2], height - footer))
+            if shift is None:
+                segments.append([index, header, height])  # no overlap found - take the whole body
+            else:
+                segments.append([index, height - footer - shift, height])
+            last_footer = footer
+        prev = cur
+    if last_footer and segments:
+        segments[-1][2] = height  # (the footer of the last frame)
+    return width, [tuple(segment) for segment in segments]
+
+
+def stitch_frames(frame_paths, out_path, tolerance=TOLERANCE, min_overlap=MIN_OVERLAP):
+    """
+    stitches the frames of a scrolled page into one tall PNG image
+    :param frame_paths: paths of the frames, in scroll order
+    :param out_path: the path of the output file (PNG)
+    :return: tuple (width, height) of the stitched image, or None - if there are no frames
+    """
+    frame_paths = list(frame_paths)
+    if not frame_paths:
+        return None
+    width, segments = plan_segments(frame_paths, tolerance, min_overlap)
+    height = sum(end - start for _, start, end in segments)
+    # the second pass - writes the rows of each frame (one frame in memory at any time)
+    with PngRowWriter(out_path, width, height) as writer:
+        for index, start, end in segments:
+            writer.write_rows(load_frame(frame_paths[index])[start:end])
+    return width, height
+
+
+def frames_in_dir(dir_path):
+    """
+    :param dir_path: path to a dir with the frames of a page ('<title> - scr<N>.<ext>')
+    :return: the paths of the frames, sorted by their number
+    """
+    frames = []
+    for file_name in os.listdir(dir_path):
+        match = re.search(r"scr(\d+)\.(png|webp|jpg)$", file_name)
+        if match:
+            frames.append((int(match.group(1)), os.path.join(dir_path, file_name)))
+    return [file_path for _, file_path in sorted(frames)]
+
+
+def stitch_dir(dir_path, out_path=None):
+    """
+    stitches the frames in a dir into one image ('<dir>.png' - next to the dir)
+    :param dir_path: path to a dir with the frames of a page
+    :param out_path: the path of the output file, or None - '<dir>.png'
+    :return: the path of the output file, or None - if there are no frames
+    """
+    out_path = out_path or dir_path.rstrip("\\/") + ".png"
+    if stitch_frames(frames_in_dir(dir_path), out_path) is None:
+        return None
+    return out_path
+
+
+def main():
+    """
+    The main function - stitches the frames in the given dirs (each dir - one page)
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-d", "--DIR", dest="dirs", type=str, nargs='+', required=True,
+                        help="Enter paths to dirs with the screenshots of pages (one dir per page)")
+    args = parser.parse_args()  # Command line argument parsing methods
+    for dir_path in args.dirs:
+        print("%s --> %s" % (dir_path, stitch_dir(dir_path)))
+
+
+if __name__ == '__main__':
+    main()
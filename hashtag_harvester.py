@@ -0,0 +1,186 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A headless mode of 'search_hashtag' - harvests the posts of a list of hashtags from the DOM of the search
+results (instead of typing with pyautogui, and copying the visible text with Ctrl+A/Ctrl+C).
+
+Each hashtag is searched by its URL in a headless Chrome browser (from the pool of 'driver_pool'), and the feed
+of results is scrolled down (infinite scroll). After each scroll, only the posts that were added to the DOM are
+extracted (the extracted posts are marked in the page), deduplicated by the post id with a memory-bounded
+seen-set, and streamed to a JSON Lines file as they arrive (one post per line). A hashtag is done when the feed
+stops growing (or after a max number of posts). The requests to the site are paced, so the throughput is
+limited by the site only.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\hashtag_harvester.py -t "#python" "#java" -o "posts.jsonl" -m 500
+"""
+
+import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from seen_set import SeenSet
+from pacing import PACER
+from page_waits import wait_until, settle
+from driver_pool import ChromeDriverPool
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+SEARCH_URL = "https://twitter.com/search?q=%s&src=typed_query&f=live"  # search URL (latest posts)
+WORKERS = 2  # number of hashtags that are harvested at the same time (a browser each)
+MAX_POSTS = 1000  # max number of posts per hashtag
+SCROLL_TIMEOUT = 5  # max time (seconds) to wait for new posts after a scroll
+IDLE_SCROLLS = 3  # a hashtag is done after 3 scrolls without new posts
+FLUSH_EVERY = 50  # flush the output file every 50 posts
+BROWSER_TIMEOUT = 60  # max time (seconds) to wait for a browser of the pool
+SEEN_CAPACITY = 1000000  # expected number of posts (the memory size of the seen-set)
+
+# returns the posts (articles) that were added to the DOM since the last call, and marks them as extracted
+NEW_POSTS_SCRIPT = """
+var posts = [];
+document.querySelectorAll('article:not([data-harvested])').forEach(function (article) {
+    article.setAttribute('data-harvested', '1');
+    var time = article.querySelector('time');
+    var link = (time && time.closest('a[href*="/status/"]')) || article.querySelector('a[href*="/status/"]');
+    var match = link ? link.getAttribute('href').match(/^\\/([^\\/]+)\\/status\\/(\\d+)/) : null;
+    if (!match) return;
+    var text = article.querySelector('[data-testid="tweetText"]');
+    posts.push({id: match[2], user: match[1], url: link.href, time: time ? time.getAttribute('datetime') : null,
+                text: text ? text.innerText : ''});
+});
+return posts;
+"""
+PENDING_POSTS_SCRIPT = "return document.querySelectorAll('article:not([data-harvested])').length;"
+SCROLL_SCRIPT = "window.scrollTo(0, document.body.scrollHeight);"
+
+
+class HashtagHarvester:
+
+    def __init__(self, out_path, workers=WORKERS, max_posts=MAX_POSTS, capacity=SEEN_CAPACITY):
+        """
+        creates new instance of HashtagHarvester Object
+        :param out_path: path to the output file (JSON Lines - appended)
+        :param workers: number of hashtags that are harvested at the same time
+        :param max_posts: max number of posts per hashtag
+        :param capacity: expected number of posts (the memory size of the seen-set)
+        """
+        self.out_path = out_path
+        self.workers = workers
+        self.max_posts = max_posts
+        self.seen = SeenSet(capacity=capacity)  # post ids (of all the hashtags)
+        self.lock = threading.Lock()
+        self.out_f = None
+        self.unflushed = 0
+
+    def run(self, hashtags):
+        """
+        harvests the posts of the hashtags (streams them to the output file)
+        :param hashtags: list of hashtags, like ['#python', '#java']
+        :return: dict - hashtag --> number of new posts
+        """
+        counts = {}
+        self.out_f = open(self.out_path, 'a', encoding='utf-8')
+        try:
+            with ChromeDriverPool(size=min(self.workers, len(hashtags)) or 1) as pool, \
+                    ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {hashtag: executor.submit(self.harvest_with_pool, pool, hashtag) for hashtag in hashtags}
+                for hashtag, future in futures.items():
+                    counts[hashtag] = future.result()
+                    print("%s --> %d new posts" % (hashtag, counts[hashtag]))
+        finally:
+            self.out_f.close()
+        return counts
+
+    def harvest_with_pool(self, pool, hashtag):
+        """
+        harvests a hashtag with a browser of the pool
+        :return: number of new posts
+        """
+        driver = pool.acquire(timeout=BROWSER_TIMEOUT)
+        if driver is None:
+            print("no browser to harvest %s" % hashtag)
+            return 0
+        try:
+            return self.harvest(driver, hashtag)
+        except WebDriverException as e:
+            print("failed to harvest %s --> %s" % (hashtag, e))
+            pool.discard(driver)
+            driver = None
+            return 0
+        finally:
+            pool.release(driver)
+
+    def harvest(self, driver, hashtag):
+        """
+        searches a hashtag, and scrolls down the feed of results till it stops growing
+        :param driver: the WebDriver
+        :param hashtag: hashtag (string), like '#python'
+        :return: number of new posts
+        """
+        PACER.get(driver, SEARCH_URL % quote(hashtag))  # (waits for the turn of the host)
+        settle(driver)
+        count = 0
+        idle_scrolls = 0
+        while count < self.max_posts and idle_scrolls < IDLE_SCROLLS:
+            new_posts = 0
+            for post in driver.execute_script(NEW_POSTS_SCRIPT) or []:
+                if count + new_posts < self.max_posts and self.seen_post(post["id"]):
+                    self.write(dict(post, hashtag=hashtag))
+                    new_posts += 1
+            count += new_posts
+            idle_scrolls = 0 if new_posts else idle_scrolls + 1
+            driver.execute_script(SCROLL_SCRIPT)
+            try:
+                # wait till the feed loads more posts (instead of a fixed sleep)
+                wait_until(driver, lambda current: current.execute_script(PENDING_POSTS_SCRIPT),
+                           timeout=SCROLL_TIMEOUT)
+            except TimeoutException:
+                pass  # (no new posts - counted as an idle scroll on the next round)
+        return count
+
+    def seen_post(self, post_id):
+        """
+        :param post_id: the id of a post (string)
+        :return: True - if the post is new (wasn't harvested before), or False
+        """
+        with self.lock:
+            return self.seen.add(post_id)
+
+    def write(self, post):
+        """
+        writes a post to the output file (one JSON object per line)
+        :param post: dict
+        :return:
+        """
+        with self.lock:
+            self.out_f.write(json.dumps(post, ensure_ascii=False) + "\n")
+            self.unflushed += 1
+            if self.unflushed >= FLUSH_EVERY:
+                self.out_f.flush()
+                self.unflushed = 0
+
+
+def main():
+    """
+    The main function - harvests the posts of the given hashtags (headless)
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-t", "--HASHTAGS", dest="hashtags", type=str, nargs='+', required=True,
+                        help="Enter hashtags to harvest (like #python #java)")
+    parser.add_argument("-o", "--OUTPUT", dest="out_path", type=str, default="posts.jsonl",
+                        help="Enter a path to the output file (JSON Lines)")
+    parser.add_argument("-m", "--MAX-POSTS", dest="max_posts", type=int, default=MAX_POSTS,
+                        help="Enter the max number of posts per hashtag")
+    parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                        help="Enter the number of hashtags to harvest at the same time")
+    args = parser.parse_args()  # Command line argument parsing methods
+    HashtagHarvester(args.out_path, workers=args.workers, max_posts=args.max_posts).run(args.hashtags)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A local index of perceptual hashes of images - to skip images that were already searched (reverse image search),
+and near-duplicates of them.
+
+Three 64-bit perceptual hashes are computed for each image with NumPy:
+    aHash - a 8x8 grayscale thumbnail, each bit tells if a pixel is brighter than the mean
+    dHash - a 9x8 grayscale thumbnail, each bit tells if a pixel is brighter than its right neighbour
+    pHash - the 8x8 low frequencies of the DCT of a 32x32 grayscale thumbnail, compared with their median
+The index is stored compactly (a compressed NumPy archive - the paths, the hashes as uint64, and the size and the
+modification time of each file, so an update hashes only new and changed files), and is searched by the Hamming
+distance of the pHash with a BK-tree. Near-duplicates (within a distance threshold) are grouped, so only one
+representative of each group is searched.
+
+An input from command prompt/terminal should look like (indexes a tree, and prints the groups of near-duplicates):
+python your\\path\\to\\image_index.py -d "path\\to\\images" -t 6
+"""
+
+import os
+import argparse
+import numpy as np
+from PIL import Image
+from frame_encoder import hamming
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+IMG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imgs')  # path to imgs folder
+INDEX_NAME = ".image_index.npz"  # the file of the index (in the root of the indexed tree)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp")
+THRESHOLD = 6  # max pHash distance (bits, 0-64) of near-duplicates
+HASHES = ("ahash", "dhash", "phash")  # the columns of the hashes in the index
+PHASH_SIZE = 32  # the size of the thumbnail of the pHash (its 8x8 low frequencies are used)
+
+
+class BKTree:
+
+    def __init__(self):
+        """
+        creates new instance of BKTree Object - a metric tree of 64-bit hashes (by Hamming distance)
+        """
+        self.root = None  # node - [hash, list of items, dict: distance --> child node]
+
+    def add(self, value, item):
+        """
+        :param value: hash (int)
+        :param item: the item of the hash (like an index of a row)
+        :return:
+        """
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            if distance not in node[2]:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = node[2][distance]
+
+    def search(self, value, radius):
+        """
+        :param value: hash (int)
+        :param radius: max Hamming distance
+        :return: list of tuples (distance, item) of the hashes within the radius
+        """
+        found = []
+        nodes = [self.root] if self.root is not None else []
+        while nodes:
+            node = nodes.pop()
+            distance = hamming(value, node[0])
+            if distance <= radius:
+                found.extend((distance, item) for item in node[1])
+            # (triangle inequality - only children at distance-radius .. distance+radius can be within the radius)
+            nodes.extend(child for child_distance, child in node[2].items()
+                         if distance - radius <= child_distance <= distance + radius)
+        return found
+
+
+class ImageIndex:
+
+    def __init__(self, index_path=os.path.join(IMG_PATH, INDEX_NAME), threshold=THRESHOLD):
+        """
+        creates new instance of ImageIndex Object (loads the index file - if exists)
+        :param index_path: path to the file of the index
+        :param threshold: max pHash distance (bits) of near-duplicates
+        """
+        self.index_path = index_path
+        self.threshold = threshold
+        self.paths = []  # absolute paths of the images
+        self.rows = {}  # path --> row
+        self.hashes = np.zeros((0, len(HASHES)), dtype=np.uint64)
+        self.stats = np.zeros((0, 2), dtype=np.int64)  # (size, modification time in ns) of each file
+        self.searched = np.zeros(0, dtype=bool)  # True - the image was searched
+        self.tree = None  # BKTree of the pHashes (built on the first search)
+        if os.path.isfile(index_path):
+            self.load()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def load(self):
+        """
+        loads the index file
+        :return:
+        """
+        with np.load(self.index_path) as archive:
+            self.paths = [str(path) for path in archive["paths"]]
+            self.hashes = archive["hashes"]
+            self.stats = archive["stats"]
+            self.searched = archive["searched"]
+        self.rows = {path: row for row, path in enumerate(self.paths)}
+        self.tree = None
+
+    def save(self):
+        """
+        saves the index file (a compressed NumPy archive)
+        :return:
+        """
+        part_path = self.index_path + ".part.npz"
+        np.savez_compressed(part_path, paths=np.array(self.paths, dtype=str), hashes=self.hashes, stats=self.stats,
+                            searched=self.searched)
+        os.replace(part_path, self.index_path)
+
+    def update(self, root_path):
+        """
+        indexes the images of a tree - hashes new and changed files, and drops files that no longer exist
+        :param root_path: path to the root of the tree
+        :return: number of images that were hashed
+        """
+        keep = [row for row, path in enumerate(self.paths) if os.path.isfile(path)]
+        if len(keep) < len(self.paths):
+            self._select(keep)
+        new_paths, new_hashes, new_stats = [], [], []
+        for image_path in images_in_tree(root_path):
+            stat = os.stat(image_path)
+            file_stats = (stat.st_size, stat.st_mtime_ns)
+            row = self.rows.get(image_path)
+            if row is not None and tuple(self.stats[row]) == file_stats:
+                continue  # (not changed since it was hashed)
+            try:
+                with Image.open(image_path) as image:
+                    image_hashes = image_hash(image)
+            except (IOError, ValueError) as e:
+                print("failed to hash %s --> %s" % (image_path, e))
+                continue
+            if row is not None:  # a changed file - new hashes (and not searched)
+                self.hashes[row], self.stats[row], self.searched[row] = image_hashes, file_stats, False
+            else:
+                new_paths.append(image_path)
+                new_hashes.append(image_hashes)
+                new_stats.append(file_stats)
+        if new_paths:
+            self.rows.update((path, len(self.paths) + i) for i, path in enumerate(new_paths))
+            self.paths.extend(new_paths)
+            self.hashes = np.vstack([self.hashes, np.array(new_hashes, dtype=np.uint64)])
+            self.stats = np.vstack([self.stats, np.array(new_stats, dtype=np.int64)])
+            self.searched = np.concatenate([self.searched, np.zeros(len(new_paths), dtype=bool)])
+        self.tree = None
+        return len(new_paths)
+
+    def _select(self, rows):
+        """
+        keeps only the given rows of the index
+        :param rows: list of rows
+        :return:
+        """
+        self.paths = [self.paths[row] for row in rows]
+        self.rows = {path: row for row, path in enumerate(self.paths)}
+        self.hashes, self.stats, self.searched = self.hashes[rows], self.stats[rows], self.searched[rows]
+        self.tree = None
+
+    def near(self, image_path, radius=None):
+        """
+        :param image_path: path to an indexed image
+        :param radius: max pHash distance, or None - the threshold of the index
+        :return: list of tuples (distance, path) of the indexed images within the radius (including the image)
+        """
+        if self.tree is None:
+            self.tree = BKTree()
+            for row, value in enumerate(self.hashes[:, HASHES.index("phash")]):
+                self.tree.add(int(value), row)
+        value = int(self.hashes[self.rows[os.path.abspath(image_path)], HASHES.index("phash")])
+        return sorted((distance, self.paths[row])
+                      for distance, row in self.tree.search(value, self.threshold if radius is None else radius))
+
+    def is_searched(self, image_path):
+        """
+        :param image_path: path to an indexed image
+        :return: True - if the image, or a near-duplicate of it, was searched, or False
+        """
+        if os.path.abspath(image_path) not in self.rows:
+            return False
+        return any(self.is_searched_row(path) for _, path in self.near(image_path))
+
+    def mark_searched(self, image_paths):
+        """
+        :param image_paths: paths to indexed images (that were searched)
+        :return:
+        """
+        for image_path in image_paths:
+            row = self.rows.get(os.path.abspath(image_path))
+            if row is not None:
+                self.searched[row] = True
+
+    def groups(self, image_paths):
+        """
+        groups near-duplicates (images within the threshold, and images near them ...)
+        :param image_paths: paths to indexed images
+        :return: list of groups (lists of paths) - the first path of a group is its representative
+        (a searched image - if the group has one)
+        """
+        image_paths = sorted(os.path.abspath(image_path) for image_path in image_paths)
+        parents = {image_path: image_path for image_path in image_paths}
+
+        def find(image_path):
+            while parents[image_path] != image_path:
+                parents[image_path] = parents[parents[image_path]]
+                image_path = parents[image_path]
+            return image_path
+
+        for image_path in image_paths:
+            if image_path not in self.rows:
+                continue  # (not indexed - a group of its own)
+            for _, other_path in self.near(image_path):
+                if other_path in parents:
+                    first, second = sorted((find(image_path), find(other_path)))
+                    parents[second] = first
+        groups = {}
+        for image_path in image_paths:
+            groups.setdefault(find(image_path), []).append(image_path)
+        return [sorted(group, key=lambda path: not self.is_searched_row(path)) for group in groups.values()]
+
+    def is_searched_row(self, image_path):
+        """
+        :param image_path: absolute path to an image
+        :return: True - if the image itself was searched, or False
+        """
+        row = self.rows.get(image_path)
+        return row is not None and bool(self.searched[row])
+
+
+def bits_to_int(bits):
+    """
+    :param bits: NumPy array of booleans (64)
+    :return: the bits as an int
+    """
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def dct_matrix(size):
+    """
+    :param size: the size of the matrix
+    :return: the DCT-II matrix (orthonormal) - 'matrix @ x' is the DCT of x
+    """
+    rows = np.arange(size)[:, None]
+    cols = np.arange(size)[None, :]
+    matrix = np.sqrt(2.0 / size) * np.cos(np.pi * (2 * cols + 1) * rows / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+DCT = dct_matrix(PHASH_SIZE)
+
+
+def image_hash(image):
+    """
+    :param image: PIL Image
+    :return: tuple (aHash, dHash, pHash) of the image (64-bit ints)
+    """
+    gray = image.convert("L")
+    small = np.asarray(gray.resize((8, 8), Image.BILINEAR), dtype=np.float64)
+    ahash = bits_to_int(small > small.mean())
+    wide = np.asarray(gray.resize((9, 8), Image.BILINEAR), dtype=np.float64)
+    dhash = bits_to_int(wide[:, :-1] > wide[:, 1:])
+    thumb = np.asarray(gray.resize((PHASH_SIZE, PHASH_SIZE), Image.BILINEAR), dtype=np.float64)
+    low = (DCT @ thumb @ DCT.T)[:8, :8]
+    phash = bits_to_int(low > np.median(low.ravel()[1:]))  # (the median without the DC term)
+    return ahash, dhash, phash
+
+
+def images_in_tree(root_path):
+    """
+    walks a directory (and its sub-directories), and finds the images
+    :param root_path: path to a directory
+    :return: absolute paths to the images (sorted list)
+    """
+    image_paths = []
+    for root, _, file_names in os.walk(os.path.abspath(root_path)):
+        for file_name in file_names:
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                image_paths.append(os.path.join(root, file_name))
+    return sorted(image_paths)
+
+
+def main():
+    """
+    The main function - indexes the images of a tree, and prints the groups of near-duplicates
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-d", "--DIR", dest="dir_path", type=str, default=IMG_PATH,
+                        help="Enter a path to a directory with images")
+    parser.add_argument("-t", "--THRESHOLD", dest="threshold", type=int, default=THRESHOLD,
+                        help="Enter the max pHash distance (0-64) of near-duplicates")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    index = ImageIndex(os.path.join(args.dir_path, INDEX_NAME), threshold=args.threshold)
+    print("%d images hashed (%d in the index)" % (index.update(args.dir_path), len(index)))
+    index.save()
+    for group in index.groups(images_in_tree(args.dir_path)):
+        if len(group) > 1:
+            print("%s <-- %s" % (group[0], ", ".join(group[1:])))
+
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,10 @@ to search a term with some search engines (yahoo, bing, duckduckgo).
 """
 
 import unittest
-from time import sleep
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+from page_waits import wait_until, all_of, dom_present, url_changed, network_idle
 
 __email__ = "knifef@protonmail.com"
 
@@ -46,18 +46,16 @@ class TestSeleniumFireFox(unittest.TestCase):  # A class whose instances are sin
         """
         # Loads a web page in the current browser session.
         self.driver.get(DUCKDUCKGO_URL)
-        sleep(3)  # delay
         # Fail if the two objects are unequal as determined by the '==' operator.
         self.assertEqual(self.driver.title, 'DuckDuckGo — Privacy, simplified.')
-        # WebDriver waits up to 5 seconds, trying to find an element
-        search_box = WebDriverWait(self.driver, 5).until(lambda driver: self.driver.find_element_by_name('q'))
-        sleep(2)  # delay
+        # wait for the search box (by its name 'q')
+        search_box = wait_until(self.driver, dom_present((By.NAME, 'q')), timeout=5)
+        old_url = self.driver.current_url
         # Clicks the element.
         search_box.click()
-        search_box.send_keys("python")  # Sends keys to current focused element.
-        sleep(1)  # delay
-        search_box.send_keys(Keys.ENTER)  # hit Enter to search
-        sleep(5)  # delay
+        search_box.send_keys("python", Keys.ENTER)  # Sends keys to current focused element, and hit Enter to search
+        # wait for the results page (a new URL, and no more requests of the page)
+        wait_until(self.driver, all_of(url_changed(old_url), network_idle()))
         # Just like self.assertTrue(a in b), but with a nicer default message.
         self.assertIn("python.org", self.driver.page_source.lower())
 
@@ -68,19 +66,16 @@ class TestSeleniumFireFox(unittest.TestCase):  # A class whose instances are sin
         """
         # Loads a web page in the current browser session.
         self.driver.get(YAHOO_URL)
-        sleep(3)  # delay
         # Fail if the two objects are unequal as determined by the '==' operator.
         self.assertEqual(self.driver.title, 'Yahoo')
-        # WebDriver waits up to 10 seconds before throwing a TimeoutException
-        # unless it finds the element (search box) to return within 10 seconds.
-        search_box = WebDriverWait(self.driver, 5).until(lambda driver: self.driver.find_element_by_name('p'))
-        sleep(2)  # delay
+        # wait for the search box (by its name 'p')
+        search_box = wait_until(self.driver, dom_present((By.NAME, 'p')), timeout=5)
+        old_url = self.driver.current_url
         # Clicks the element.
         search_box.click()
-        search_box.send_keys("python")  # Sends keys to current focused element.
-        sleep(1)  # delay
-        search_box.send_keys(Keys.ENTER)  # hit Enter to search
-        sleep(5)  # delay
+        search_box.send_keys("python", Keys.ENTER)  # Sends keys to current focused element, and hit Enter to search
+        # wait for the results page (a new URL, and no more requests of the page)
+        wait_until(self.driver, all_of(url_changed(old_url), network_idle()))
         # Just like self.assertTrue(a in b), but with a nicer default message.
         self.assertIn("python.org", self.driver.page_source.lower())
 
@@ -91,18 +86,16 @@ class TestSeleniumFireFox(unittest.TestCase):  # A class whose instances are sin
         """
         # Loads a web page in the current browser session.
         self.driver.get(BING_URL)
-        sleep(3)  # delay
         # Fail if the two objects are unequal as determined by the '==' operator.
         self.assertEqual(self.driver.title, 'Bing')
-        # WebDriver waits up to 5 seconds, trying to find an element
-        search_box = WebDriverWait(self.driver, 5).until(lambda driver: self.driver.find_element_by_name('q'))
-        sleep(2)  # delay
+        # wait for the search box (by its name 'q')
+        search_box = wait_until(self.driver, dom_present((By.NAME, 'q')), timeout=5)
+        old_url = self.driver.current_url
         # Clicks the element.
         search_box.click()
-        search_box.send_keys("python")  # Sends keys to current focused element.
-        sleep(1)  # delay
-        search_box.send_keys(Keys.ENTER)  # hit Enter to search
-        sleep(5)  # delay
+        search_box.send_keys("python", Keys.ENTER)  # Sends keys to current focused element, and hit Enter to search
+        # wait for the results page (a new URL, and no more requests of the page)
+        wait_until(self.driver, all_of(url_changed(old_url), network_idle()))
         # Just like self.assertTrue(a in b), but with a nicer default message.
         self.assertIn("python.org", self.driver.page_source.lower())
 
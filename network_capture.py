@@ -0,0 +1,111 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Captures network responses of a Chrome browser (through the performance log of chromedriver),
+instead of sleeping a fixed time and scanning 'page_source'.
+
+The browser is launched with performance logging ('goog:loggingPrefs'), so chromedriver records the
+Chrome DevTools network events. After an action (like submitting a form), the log is polled (sub-second)
+till the response of the matching request has finished loading, and its body is taken with
+'Network.getResponseBody' - so the wait is as long as the server takes to respond, not longer.
+"""
+
+import json
+import base64
+from collections import namedtuple
+from time import sleep, time
+from selenium.common.exceptions import WebDriverException
+from driver_pool import execute_cdp
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+PERFORMANCE_LOG = "performance"
+RESOURCE_TYPES = ("Document", "XHR", "Fetch")  # responses of documents and of scripts' requests
+TIMEOUT = 30  # max time (seconds) to wait for a response
+POLL = 0.1  # time (seconds) between two reads of the log
+
+# a captured response - its URL, status code, mime type and body (string)
+NetworkResponse = namedtuple("NetworkResponse", ["url", "status", "mime_type", "body"])
+
+
+def enable_performance_log(capabilities):
+    """
+    adds performance logging (network events of Chrome DevTools) to desired capabilities of chrome
+    :param capabilities: desired capabilities (dict)
+    :return: the capabilities
+    """
+    capabilities['goog:loggingPrefs'] = {PERFORMANCE_LOG: 'ALL'}
+    capabilities['loggingPrefs'] = {PERFORMANCE_LOG: 'ALL'}  # (older chromedriver versions)
+    return capabilities
+
+
+def network_events(driver):
+    """
+    reads (and drains) the performance log of the browser
+    :param driver: the WebDriver
+    :return: generator of (method, params) tuples of network events, like ('Network.responseReceived', {...})
+    """
+    for entry in driver.get_log(PERFORMANCE_LOG):
+        try:
+            message = json.loads(entry["message"])["message"]
+        except (ValueError, KeyError):
+            continue
+        if message.get("method", "").startswith("Network."):
+            yield message["method"], message.get("params", {})
+
+
+def clear_network_log(driver):
+    """
+    drops the network events that were logged so far (so the next wait sees only new responses)
+    :param driver: the WebDriver
+    :return:
+    """
+    driver.get_log(PERFORMANCE_LOG)
+
+
+def response_body(driver, request_id):
+    """
+    :param driver: the WebDriver
+    :param request_id: id of a request (from the network events)
+    :return: the body of the response (string), or None - if the browser doesn't have it
+    """
+    try:
+        result = execute_cdp(driver, "Network.getResponseBody", {"requestId": request_id})
+    except WebDriverException:
+        return None
+    body = result.get("body", "")
+    if result.get("base64Encoded"):
+        body = base64.b64decode(body).decode('utf-8', errors='replace')
+    return body
+
+
+def wait_for_response(driver, url_part="", resource_types=RESOURCE_TYPES, timeout=TIMEOUT, poll=POLL):
+    """
+    waits till a response (that matches the URL) has finished loading, and returns it
+    :param driver: the WebDriver
+    :param url_part: a part of the URL of the request (string), or an empty string - any URL
+    :param resource_types: types of resources to wait for (like 'Document' or 'XHR')
+    :param timeout: max time (seconds) to wait
+    :param poll: time (seconds) between two reads of the log
+    :return: NetworkResponse, or None - if there's no such response in time (or it failed)
+    """
+    responses = {}  # request id --> the response (dict) of matching requests
+    deadline = time() + timeout
+    while True:
+        for method, params in network_events(driver):
+            request_id = params.get("requestId")
+            if method == "Network.responseReceived":
+                response = params.get("response", {})
+                if params.get("type") in resource_types and url_part in response.get("url", ""):
+                    responses[request_id] = response
+            elif method == "Network.loadingFinished" and request_id in responses:
+                response = responses[request_id]
+                return NetworkResponse(response.get("url"), response.get("status"), response.get("mimeType"),
+                                       response_body(driver, request_id))
+            elif method == "Network.loadingFailed" and request_id in responses:
+                return None
+        if time() >= deadline:
+            return None
+        sleep(poll)
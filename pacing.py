@@ -0,0 +1,204 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Adaptive pacing of the requests/actions of the scrapers (instead of fixed sleep(randint(...)) calls).
+
+Each host has a token bucket - the rate of the bucket is the number of requests per second to the host.
+The rate is adjusted by AIMD (additive increase, multiplicative decrease): every fast and clean response
+adds a little to the rate, and a slow response, an error or a block page ("unusual traffic",
+"too many requests", ...) cuts the rate by half. So the delays get short while a host responds well, and long as soon as it doesn't,
+instead of waiting the worst-case delay before every request.
+
+A small random jitter is added to each delay, so the requests don't look like a metronome.
+"""
+
+import threading
+from random import uniform
+from time import sleep, time, perf_counter
+from urllib.parse import urlparse
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+DELAY = 3.0  # initial delay (seconds) between two requests to a host
+MIN_DELAY = 0.5  # the shortest delay (seconds) - the max rate of a host
+MAX_DELAY = 60.0  # the longest delay (seconds) - the min rate of a host
+BURST = 1  # number of requests that can be sent without delay (after an idle time)
+INCREASE = 0.05  # additive increase of the rate (requests per second) after a good response
+DECREASE = 0.5  # multiplicative decrease of the rate after a bad response
+SLOW = 8.0  # a response that takes longer (seconds) is slow
+JITTER = 0.25  # random jitter (+/- 25%) of each delay
+BLOCK_MARKERS = ("unusual traffic", "too many requests", "are you a robot", "verify you are human",
+                 "access denied", "rate limit exceeded", "temporarily blocked")  # (lowercase)
+
+
+class HostBucket:
+
+    def __init__(self, delay=DELAY, min_delay=MIN_DELAY, max_delay=MAX_DELAY, burst=BURST):
+        """
+        creates new instance of HostBucket Object - a token bucket (with an AIMD rate) of a single host
+        :param delay: initial delay (seconds) between two requests
+        :param min_delay: the shortest delay (seconds)
+        :param max_delay: the longest delay (seconds)
+        :param burst: number of requests that can be sent without delay (the size of the bucket)
+        """
+        self.rate = 1.0 / delay  # requests per second
+        self.min_rate = 1.0 / max_delay
+        self.max_rate = 1.0 / min_delay
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time()  # the time of the last refill
+        self.lock = threading.Lock()
+
+    @property
+    def delay(self):
+        return 1.0 / self.rate
+
+    def reserve(self):
+        """
+        takes a token from the bucket (the next request waits for it, if the bucket is empty)
+        :return: time (seconds) to wait before the request
+        """
+        with self.lock:
+            now = time()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate  # (the token is reserved - the next request waits longer)
+
+    def good(self):
+        """
+        a fast and clean response - increases the rate (additive)
+        :return:
+        """
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + INCREASE)
+
+    def bad(self):
+        """
+        a slow response, an error or a block page - decreases the rate (multiplicative), and empties the bucket
+        :return:
+        """
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * DECREASE)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class Pacer:
+
+    def __init__(self, delay=DELAY, min_delay=MIN_DELAY, max_delay=MAX_DELAY, burst=BURST, slow=SLOW,
+                 jitter=JITTER):
+        """
+        creates new instance of Pacer Object - paces the requests to each host (a bucket per host)
+        :param delay: initial delay (seconds) between two requests to a host
+        :param min_delay: the shortest delay (seconds)
+        :param max_delay: the longest delay (seconds)
+        :param burst: number of requests to a host that can be sent without delay
+        :param slow: a response that takes longer (seconds) is slow (and decreases the rate)
+        :param jitter: random jitter of each delay (0.25 --> +/- 25%)
+        """
+        self.defaults = {"delay": delay, "min_delay": min_delay, "max_delay": max_delay, "burst": burst}
+        self.slow = slow
+        self.jitter = jitter
+        self.buckets = {}  # host --> HostBucket
+        self.lock = threading.Lock()
+
+    def configure(self, target, **settings):
+        """
+        sets the pacing of a host (replaces its bucket)
+        :param target: URL or host name (string)
+        :param settings: delay/min_delay/max_delay/burst of the host
+        :return:
+        """
+        with self.lock:
+            self.buckets[host_of(target)] = HostBucket(**dict(self.defaults, **settings))
+
+    def bucket(self, target):
+        """
+        :param target: URL or host name (string)
+        :return: the HostBucket of the host
+        """
+        host = host_of(target)
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = HostBucket(**self.defaults)
+            return self.buckets[host]
+
+    def wait(self, target):
+        """
+        waits (sleeps) till the next request to the host is allowed
+        :param target: URL or host name (string)
+        :return: the time (seconds) that was waited
+        """
+        delay = self.bucket(target).reserve()
+        if delay > 0:
+            delay *= uniform(1 - self.jitter, 1 + self.jitter)
+            sleep(delay)
+        return delay
+
+    def pause(self, target, scale=1.0):
+        """
+        sleeps a part of the current delay of the host (for actions within a page, like typing or scrolling),
+        without taking a token - short while the host responds well, and longer when it doesn't
+        :param target: URL or host name (string)
+        :param scale: part of the current delay to sleep
+        :return:
+        """
+        sleep(self.bucket(target).delay * scale * uniform(1 - self.jitter, 1 + self.jitter))
+
+    def report(self, target, ok=True, latency=None, text=None):
+        """
+        adjusts the rate of the host by a response
+        :param target: URL or host name (string)
+        :param ok: False - an error (no response, or an error status), or True
+        :param latency: time (seconds) that the response took, or None
+        :param text: the page source / response body (string) - to find block pages, or None
+        :return: True - if the response was good, or False
+        """
+        good = ok and (latency is None or latency <= self.slow) and not (text and is_block_page(text))
+        if good:
+            self.bucket(target).good()
+        else:
+            self.bucket(target).bad()
+        return good
+
+    def get(self, driver, url):
+        """
+        loads a web page in the browser - waits for the turn of the host, and adjusts its rate by the response
+        :param driver: the WebDriver
+        :param url: URL (string)
+        :return: True - if the response was good, or False (an error, a slow response, or a block page)
+        """
+        self.wait(url)
+        start = perf_counter()
+        try:
+            driver.get(url)  # Loads a web page in the current browser session
+        except Exception:
+            self.report(url, ok=False)
+            raise
+        return self.report(url, latency=perf_counter() - start, text=driver.page_source)
+
+
+def host_of(target):
+    """
+    :param target: URL or host name (string)
+    :return: the host name (lowercase, without 'www.')
+    """
+    host = urlparse(target).hostname if "://" in target else target
+    host = (host or target).lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def is_block_page(text):
+    """
+    :param text: page source / response body (string)
+    :return: True - if it looks like a block page (unusual traffic, rate limit, ...), or False
+    """
+    text = text.lower()
+    return any(marker in text for marker in BLOCK_MARKERS)
+
+
+PACER = Pacer()  # the shared pacer (of all the scrapers in the process)
@@ -0,0 +1,149 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Condition-based waits for the Selenium scrapers (instead of blind sleeps after each action).
+
+Each wait declares what it is waiting for - an element in the DOM, the end of network activity,
+a quiet DOM (no mutations for a short time - for pages that keep rendering after the load),
+or a new URL (after a search/click) - and returns as soon as the condition holds.
+The conditions are polled with 'WebDriverWait' every 100ms (instead of the default 500ms).
+
+The conditions are callables of the driver, so they can be used with 'WebDriverWait.until' directly,
+and can be combined with 'all_of'.
+"""
+
+from time import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+TIMEOUT = 10  # default max time (seconds) to wait
+POLL = 0.1  # time (seconds) between two checks of a condition
+QUIET = 0.5  # time (seconds) without DOM mutations / new network requests, that counts as quiet
+IGNORED_EXCEPTIONS = (NoSuchElementException, StaleElementReferenceException)
+
+# installs a MutationObserver (once per document), that keeps the time of the last mutation,
+# and returns the time (ms) since the last mutation
+MUTATIONS_SCRIPT = """
+if (!window.__lastMutation) {
+    window.__lastMutation = performance.now();
+    new MutationObserver(function () { window.__lastMutation = performance.now(); })
+        .observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+return performance.now() - window.__lastMutation;
+"""
+# installs a PerformanceObserver (once per document), that counts the resources that were loaded (finished
+# requests - not limited by the resource timing buffer, that stops at 250 entries by default),
+# and returns the state of the document and the number of loaded resources
+NETWORK_SCRIPT = """
+if (!window.__resourceCount) {
+    window.__resourceCount = {count: performance.getEntriesByType('resource').length};
+    new PerformanceObserver(function (list) { window.__resourceCount.count += list.getEntries().length; })
+        .observe({type: 'resource'});
+}
+return [document.readyState, window.__resourceCount.count];
+"""
+
+
+def wait_until(driver, condition, timeout=TIMEOUT, poll=POLL):
+    """
+    waits till the condition holds (polls it every 'poll' seconds)
+    :param driver: the WebDriver
+    :param condition: a callable of the driver, that returns a true value when the condition holds
+    :param timeout: max time (seconds) to wait
+    :param poll: time (seconds) between two checks
+    :return: the (true) value of the condition - raises TimeoutException after 'timeout' seconds
+    """
+    return WebDriverWait(driver, timeout, poll_frequency=poll, ignored_exceptions=IGNORED_EXCEPTIONS).until(condition)
+
+
+def settle(driver, timeout=TIMEOUT, quiet=QUIET):
+    """
+    waits till the page settles - the network is idle and the DOM is quiet (doesn't raise on timeout,
+    for pages that never settle, like pages with animations)
+    :param driver: the WebDriver
+    :param timeout: max time (seconds) to wait
+    :param quiet: time (seconds) without activity
+    :return: True - if the page settled, or False (timeout)
+    """
+    try:
+        wait_until(driver, all_of(network_idle(quiet), mutations_quiet(quiet)), timeout=timeout)
+        return True
+    except TimeoutException:
+        return False
+
+
+def all_of(*conditions):
+    """
+    :param conditions: callables of the driver
+    :return: a condition that holds when all the conditions hold (returns the value of the last condition)
+    """
+    def condition(driver):
+        value = True
+        for current in conditions:
+            value = current(driver)
+            if not value:
+                return False
+        return value
+    return condition
+
+
+def dom_present(locator):
+    """
+    :param locator: tuple (By, value), like (By.NAME, 'q')
+    :return: a condition that holds when the element is in the DOM (returns the element)
+    """
+    def condition(driver):
+        return driver.find_element(*locator)
+    return condition
+
+
+def dom_ready():
+    """
+    :return: a condition that holds when the document (and its sub-resources) finished loading
+    """
+    def condition(driver):
+        return driver.execute_script("return document.readyState;") == "complete"
+    return condition
+
+
+def url_changed(old_url):
+    """
+    :param old_url: the URL before the action (string)
+    :return: a condition that holds when the URL of the current page is different (returns the new URL)
+    """
+    def condition(driver):
+        current_url = driver.current_url
+        return current_url if current_url != old_url else False
+    return condition
+
+
+def mutations_quiet(quiet=QUIET):
+    """
+    :param quiet: time (seconds) without DOM mutations
+    :return: a condition that holds when the DOM didn't change for 'quiet' seconds
+    (a MutationObserver is installed in the page on the first check)
+    """
+    def condition(driver):
+        return driver.execute_script(MUTATIONS_SCRIPT) >= quiet * 1000
+    return condition
+
+
+def network_idle(quiet=QUIET):
+    """
+    :param quiet: time (seconds) without finished requests
+    :return: a condition that holds when the document is loaded, and no request finished for 'quiet' seconds
+    """
+    state = {"count": -1, "since": time()}  # the number of loaded resources, and since when it's the same
+
+    def condition(driver):
+        ready_state, count = driver.execute_script(NETWORK_SCRIPT)
+        now = time()
+        if ready_state != "complete" or count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return now - state["since"] >= quiet
+    return condition
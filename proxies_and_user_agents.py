@@ -25,6 +25,12 @@ from random import randint
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver import DesiredCapabilities
+from selenium.common.exceptions import TimeoutException
+from proxy_validator import ranked_proxies
+from proxy_pool import parse_proxy_row
+from driver_pool import ChromeDriverPool
+from pacing import PACER
+from page_waits import wait_until, settle, url_changed
 
 __author__ = "KnifeF"
 __license__ = "MIT"
@@ -53,10 +59,17 @@ DESKTOP_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP")
 
 class GetProxiesAndUserAgents:
 
-    def __init__(self):
+    def __init__(self, proxy_pool=None, driver_pool=None, rotation=None):
         """
         creates new instance of ProxiesScraper Object
+        :param proxy_pool: ProxyPool object to store the scraped proxies in (with their history), or None
+        :param driver_pool: ChromeDriverPool object to take warm browsers from, or None
+        :param rotation: RotationService/RotationClient object to draw (proxy, user agent) pairs from
+        (weighted by latency), or None - for random choice from the scraped lists
         """
+        self.proxy_pool = proxy_pool  # persistent pool of proxies (or None)
+        self.driver_pool = driver_pool  # pool of warm browsers (or None)
+        self.rotation = rotation  # rotation service of proxies & user agents (or None)
         self.driver = None  # the WebDriver
         self.set_chrome_driver()  # Creates a new instance of the chrome driver with required parameters
         self.proxies = []  # list of proxies
@@ -85,7 +98,19 @@ class GetProxiesAndUserAgents:
         options.add_argument(WITHOUT_EXTENSIONS)  # disable extensions in chrome
 
         rnd_proxy = None
-        if activate_proxy:
+        rnd_user_agent = None
+        if self.rotation is not None:
+            # (proxy, user agent) pair - faster & healthier proxies are drawn more often
+            drawn_proxy, drawn_user_agent = self.rotation.draw()
+            if activate_proxy and drawn_proxy:
+                rnd_proxy = drawn_proxy
+                options.add_argument(r'--proxy-server=%s' % rnd_proxy)  # adds proxy as argument of ChromeOptions
+                print("Chosen Proxy --> "+rnd_proxy)
+            if use_user_agent and drawn_user_agent:
+                rnd_user_agent = drawn_user_agent
+                options.add_argument(r'--user-agent="%s"' % rnd_user_agent)
+                print("Chosen Chrome user agent --> " + rnd_user_agent)
+        elif activate_proxy:
             if self.proxies:
                 if len(self.proxies) > 1:
                     rnd_proxy = self.proxies[randint(0, len(self.proxies)-1)]  # random proxy from list
@@ -94,12 +119,17 @@ class GetProxiesAndUserAgents:
                 options.add_argument(r'--proxy-server=%s' % rnd_proxy)  # adds proxy as argument of ChromeOptions
                 print("Chosen Proxy --> "+rnd_proxy)
 
-        if use_user_agent:
+        if use_user_agent and self.rotation is None:
             if self.user_agents and len(self.user_agents) > 1:
                 # random user agent from list
                 rnd_user_agent = self.user_agents[randint(0, len(self.user_agents)-1)]
                 options.add_argument(r'--user-agent="%s"' % rnd_user_agent)
                 print("Chosen Chrome user agent --> " + rnd_user_agent)
+
+        if self.driver_pool is not None and not rnd_proxy:
+            # take a warm browser from the pool (the user agent is switched without a relaunch)
+            self.driver = self.driver_pool.acquire(user_agent=rnd_user_agent)
+            return
         sleep(5)
 
         # creating object (webdriver.Chrome)
@@ -120,8 +150,11 @@ class GetProxiesAndUserAgents:
         """
         # close the drivers and set the WebDriver value to 'None'
         if self.driver:
-            self.driver.delete_all_cookies()  # delete cookies in the scope of the session
-            self.driver.quit()  # Closes the browser and shuts down the ChromeDriver
+            if self.driver_pool is not None and self.driver_pool.owns(self.driver):
+                self.driver_pool.release(self.driver)  # return the browser to the pool (recycled, not closed)
+            else:
+                self.driver.delete_all_cookies()  # delete cookies in the scope of the session
+                self.driver.quit()  # Closes the browser and shuts down the ChromeDriver
             self.driver = None  # change value to None
         enable_js_preference()  # fix javascript to be enabled on chrome browser Preferences
 
@@ -136,7 +169,8 @@ class GetProxiesAndUserAgents:
         """
         # open new WebDriver if not opened yet
         self.destroy_driver()  # close webdriver after deleting cookies
-        sleep(3)  # delay in seconds
+        if self.driver_pool is None:
+            sleep(3)  # delay in seconds
 
         # sets required options and arguments in 'webdriver.Chrome'
         self.set_chrome_driver(activate_proxy=activate_proxy, use_user_agent=use_user_agent,
@@ -149,14 +183,16 @@ class GetProxiesAndUserAgents:
         :return:
         """
         if self.driver:
-            self.driver.get(USER_AGENTS_SITE)  # navigates to the web page
-            sleep(randint(3, 9))  # random delay
+            PACER.get(self.driver, USER_AGENTS_SITE)  # navigates to the web page (waits for the turn of the host)
 
             # Finds multiple elements by xpath
             a_tags = self.driver.find_elements_by_xpath(CHROME_LINK)
             if a_tags:
+                PACER.wait(USER_AGENTS_SITE)
+                old_url = self.driver.current_url
                 a_tags[0].click()  # click on the first element
-                sleep(3)  # delay in seconds
+                wait_for_page(self.driver, old_url)  # (the page is read only after it's loaded)
+                PACER.report(USER_AGENTS_SITE, text=self.driver.page_source)
 
                 # identify that the Chrome User Agents page appeared
                 if ("Chrome User Agents" in self.driver.page_source) \
@@ -196,9 +232,11 @@ class GetProxiesAndUserAgents:
                                 next_page = self.driver.find_elements_by_xpath(r"//div[@id='pagination']//"
                                                                                r"a[text()[contains(.,'>')]]")
                                 if next_page:
+                                    PACER.wait(USER_AGENTS_SITE)  # wait for the turn of the host
                                     next_page[0].click()  # click on link to next page '>'
+                                    wait_for_page(self.driver, current_url)
                                     page_num += 1
-                                    sleep(randint(3, 5))  # random delay in seconds
+                                    PACER.report(USER_AGENTS_SITE, text=self.driver.page_source)
                                     old_url = current_url
                                     # check if the URL is the same, after an attempt to move to the next page
                                     if old_url == self.driver.current_url:
@@ -213,15 +251,16 @@ class GetProxiesAndUserAgents:
                 print("finished scraping user agents")
             self.destroy_driver()
 
-    def scrape_proxies(self):
+    def scrape_proxies(self, validate=False):
         """
         navigate to website that contains proxies (IPs), parse proxy data,
         add it to proxy list, and save data to a text file
+        :param validate: True - to check the proxies concurrently, and keep the working ones (fastest first),
+        or False.
         :return:
         """
         if self.driver:
-            self.driver.get(PROXIES_SITE)  # navigates to the web page
-            sleep(randint(3, 9))  # random delay
+            PACER.get(self.driver, PROXIES_SITE)  # navigates to the web page (waits for the turn of the host)
             source = self.driver.page_source  # Gets the source of the current page
             soup = BeautifulSoup(source, 'html.parser')  # build BeautifulSoup Obj (with html source)
 
@@ -248,6 +287,7 @@ class GetProxiesAndUserAgents:
                                 # res = ""
 
                     good_proxies = []
+                    pool_rows = []
                     if self.proxies:
                         print("\n\n\n")
                         for index in range(len(self.proxies)):
@@ -265,6 +305,18 @@ class GetProxiesAndUserAgents:
                                 # append the proxy to the list as string (proxy:port)
                                 good_proxies.append(split_proxy_str[0]+":"+split_proxy_str[1])
 
+                                # (proxy, country, anonymity, https) to store in the proxy pool
+                                pool_row = parse_proxy_row(self.proxies[index])
+                                if pool_row:
+                                    pool_rows.append(pool_row)
+
+                    if self.proxy_pool is not None and pool_rows:
+                        self.proxy_pool.add_many(pool_rows)  # keep the proxies (and their history) on disk
+
+                    if validate and good_proxies:
+                        # check the proxies concurrently, and keep the working ones (sorted by latency)
+                        good_proxies = ranked_proxies(good_proxies, pool=self.proxy_pool)
+
                     self.proxies = None
                     if good_proxies:  # found good proxies
                         self.proxies = good_proxies
@@ -276,6 +328,21 @@ class GetProxiesAndUserAgents:
                     self.destroy_driver()
 
 
+def wait_for_page(driver, old_url):
+    """
+    waits till the page of a click is loaded - a new URL, and a settled page (no requests, no DOM changes)
+    :param driver: the WebDriver
+    :param old_url: the URL before the click (string)
+    :return: True - if a new page was loaded, or False (the URL didn't change)
+    """
+    try:
+        wait_until(driver, url_changed(old_url))
+    except TimeoutException:
+        return False
+    settle(driver)
+    return True
+
+
 def data_to_file(data_lst, file_name):
         """
         save data from list to a text file on desktop
@@ -318,9 +385,11 @@ def main():
     The main function
     :return:
     """
-    sleep(5)
-    scraper = GetProxiesAndUserAgents()  # build new 'GetProxiesAndUserAgents' object
-    scraper.scrape_proxies()  # trying to find available proxies on 'https://free-proxy-list.net/'
+    # pool of warm headless browsers (with JavaScript disabled)
+    driver_pool = ChromeDriverPool(size=1, arguments=["--start-fullscreen"], prefs=PREFERENCES)
+    scraper = GetProxiesAndUserAgents(driver_pool=driver_pool)  # build new 'GetProxiesAndUserAgents' object
+    # trying to find available proxies on 'https://free-proxy-list.net/' (and check that they work)
+    scraper.scrape_proxies(validate=True)
     scraper.reopen_driver()  # close and open again the webdriver
 
     # trying to find available chrome user agents on
@@ -328,6 +397,7 @@ def main():
     scraper.scrape_user_agents()
 
     scraper.destroy_driver()  # destroy the webdriver
+    driver_pool.close()  # quit the browsers of the pool
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,236 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A persistent pool of proxy servers (IP:PORT format), stored in a SQLite database on desktop.
+
+The pool keeps every proxy that was scraped from 'https://free-proxy-list.net/' with its country,
+anonymity level and the time it was last seen on the website, and keeps a history of its checks
+(success/failure counts and an EWMA - exponentially weighted moving average - of its latency).
+
+Stale proxies (that were not seen or did not work for a while) and failing proxies
+(too many failures in a row) are evicted, so a warm restart can take working proxies from the pool
+and skip scraping & validation entirely.
+"""
+
+import os
+import sqlite3
+import argparse
+from time import time
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+POOL_PATH = os.path.join(os.environ.get("HOMEPATH", os.path.expanduser("~")), "DESKTOP", "proxy_pool.sqlite3")
+TTL = 6 * 60 * 60  # evict proxies that were not seen/working for 6 hours (seconds)
+MAX_FAILURES = 3  # evict proxies that failed 3 times in a row
+EWMA_ALPHA = 0.3  # weight of the newest latency sample in the latency EWMA
+
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS proxies (
+    proxy TEXT PRIMARY KEY,
+    country TEXT,
+    anonymity TEXT,
+    https INTEGER,
+    added_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_checked REAL,
+    last_success REAL,
+    successes INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0,
+    failures_in_row INTEGER NOT NULL DEFAULT 0,
+    latency_ewma REAL
+)"""
+
+# health score - success rate with one "virtual" success and failure (new proxies get 0.5)
+SCORE_SQL = "(successes + 1.0) / (successes + failures + 2.0)"
+
+
+class ProxyPool:
+
+    def __init__(self, db_path=POOL_PATH, ttl=TTL, max_failures=MAX_FAILURES, alpha=EWMA_ALPHA):
+        """
+        creates new instance of ProxyPool Object (opens/creates the SQLite database)
+        :param db_path: path to the SQLite database file (string), or ':memory:'
+        :param ttl: time (in seconds) to keep proxies that were not seen/working
+        :param max_failures: number of failures in a row that evicts a proxy
+        :param alpha: weight of the newest latency sample in the latency EWMA (0 - 1)
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_failures = max_failures
+        self.alpha = alpha
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row  # access columns by name
+        with self.conn:
+            self.conn.execute(CREATE_TABLE)
+
+    def close(self):
+        """
+        close the database connection
+        :return:
+        """
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM proxies").fetchone()[0]
+
+    def add(self, proxy, country=None, anonymity=None, https=None, seen_at=None):
+        """
+        adds a proxy to the pool, or updates its details and the time it was last seen (keeps its history)
+        :param proxy: proxy server as string (IP:PORT)
+        :param country: the country of the proxy server (string), or None
+        :param anonymity: anonymity level, like 'elite proxy' or 'anonymous' (string), or None
+        :param https: True - if the proxy supports https, False, or None (unknown)
+        :param seen_at: the time the proxy was seen (seconds since the epoch), or None - for now
+        :return:
+        """
+        self.add_many([(proxy, country, anonymity, https)], seen_at=seen_at)
+
+    def add_many(self, rows, seen_at=None):
+        """
+        adds proxies to the pool (in one transaction) - see 'add'
+        :param rows: iterable of tuples (proxy, country, anonymity, https)
+        :param seen_at: the time the proxies were seen (seconds since the epoch), or None - for now
+        :return:
+        """
+        now = time() if seen_at is None else seen_at
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO proxies (proxy, country, anonymity, https, added_at, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(proxy) DO UPDATE SET "
+                "country = COALESCE(excluded.country, country), "
+                "anonymity = COALESCE(excluded.anonymity, anonymity), "
+                "https = COALESCE(excluded.https, https), "
+                "last_seen = excluded.last_seen",
+                [(proxy, country, anonymity, None if https is None else int(bool(https)), now, now)
+                 for proxy, country, anonymity, https in rows])
+
+    def record_success(self, proxy, latency=None):
+        """
+        records a successful use/check of a proxy (and updates its latency EWMA)
+        :param proxy: proxy server as string (IP:PORT)
+        :param latency: the measured latency (seconds), or None
+        :return:
+        """
+        now = time()
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO proxies (proxy, added_at, last_seen) VALUES (?, ?, ?)",
+                              (proxy, now, now))
+            self.conn.execute(
+                "UPDATE proxies SET successes = successes + 1, failures_in_row = 0, "
+                "last_checked = ?, last_success = ?, "
+                "latency_ewma = CASE WHEN ? IS NULL THEN latency_ewma WHEN latency_ewma IS NULL THEN ? "
+                "ELSE ? * ? + (1 - ?) * latency_ewma END "
+                "WHERE proxy = ?",
+                (now, now, latency, latency, self.alpha, latency, self.alpha, proxy))
+
+    def record_failure(self, proxy):
+        """
+        records a failed use/check of a proxy
+        :param proxy: proxy server as string (IP:PORT)
+        :return:
+        """
+        now = time()
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO proxies (proxy, added_at, last_seen) VALUES (?, ?, ?)",
+                              (proxy, now, now))
+            self.conn.execute("UPDATE proxies SET failures = failures + 1, failures_in_row = failures_in_row + 1, "
+                              "last_checked = ? WHERE proxy = ?", (now, proxy))
+
+    def record_results(self, results):
+        """
+        records the results of proxy checks (ProxyResult objects from 'proxy_validator')
+        :param results: iterable of ProxyResult
+        :return:
+        """
+        for result in results:
+            if result.ok:
+                self.record_success(result.proxy, result.first_byte)
+            else:
+                self.record_failure(result.proxy)
+
+    def evict(self, now=None):
+        """
+        removes stale proxies (not seen and not working for more than 'ttl' seconds),
+        and failing proxies ('max_failures' failures in a row) from the pool
+        :param now: current time (seconds since the epoch), or None
+        :return: number of evicted proxies
+        """
+        deadline = (now or time()) - self.ttl
+        with self.conn:
+            cursor = self.conn.execute("DELETE FROM proxies WHERE MAX(last_seen, COALESCE(last_success, 0)) < ? "
+                                       "OR failures_in_row >= ?", (deadline, self.max_failures))
+        return cursor.rowcount
+
+    def proxies(self, limit=None, min_score=0.0, checked_within=None):
+        """
+        :param limit: max number of proxies to return, or None
+        :param min_score: min health score (success rate, 0 - 1)
+        :param checked_within: only proxies that worked within the given time (seconds), or None
+        :return: list of proxies (IP:PORT strings) - healthiest and fastest first
+        """
+        query = "SELECT proxy FROM proxies WHERE %s >= ?" % SCORE_SQL
+        params = [min_score]
+        if checked_within is not None:
+            query += " AND last_success >= ?"
+            params.append(time() - checked_within)
+        query += " ORDER BY %s DESC, latency_ewma IS NULL, latency_ewma" % SCORE_SQL
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [row["proxy"] for row in self.conn.execute(query, params)]
+
+    def working_proxies(self, max_age=None, limit=None):
+        """
+        proxies that worked recently - a warm restart can use them without scraping & validation
+        :param max_age: max time (in seconds) since the last success, or None - for 'ttl'
+        :param limit: max number of proxies to return, or None
+        :return: list of proxies (IP:PORT strings) - healthiest and fastest first
+        """
+        return self.proxies(limit=limit, checked_within=self.ttl if max_age is None else max_age)
+
+    def stats(self):
+        """
+        :return: list of sqlite3.Row objects - all the data on the proxies in pool (healthiest first)
+        """
+        return self.conn.execute("SELECT *, %s AS score FROM proxies ORDER BY score DESC, "
+                                 "latency_ewma IS NULL, latency_ewma" % SCORE_SQL).fetchall()
+
+
+def parse_proxy_row(row):
+    """
+    parses a row of the proxies' table from 'https://free-proxy-list.net/' (joined texts of <td> tags)
+    :param row: string like '1.2.3.4, 8080, US, United States, elite proxy, no, yes, 1 minute ago, '
+    :return: tuple (proxy, country, anonymity, https), or None
+    """
+    split_proxy_str = row.split(", ")  # split string by commas
+    if len(split_proxy_str) < 7 or not split_proxy_str[1].isdigit():
+        return None
+    return (split_proxy_str[0] + ":" + split_proxy_str[1], split_proxy_str[3], split_proxy_str[4],
+            split_proxy_str[6] == "yes")
+
+
+def main():
+    """
+    The main function - evicts stale/failing proxies and prints the pool
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-p", "--POOL", dest="db_path", type=str, default=POOL_PATH,
+                        help="Enter a path to the proxy pool (SQLite database)")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    pool = ProxyPool(args.db_path)
+    print("evicted %d proxies" % pool.evict())
+    for row in pool.stats():
+        print("%s | %s | %s | score: %.2f | latency: %s" % (
+            row["proxy"], row["country"], row["anonymity"], row["score"],
+            "%.3f" % row["latency_ewma"] if row["latency_ewma"] is not None else "-"))
+    pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A rotation service that hands out (proxy, user agent) pairs to the scrapers.
+
+Proxies are drawn with a probability that is proportional to their health score (success rate) divided by
+their measured latency, so faster and more reliable proxies get proportionally more traffic automatically.
+Draws use the alias method (Walker/Vose) - O(1) per draw, even with large pools. The alias table is rebuilt
+(in O(n)) only after the stats of the proxies have changed.
+
+User agents (like the ones that are scraped by 'proxies_and_user_agents.py') are drawn uniformly.
+A job can get a sticky pair - the same proxy and user agent for all of its draws, until it is released.
+
+The service can be used in-process (RotationService), or over a local socket (serve & RotationClient),
+with one JSON object per line:
+{"cmd": "draw", "job": "job1"} --> {"proxy": "1.2.3.4:8080", "user_agent": "Mozilla/5.0 ..."}
+{"cmd": "report", "proxy": "1.2.3.4:8080", "ok": true, "latency": 0.8} --> {}
+{"cmd": "release", "job": "job1"} --> {}
+"""
+
+import json
+import socket
+import argparse
+import threading
+import socketserver
+from random import random, randrange
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+HOST = "127.0.0.1"
+PORT = 8898
+DEFAULT_LATENCY = 2.0  # latency (seconds) of proxies that were not measured yet
+MIN_LATENCY = 0.05  # latency floor, so a single very fast sample doesn't take all the traffic
+EWMA_ALPHA = 0.3  # weight of the newest latency sample in the latency EWMA
+# max number of draws with an outdated alias table (after the stats have changed) - no more than the number
+# of proxies, so the O(n) rebuild is amortized to O(1) per draw
+REBUILD_EVERY = 100
+
+
+class AliasTable:
+
+    def __init__(self, weights):
+        """
+        creates new instance of AliasTable Object (Vose's alias method) - O(n) to build, O(1) per draw
+        :param weights: list of non-negative weights (at least one weight is positive)
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [0.0] * n
+        self.alias = [0] * n
+        small = [i for i, weight in enumerate(scaled) if weight < 1.0]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+        for i in small + large:  # leftovers (rounding errors) are full columns
+            self.prob[i] = 1.0
+
+    def draw(self):
+        """
+        :return: a random index (with a probability proportional to its weight)
+        """
+        i = randrange(len(self.prob))
+        return i if random() < self.prob[i] else self.alias[i]
+
+
+class RotationService:
+
+    def __init__(self, proxies=None, user_agents=None, alpha=EWMA_ALPHA, rebuild_every=REBUILD_EVERY):
+        """
+        creates new instance of RotationService Object
+        :param proxies: list of proxies (IP:PORT strings), or None
+        :param user_agents: list of user agents (strings), or None
+        :param alpha: weight of the newest latency sample in the latency EWMA (0 - 1)
+        :param rebuild_every: max number of draws with an outdated alias table
+        """
+        self.alpha = alpha
+        self.rebuild_every = rebuild_every
+        self.lock = threading.Lock()
+        self.proxies = []  # list of proxies (the index is the position in the alias table)
+        self.stats = {}  # proxy -> [successes, failures, latency EWMA or None]
+        self.user_agents = list(user_agents or [])
+        self.sticky = {}  # job -> (proxy, user agent)
+        self.table = None  # the alias table
+        self.stale_draws = 0  # number of draws since the stats have changed (or -1, if they haven't)
+        self.add_proxies(proxies or [])
+
+    @classmethod
+    def from_pool(cls, proxy_pool, user_agents=None, limit=None):
+        """
+        builds a rotation service from the proxies (and their history) in a ProxyPool
+        :param proxy_pool: ProxyPool object
+        :param user_agents: list of user agents (strings), or None
+        :param limit: max number of proxies (healthiest first), or None
+        :return: RotationService object
+        """
+        service = cls(user_agents=user_agents)
+        for row in proxy_pool.stats()[:limit]:
+            service.add_proxies([row["proxy"]])
+            service.stats[row["proxy"]] = [row["successes"], row["failures"], row["latency_ewma"]]
+        return service
+
+    def add_proxies(self, proxies):
+        """
+        adds proxies to the rotation (without stats - they get the default latency)
+        :param proxies: list of proxies (IP:PORT strings)
+        :return:
+        """
+        with self.lock:
+            for proxy in proxies:
+                if proxy and proxy not in self.stats:
+                    self.proxies.append(proxy)
+                    self.stats[proxy] = [0, 0, None]
+            self.table = None
+
+    def remove_proxy(self, proxy):
+        """
+        removes a proxy from the rotation (and from sticky jobs that use it)
+        :param proxy: proxy (IP:PORT string)
+        :return:
+        """
+        with self.lock:
+            if self.stats.pop(proxy, None) is not None:
+                self.proxies.remove(proxy)
+                self.table = None
+                for job in [job for job, pair in self.sticky.items() if pair[0] == proxy]:
+                    del self.sticky[job]
+
+    def set_user_agents(self, user_agents):
+        """
+        :param user_agents: list of user agents (strings)
+        :return:
+        """
+        with self.lock:
+            self.user_agents = list(user_agents)
+
+    def weight(self, proxy):
+        """
+        :param proxy: proxy (IP:PORT string)
+        :return: the weight of the proxy - health score (success rate) divided by latency
+        """
+        successes, failures, latency = self.stats[proxy]
+        score = (successes + 1.0) / (successes + failures + 2.0)
+        return score / max(latency if latency is not None else DEFAULT_LATENCY, MIN_LATENCY)
+
+    def _table(self):
+        """
+        :return: the alias table (rebuilt if the proxies have changed, or the stats have changed long enough ago)
+        """
+        if self.table is None or self.stale_draws >= min(self.rebuild_every, len(self.proxies)):
+            self.table = AliasTable([self.weight(proxy) for proxy in self.proxies]) if self.proxies else None
+            self.stale_draws = -1
+        elif self.stale_draws >= 0:
+            self.stale_draws += 1
+        return self.table
+
+    def draw_proxy(self):
+        """
+        :return: a proxy (IP:PORT string) - weighted by latency and success rate, or None (no proxies)
+        """
+        with self.lock:
+            table = self._table()
+            return self.proxies[table.draw()] if table else None
+
+    def draw_user_agent(self):
+        """
+        :return: a random user agent (string), or None (no user agents)
+        """
+        with self.lock:
+            return self.user_agents[randrange(len(self.user_agents))] if self.user_agents else None
+
+    def draw(self, job=None):
+        """
+        hands out a (proxy, user agent) pair
+        :param job: the name of a job (string) - to get the same pair for all the draws of the job, or None
+        :return: tuple (proxy, user agent) - each one might be None
+        """
+        if job is not None:
+            with self.lock:
+                if job in self.sticky:
+                    return self.sticky[job]
+        pair = (self.draw_proxy(), self.draw_user_agent())
+        if job is not None:
+            with self.lock:
+                pair = self.sticky.setdefault(job, pair)
+        return pair
+
+    def release(self, job):
+        """
+        releases the sticky pair of a job (the next draw of the job gets a new pair)
+        :param job: the name of the job (string)
+        :return:
+        """
+        with self.lock:
+            self.sticky.pop(job, None)
+
+    def report(self, proxy, ok, latency=None):
+        """
+        updates the stats of a proxy after it was used (the traffic shifts towards faster/healthier proxies)
+        :param proxy: proxy (IP:PORT string)
+        :param ok: True - if the proxy worked, or False
+        :param latency: the measured latency (seconds), or None
+        :return:
+        """
+        with self.lock:
+            stats = self.stats.get(proxy)
+            if stats is None:
+                return
+            if ok:
+                stats[0] += 1
+                if latency is not None:
+                    stats[2] = latency if stats[2] is None else self.alpha * latency + (1 - self.alpha) * stats[2]
+            else:
+                stats[1] += 1
+            if self.stale_draws < 0:
+                self.stale_draws = 0  # rebuild the alias table after 'rebuild_every' draws
+
+    def handle(self, request):
+        """
+        handles a request of the socket API
+        :param request: dict, like {"cmd": "draw", "job": "job1"}
+        :return: dict (the response)
+        """
+        cmd = request.get("cmd")
+        if cmd == "draw":
+            proxy, user_agent = self.draw(request.get("job"))
+            return {"proxy": proxy, "user_agent": user_agent}
+        if cmd == "report":
+            self.report(request["proxy"], bool(request.get("ok")), request.get("latency"))
+            return {}
+        if cmd == "release":
+            self.release(request["job"])
+            return {}
+        return {"error": "unknown command: %s" % cmd}
+
+
+class RotationRequestHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        """
+        handles the requests of a client - one JSON object per line
+        :return:
+        """
+        for line in self.rfile:
+            try:
+                response = self.server.service.handle(json.loads(line.decode('utf-8')))
+            except (ValueError, KeyError, TypeError) as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode('utf-8'))
+
+
+class RotationServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service, host=HOST, port=PORT):
+        """
+        creates new instance of RotationServer Object - serves a RotationService over a local socket
+        :param service: RotationService object
+        :param host: the host to listen on
+        :param port: the port to listen on (0 - any free port)
+        """
+        self.service = service
+        socketserver.ThreadingTCPServer.__init__(self, (host, port), RotationRequestHandler)
+
+    def start(self):
+        """
+        serves the requests in a background thread
+        :return: the address of the server (IP:PORT)
+        """
+        threading.Thread(target=self.serve_forever, name="rotation-server", daemon=True).start()
+        return "%s:%d" % self.server_address
+
+
+class RotationClient:
+
+    def __init__(self, address="%s:%d" % (HOST, PORT)):
+        """
+        creates new instance of RotationClient Object - uses a RotationService over a local socket
+        :param address: the address of the server (IP:PORT)
+        """
+        host, port = address.rsplit(":", 1)
+        self.sock = socket.create_connection((host, int(port)))
+        self.rfile = self.sock.makefile('rb')
+        self.lock = threading.Lock()
+
+    def close(self):
+        """
+        closes the connection to the server
+        :return:
+        """
+        self.rfile.close()
+        self.sock.close()
+
+    def _call(self, request):
+        """
+        sends a request to the server, and waits for the response
+        :param request: dict
+        :return: dict (the response)
+        """
+        with self.lock:
+            self.sock.sendall((json.dumps(request) + "\n").encode('utf-8'))
+            return json.loads(self.rfile.readline().decode('utf-8'))
+
+    def draw(self, job=None):
+        """
+        see 'RotationService.draw'
+        :return: tuple (proxy, user agent)
+        """
+        response = self._call({"cmd": "draw", "job": job})
+        return response["proxy"], response["user_agent"]
+
+    def draw_proxy(self):
+        """
+        :return: a proxy (IP:PORT string), or None
+        """
+        return self.draw()[0]
+
+    def report(self, proxy, ok, latency=None):
+        """
+        see 'RotationService.report'
+        :return:
+        """
+        self._call({"cmd": "report", "proxy": proxy, "ok": ok, "latency": latency})
+
+    def release(self, job):
+        """
+        see 'RotationService.release'
+        :return:
+        """
+        self._call({"cmd": "release", "job": job})
+
+
+def main():
+    """
+    The main function - serves the proxies (and user agents) from text files over a local socket
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--PROXIES", dest="proxies_file", type=str, required=True,
+                        help="Enter a path to a text file with proxies (IP:PORT on each line)")
+    parser.add_argument("-u", "--USER_AGENTS", dest="user_agents_file", type=str,
+                        help="Enter a path to a text file with user agents (one on each line)")
+    parser.add_argument("-p", "--PORT", dest="port", type=int, default=PORT)
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    with open(args.proxies_file, encoding='utf-8') as in_f:
+        proxies = [line.strip() for line in in_f if line.strip()]
+    user_agents = []
+    if args.user_agents_file:
+        with open(args.user_agents_file, encoding='utf-8') as in_f:
+            user_agents = [line.strip() for line in in_f if line.strip()]
+
+    server = RotationServer(RotationService(proxies, user_agents), port=args.port)
+    print("serving %d proxies and %d user agents on %s:%d" % (len(proxies), len(user_agents),
+                                                             *server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
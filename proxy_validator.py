@@ -0,0 +1,274 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""This script validates proxy servers (IP:PORT format) concurrently with asyncio, instead of opening
+a browser for each proxy and checking whether a web page appears correctly.
+
+Each proxy is checked against a target URL, and gets a latency measurement for every stage of the request:
+1. connect - the time it took to open a TCP connection to the proxy server.
+2. tls - the time it took to open a tunnel (HTTP CONNECT) and complete the TLS handshake with the target
+(https targets only).
+3. first byte - the time it took to receive the first byte of the target's response.
+
+The results are filtered (working proxies only) and ranked by their latency, so a list of proxies that
+was scraped from 'https://free-proxy-list.net/' (a few hundred candidates) is validated in seconds.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\proxy_validator.py -f "your\\path\\to\\recent_proxies.txt" -t "https://findmyfbid.com/"
+"""
+
+import ssl
+import sys
+import socket
+import codecs
+import asyncio
+import argparse
+from time import perf_counter
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+DEFAULT_TARGET = "https://www.google.com/"  # default URL to check proxies against
+CONCURRENCY = 256  # max number of proxies that are checked at the same time
+TIMEOUT = 8  # max time (in seconds) for a single proxy check
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 ' \
+             '(KHTML, like Gecko) Chrome/57.0.2987.133 Safari/537.36'
+
+# the result of a single proxy check (latencies are in seconds, from the start of the check, or None)
+ProxyResult = namedtuple('ProxyResult', ['proxy', 'ok', 'status', 'connect', 'tls', 'first_byte', 'error'])
+
+
+async def check_proxy(proxy, target=DEFAULT_TARGET, timeout=TIMEOUT, ssl_context=None):
+    """
+    checks a single proxy server against a target URL, and measures connect/TLS/first-byte latency.
+    :param proxy: proxy server as string (IP:PORT)
+    :param target: URL to request through the proxy (string)
+    :param timeout: max time (in seconds) for the whole check
+    :param ssl_context: SSL context for https targets (or None, to use a context that accepts all certs)
+    :return: ProxyResult
+    """
+    try:
+        return await asyncio.wait_for(_check_proxy(proxy, target, ssl_context), timeout)
+    except asyncio.TimeoutError:
+        return ProxyResult(proxy, False, None, None, None, None, "timeout")
+    except (OSError, ValueError, ssl.SSLError) as e:
+        return ProxyResult(proxy, False, None, None, None, None, e.__class__.__name__)
+
+
+async def _check_proxy(proxy, target, ssl_context):
+    """
+    the actual proxy check (without a timeout) - see 'check_proxy'
+    :return: ProxyResult
+    """
+    loop = asyncio.get_running_loop()
+    proxy_host, proxy_port = split_proxy(proxy)
+    parts = urlsplit(target)
+    target_host = parts.hostname
+    is_https = parts.scheme == "https"
+    target_port = parts.port or (443 if is_https else 80)
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+
+    start = perf_counter()
+    tls_latency = None
+
+    # open a TCP connection to the proxy server (non-blocking socket)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, (proxy_host, proxy_port))
+        connect_latency = perf_counter() - start
+
+        if is_https:
+            # ask the proxy to open a tunnel to the target, and read the proxy's answer
+            await loop.sock_sendall(sock, ("CONNECT %s:%d HTTP/1.1\r\nHost: %s:%d\r\n\r\n"
+                                           % (target_host, target_port, target_host, target_port)).encode())
+            answer = b""
+            while b"\r\n\r\n" not in answer:
+                chunk = await loop.sock_recv(sock, 4096)
+                if not chunk:
+                    break
+                answer += chunk
+            status = parse_status(answer)
+            if status != 200:
+                sock.close()
+                return ProxyResult(proxy, False, status, connect_latency, None, None, "tunnel refused")
+
+            # TLS handshake with the target (through the tunnel)
+            if ssl_context is None:
+                ssl_context = insecure_ssl_context()
+            reader, writer = await asyncio.open_connection(sock=sock, ssl=ssl_context,
+                                                           server_hostname=target_host)
+            tls_latency = perf_counter() - start
+            request_line = "GET %s HTTP/1.1\r\n" % path
+        else:
+            reader, writer = await asyncio.open_connection(sock=sock)
+            # a plain http proxy expects the absolute URL in the request line
+            request_line = "GET http://%s:%d%s HTTP/1.1\r\n" % (target_host, target_port, path)
+    except BaseException:
+        sock.close()
+        raise
+
+    try:
+        writer.write((request_line + "Host: %s\r\nUser-Agent: %s\r\nAccept: */*\r\nConnection: close\r\n\r\n"
+                      % (target_host, USER_AGENT)).encode())
+        await writer.drain()
+        first_chunk = await reader.read(1)  # wait for the first byte of the response
+        first_byte_latency = perf_counter() - start
+        if not first_chunk:
+            return ProxyResult(proxy, False, None, connect_latency, tls_latency, None, "empty response")
+        status = parse_status(first_chunk + await reader.readline())
+    finally:
+        writer.close()
+
+    ok = status is not None and status < 400
+    return ProxyResult(proxy, ok, status, connect_latency, tls_latency, first_byte_latency,
+                       None if ok else "bad status")
+
+
+async def validate_proxies_async(proxies, target=DEFAULT_TARGET, concurrency=CONCURRENCY, timeout=TIMEOUT):
+    """
+    checks many proxy servers at once (limited by 'concurrency')
+    :param proxies: iterable of proxy servers (IP:PORT strings)
+    :param target: URL to request through each proxy (string)
+    :param concurrency: max number of proxies that are checked at the same time
+    :param timeout: max time (in seconds) for a single proxy check
+    :return: list of ProxyResult (in the same order as the given proxies)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    ssl_context = insecure_ssl_context()  # one context for all the checks
+
+    async def bounded_check(proxy):
+        async with semaphore:
+            return await check_proxy(proxy, target=target, timeout=timeout, ssl_context=ssl_context)
+
+    return await asyncio.gather(*[bounded_check(proxy) for proxy in unique_proxies(proxies)])
+
+
+def validate_proxies(proxies, target=DEFAULT_TARGET, concurrency=CONCURRENCY, timeout=TIMEOUT, max_latency=None,
+                     pool=None):
+    """
+    checks proxy servers concurrently, and returns only the working ones - ranked by latency (fastest first)
+    :param proxies: iterable of proxy servers (IP:PORT strings)
+    :param target: URL to request through each proxy (string)
+    :param concurrency: max number of proxies that are checked at the same time
+    :param timeout: max time (in seconds) for a single proxy check
+    :param max_latency: drop proxies that are slower (first byte, in seconds) than this value, or None
+    :param pool: ProxyPool object to record the results of all the checks in, or None
+    :return: list of ProxyResult - working proxies, sorted by first byte latency
+    """
+    results = asyncio.run(validate_proxies_async(proxies, target=target, concurrency=concurrency,
+                                                 timeout=timeout))
+    if pool is not None:
+        pool.record_results(results)  # keep the success/failure history of each proxy
+    return rank_results(results, max_latency=max_latency)
+
+
+def ranked_proxies(proxies, target=DEFAULT_TARGET, concurrency=CONCURRENCY, timeout=TIMEOUT, max_latency=None,
+                   pool=None):
+    """
+    same as 'validate_proxies', but returns proxy strings only
+    :return: list of working proxies (IP:PORT strings), fastest first
+    """
+    return [result.proxy for result in validate_proxies(proxies, target=target, concurrency=concurrency,
+                                                        timeout=timeout, max_latency=max_latency, pool=pool)]
+
+
+def rank_results(results, max_latency=None):
+    """
+    filter working proxies from check results, and sort them by first byte latency
+    :param results: iterable of ProxyResult
+    :param max_latency: drop proxies that are slower (first byte, in seconds) than this value, or None
+    :return: list of ProxyResult
+    """
+    good_results = [result for result in results if result.ok
+                    and (max_latency is None or result.first_byte <= max_latency)]
+    return sorted(good_results, key=lambda result: result.first_byte)
+
+
+def split_proxy(proxy):
+    """
+    :param proxy: proxy server as string (IP:PORT)
+    :return: tuple (host, port)
+    """
+    host, port = proxy.strip().rsplit(":", 1)
+    return host, int(port)
+
+
+def unique_proxies(proxies):
+    """
+    :param proxies: iterable of proxy servers (IP:PORT strings)
+    :return: list of proxies without duplicates/empty values (keeps the original order)
+    """
+    seen = set()
+    res = []
+    for proxy in proxies:
+        if proxy:
+            proxy = proxy.strip()
+            if proxy and proxy not in seen:
+                seen.add(proxy)
+                res.append(proxy)
+    return res
+
+
+def parse_status(data):
+    """
+    :param data: bytes that start with an HTTP status line (like b'HTTP/1.1 200 OK')
+    :return: status code (int), or None
+    """
+    parts = data.split(b"\r\n", 1)[0].split()
+    if len(parts) >= 2 and parts[0].startswith(b"HTTP/") and parts[1].isdigit():
+        return int(parts[1])
+    return None
+
+
+def insecure_ssl_context():
+    """
+    :return: SSL context that accepts all certs (like 'acceptInsecureCerts' in the WebDriver capabilities)
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def proxies_from_file(file_name):
+    """
+    :param file_name: path to a text file with a proxy (IP:PORT) on each line
+    :return: list of proxies
+    """
+    with codecs.open(file_name, 'r', encoding='utf-8') as in_f:
+        return unique_proxies(in_f.read().splitlines())
+
+
+def main():
+    """
+    The main function
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILE", dest="file_name", type=str, required=True,
+                        help="Enter a path to a text file with proxies (IP:PORT on each line)")
+    parser.add_argument("-t", "--TARGET", dest="target", type=str, default=DEFAULT_TARGET,
+                        help="Enter a URL to check the proxies against")
+    parser.add_argument("-c", "--CONCURRENCY", dest="concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--timeout", dest="timeout", type=float, default=TIMEOUT)
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    start = perf_counter()
+    proxies = proxies_from_file(args.file_name)
+    results = validate_proxies(proxies, target=args.target, concurrency=args.concurrency, timeout=args.timeout)
+    for result in results:
+        print("%s --> connect: %.3f | tls: %s | first byte: %.3f" % (
+            result.proxy, result.connect, "%.3f" % result.tls if result.tls is not None else "-", result.first_byte))
+    print("%d/%d proxies work (%.1f seconds)" % (len(results), len(proxies), perf_counter() - start))
+    if not results:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,8 @@ testing framework) libraries.
 
 The script tries to upload a photo to google image search (drag&drop), and to check if the photo is found on web,
 using PyAutoGUI's GUI automation&image recognition abilities.
+
+For a directory of images (headless, without the OS file dialog), see 'batch_image_search'.
 """
 
 import os
@@ -18,6 +20,8 @@ import pyautogui
 import pyperclip
 from time import sleep
 from random import randint
+from template_matcher import MATCHER
+from upload_prep import prepare_image
 
 __author__ = "KnifeF"
 __email__ = "knifef@protonmail.com"
@@ -76,7 +80,7 @@ class TestGoogleImageSearch(unittest.TestCase):  # A class whose instances are s
 
             # --------------locate and click on upload image button (on google's reverse image search)----------
             # locate image/pattern on screen (upload image button)
-            img_upload = pyautogui.locateOnScreen(self.upload_img_path, minSearchTime=10)
+            img_upload = MATCHER.locate(self.upload_img_path, timeout=10)
             self.assertIsNotNone(img_upload)  # Included for symmetry with assertIsNone
             loc_x, loc_y = pyautogui.center(img_upload)  # center of found image/pattern loc
             # Moves the mouse cursor to a given point (x,y) on the screen
@@ -89,8 +93,8 @@ class TestGoogleImageSearch(unittest.TestCase):  # A class whose instances are s
             sleep(1)  # delay
 
             # --------------find and show the required image file in folder (in explorer)---------------
-            # Run command with arguments (to find photo on explorer)
-            subprocess.Popen(r'explorer /select,%s' % self.required_photo_path)
+            # Run command with arguments (to find photo on explorer) - the downscaled copy, without metadata
+            subprocess.Popen(r'explorer /select,%s' % prepare_image(self.required_photo_path))
             print("file is showed up and selected!")
             sleep(2)  # delay
             pyautogui.hotkey('win', 'up')  # shortcut to maximize window
@@ -136,8 +140,9 @@ def locate_and_move_to(from_path, to_path):
             and (os.path.exists(from_path) and os.path.exists(to_path)) \
             and (os.path.isfile(from_path) and os.path.isfile(to_path)):
 
-        from_pattern_loc = pyautogui.locateOnScreen(from_path, minSearchTime=10)  # locate image/pattern on screen
-        to_pattern_loc = pyautogui.locateOnScreen(to_path, minSearchTime=10)  # locate image/pattern on screen
+        # locate both images/patterns on one grab of the screen
+        found = MATCHER.locate_all([from_path, to_path], timeout=10)
+        from_pattern_loc, to_pattern_loc = found[from_path], found[to_path]
 
         if from_pattern_loc and to_pattern_loc:
             from_x, from_y = pyautogui.center(from_pattern_loc)  # center of found image loc
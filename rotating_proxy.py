@@ -0,0 +1,640 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A small local forward proxy that rotates upstream proxy servers, so a browser doesn't need to be
+restarted (with a new '--proxy-server' argument) to switch proxies.
+
+The browser points at the local proxy once (like '--proxy-server=127.0.0.1:8899'), and every request
+(plain http requests and https tunnels - HTTP CONNECT) is chained to an upstream proxy from the pool.
+The upstream proxy is rotated:
+1. 'request' - on every request.
+2. 'count' - every N requests.
+3. 'sticky' - only on an API call (a python method or a request to 'http://rotating-proxy/rotate').
+Named sticky sessions keep their own upstream proxy ('http://rotating-proxy/session?name=job1').
+When the upstream proxy is switched, the open https tunnels of the other upstream proxies are closed, so the
+keep-alive connections of the browser are reopened through the new upstream proxy (instead of keeping the old one).
+
+Connections to the upstream proxies are pooled (kept alive and reused by the next requests).
+When there are no upstream proxies, requests go directly to the target.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\rotating_proxy.py -f "your\\path\\to\\recent_proxies.txt" -p 8899 -m count -n 10
+"""
+
+import sys
+import json
+import codecs
+import asyncio
+import argparse
+import threading
+from time import time, perf_counter
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+HOST = "127.0.0.1"  # the local proxy listens on localhost only
+PORT = 8899
+CONTROL_HOST = "rotating-proxy"  # requests to 'http://rotating-proxy/...' are API calls
+ROTATION_MODES = ['request', 'count', 'sticky']
+ROTATE_EVERY = 10  # number of requests per upstream proxy (in 'count' mode)
+MAX_IDLE = 8  # max number of idle (pooled) connections per upstream proxy
+IDLE_TIMEOUT = 30  # close pooled connections that were idle for more than 30 seconds
+CONNECT_TIMEOUT = 10  # max time (in seconds) to connect to an upstream proxy
+MAX_ATTEMPTS = 3  # number of upstream proxies to try for a single request
+BUFFER_SIZE = 65536
+HOP_BY_HOP = {'proxy-connection', 'proxy-authorization', 'keep-alive'}  # headers that are not forwarded
+
+
+class UpstreamConnectionPool:
+
+    def __init__(self, max_idle=MAX_IDLE, idle_timeout=IDLE_TIMEOUT):
+        """
+        creates new instance of UpstreamConnectionPool Object - idle (keep-alive) connections per upstream proxy
+        :param max_idle: max number of idle connections per upstream proxy
+        :param idle_timeout: max time (in seconds) to keep an idle connection
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.idle = {}  # upstream proxy (IP:PORT) -> deque of (reader, writer, idle since)
+
+    async def get(self, upstream):
+        """
+        :param upstream: upstream proxy (IP:PORT)
+        :return: tuple (reader, writer, reused) - an idle connection, or a new one
+        """
+        connections = self.idle.get(upstream)
+        while connections:
+            reader, writer, idle_since = connections.pop()
+            if time() - idle_since < self.idle_timeout and not reader.at_eof() and not writer.is_closing():
+                return reader, writer, True
+            writer.close()
+        host, port = upstream.rsplit(":", 1)
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, int(port)), CONNECT_TIMEOUT)
+        return reader, writer, False
+
+    def put(self, upstream, reader, writer):
+        """
+        returns a connection (that can be reused) to the pool
+        :param upstream: upstream proxy (IP:PORT)
+        :return:
+        """
+        connections = self.idle.setdefault(upstream, deque())
+        if len(connections) < self.max_idle and not reader.at_eof():
+            connections.append((reader, writer, time()))
+        else:
+            writer.close()
+
+    def close(self):
+        """
+        closes all the idle connections
+        :return:
+        """
+        for connections in self.idle.values():
+            for reader, writer, idle_since in connections:
+                writer.close()
+        self.idle.clear()
+
+
+class RotatingProxy:
+
+    def __init__(self, upstreams=None, host=HOST, port=PORT, mode='request', every=ROTATE_EVERY,
+                 chooser=None, on_result=None):
+        """
+        creates new instance of RotatingProxy Object
+        :param upstreams: list of upstream proxies (IP:PORT strings), or None
+        :param host: the host that the local proxy listens on
+        :param port: the port that the local proxy listens on (0 - any free port)
+        :param mode: rotation mode - 'request', 'count' or 'sticky'
+        :param every: number of requests per upstream proxy (in 'count' mode)
+        :param chooser: function that returns the next upstream proxy (instead of round robin on 'upstreams'),
+        or None
+        :param on_result: function (upstream, ok, latency) that is called after each use of an upstream proxy,
+        or None
+        """
+        if mode not in ROTATION_MODES:
+            raise ValueError("unknown rotation mode: %s" % mode)
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.every = every
+        self.chooser = chooser
+        self.on_result = on_result
+        self.lock = threading.Lock()  # rotation state is changed from the API (other threads)
+        self.upstreams = list(upstreams or [])
+        self.next_index = 0
+        self.current = None  # the current upstream proxy
+        self.requests_count = 0  # number of requests with the current upstream proxy
+        self.sessions = {}  # sticky session name -> upstream proxy
+        self.session = None  # the name of the active sticky session
+        self.tunnels = {}  # upstream proxy -> set of (upstream writer, client writer) of the open https tunnels
+        self.connection_pool = UpstreamConnectionPool()
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    @property
+    def address(self):
+        """
+        :return: the address of the local proxy (IP:PORT) - for the '--proxy-server' argument of a browser
+        """
+        return "%s:%d" % (self.host, self.port)
+
+    # ****************************************Rotation API*******************************************
+
+    def set_upstreams(self, upstreams):
+        """
+        replaces the list of upstream proxies
+        :param upstreams: list of upstream proxies (IP:PORT strings)
+        :return:
+        """
+        with self.lock:
+            self.upstreams = list(upstreams)
+            self.next_index = 0
+            self.current = None
+            self.sessions.clear()
+            self._close_tunnels()
+
+    def rotate(self):
+        """
+        switches to the next upstream proxy (of the active sticky session, if any)
+        :return: the new upstream proxy, or None (no upstream proxies)
+        """
+        with self.lock:
+            self.current = self._next_upstream()
+            self.requests_count = 0
+            if self.session is not None:
+                self.sessions[self.session] = self.current
+            self._close_tunnels(keep=self.current)
+            return self.current
+
+    def set_session(self, name):
+        """
+        activates a sticky session - requests use the upstream proxy of the session, until 'rotate' is called
+        :param name: the name of the session (string), or None - to leave the sticky session
+        :return: the upstream proxy of the session
+        """
+        with self.lock:
+            self.session = name
+            if name is not None:
+                if name not in self.sessions:
+                    self.sessions[name] = self._next_upstream()
+                self.current = self.sessions[name]
+                self.requests_count = 0
+                self._close_tunnels(keep=self.current)
+            return self.current
+
+    def status(self):
+        """
+        :return: dict with the rotation state
+        """
+        with self.lock:
+            return {'mode': self.mode, 'current': self.current, 'session': self.session,
+                    'requests': self.requests_count, 'upstreams': len(self.upstreams)}
+
+    def _next_upstream(self):
+        """
+        :return: the next upstream proxy (from 'chooser', or round robin), or None
+        """
+        if self.chooser is not None:
+            return self.chooser()
+        if not self.upstreams:
+            return None
+        upstream = self.upstreams[self.next_index % len(self.upstreams)]
+        self.next_index += 1
+        return upstream
+
+    def upstream_for_request(self):
+        """
+        :return: the upstream proxy for a new request (rotates by the rotation mode), or None - direct connection
+        """
+        with self.lock:
+            if self.current is None or self.mode == 'request' \
+                    or (self.mode == 'count' and self.session is None and self.requests_count >= self.every):
+                self.current = self._next_upstream()
+                self.requests_count = 0
+                if self.session is not None:
+                    self.sessions[self.session] = self.current
+                self._close_tunnels(keep=self.current)
+            self.requests_count += 1
+            return self.current
+
+    def _close_tunnels(self, keep=None):
+        """
+        closes the open tunnels of the upstream proxies other than 'keep' (called with the lock) -
+        the client reopens them through the current upstream proxy
+        :param keep: the upstream proxy that its tunnels stay open
+        :return:
+        """
+        for upstream in [upstream for upstream in self.tunnels if upstream != keep]:
+            for writers in self.tunnels.pop(upstream):
+                for writer in writers:
+                    self.loop.call_soon_threadsafe(writer.close)  # (the rotation might be called from other threads)
+
+    def _add_tunnel(self, upstream, writers):
+        """
+        :param upstream: upstream proxy (IP:PORT), or None - direct connection
+        :param writers: tuple (upstream writer, client writer) of an open tunnel
+        :return: True - if the tunnel is of the current upstream proxy, or False (it was switched meanwhile)
+        """
+        with self.lock:
+            if upstream != self.current and self.mode != 'request':
+                return False
+            self.tunnels.setdefault(upstream, set()).add(writers)
+            return True
+
+    def _remove_tunnel(self, upstream, writers):
+        """
+        :param upstream: upstream proxy (IP:PORT), or None - direct connection
+        :param writers: tuple (upstream writer, client writer) of a closed tunnel
+        :return:
+        """
+        with self.lock:
+            tunnels = self.tunnels.get(upstream)
+            if tunnels is not None:
+                tunnels.discard(writers)
+                if not tunnels:
+                    del self.tunnels[upstream]
+
+    def _report(self, upstream, ok, latency=None):
+        """
+        reports the result of a use of an upstream proxy (and rotates away from a failing one)
+        :return:
+        """
+        if upstream is None:
+            return
+        if self.on_result is not None:
+            self.on_result(upstream, ok, latency)
+        if not ok:
+            with self.lock:
+                if self.current == upstream:
+                    self.current = None  # the next request takes another upstream proxy
+
+    # ****************************************Server*******************************************
+
+    def start(self):
+        """
+        starts the local proxy in a background thread
+        :return: the address of the local proxy (IP:PORT)
+        """
+        ready = threading.Event()
+        self.loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.server = self.loop.run_until_complete(asyncio.start_server(self.handle_client, self.host,
+                                                                            self.port))
+            self.port = self.server.sockets[0].getsockname()[1]  # the actual port (if port was 0)
+            ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="rotating-proxy", daemon=True)
+        self.thread.start()
+        ready.wait()
+        return self.address
+
+    def stop(self):
+        """
+        stops the local proxy
+        :return:
+        """
+        if self.loop is not None:
+            async def shutdown():
+                self.server.close()
+                await self.server.wait_closed()
+                # (the connections of the clients - like open tunnels)
+                tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self.connection_pool.close()
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+
+    async def handle_client(self, reader, writer):
+        """
+        handles a connection from a client (browser) - one request after another (keep-alive)
+        :return:
+        """
+        try:
+            while True:
+                head = await read_head(reader)
+                if head is None:
+                    break
+                start_line, headers = head
+                method, target, version = split_request_line(start_line)
+                if method == "CONNECT":
+                    await self.tunnel(target, reader, writer)
+                    break
+                if urlsplit(target).hostname == CONTROL_HOST:
+                    await self.handle_api(target, writer)
+                    continue
+                if not await self.forward(method, target, version, headers, reader, writer):
+                    break
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_api(self, target, writer):
+        """
+        handles an API call - '/rotate', '/session?name=...' (no name - leave the session) or '/status'
+        :return:
+        """
+        parts = urlsplit(target)
+        if parts.path == "/rotate":
+            self.rotate()
+        elif parts.path == "/session":
+            self.set_session(parse_qs(parts.query).get("name", [None])[0])
+        elif parts.path != "/status":
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return
+        body = json.dumps(self.status()).encode()
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s"
+                     % (len(body), body))
+        await writer.drain()
+
+    async def tunnel(self, target, client_reader, client_writer):
+        """
+        opens an https tunnel (HTTP CONNECT) to the target through an upstream proxy, and pipes the data
+        (until one of the sides closes the tunnel, or the upstream proxy is switched)
+        :param target: 'host:port' of the target
+        :return:
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            upstream = self.upstream_for_request()
+            start = perf_counter()
+            reused = False
+            upstream_writer = None
+            try:
+                try:
+                    if upstream is None:  # direct connection
+                        host, port = target.rsplit(":", 1)
+                        upstream_reader, upstream_writer = await asyncio.wait_for(
+                            asyncio.open_connection(host, int(port)), CONNECT_TIMEOUT)
+                    else:
+                        upstream_reader, upstream_writer, reused = await self.connection_pool.get(upstream)
+                        upstream_writer.write(("CONNECT %s HTTP/1.1\r\nHost: %s\r\n\r\n" % (target, target))
+                                              .encode())
+                        await upstream_writer.drain()
+                        head = await asyncio.wait_for(read_head(upstream_reader), CONNECT_TIMEOUT)
+                        if head is None and reused:  # a pooled connection might just be stale - not a failure
+                            continue
+                        if head is None or split_status_line(head[0]) != 200:
+                            self._report(upstream, False)
+                            continue
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                    if not reused:  # a pooled connection might just be stale - not a failure
+                        self._report(upstream, False)
+                    if upstream is None:
+                        break
+                    continue
+                writers = (upstream_writer, client_writer)
+                if not self._add_tunnel(upstream, writers):
+                    continue  # (the upstream proxy was switched meanwhile - a tunnel through the new one)
+                try:
+                    self._report(upstream, True, perf_counter() - start)
+                    client_writer.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+                    await client_writer.drain()
+                    await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+                finally:
+                    self._remove_tunnel(upstream, writers)
+                return
+            finally:
+                if upstream_writer is not None:
+                    upstream_writer.close()  # (a failed attempt, or a closed tunnel)
+        client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+        await client_writer.drain()
+
+    async def forward(self, method, target, version, headers, client_reader, client_writer):
+        """
+        forwards a plain http request to an upstream proxy (or directly to the target), and relays the response
+        :return: True - if the client connection can be reused, or False
+        """
+        headers = [(name, value) for name, value in headers if name.lower() not in HOP_BY_HOP]
+        client_keep_alive = keep_alive(version, headers)
+        body = await read_body(client_reader, headers)  # the request body is read once (for retries)
+
+        for attempt in range(MAX_ATTEMPTS):
+            upstream = self.upstream_for_request()
+            start = perf_counter()
+            parts = urlsplit(target)
+            reused = False
+            upstream_writer = None
+            try:
+                try:
+                    if upstream is None:  # direct connection - origin-form request line
+                        upstream_reader, upstream_writer = await asyncio.wait_for(
+                            asyncio.open_connection(parts.hostname, parts.port or 80), CONNECT_TIMEOUT)
+                        request_target = (parts.path or "/") + ("?" + parts.query if parts.query else "")
+                    else:
+                        upstream_reader, upstream_writer, reused = await self.connection_pool.get(upstream)
+                        request_target = target
+                    upstream_writer.write(build_head("%s %s HTTP/1.1" % (method, request_target), headers) + body)
+                    await upstream_writer.drain()
+                    head = await asyncio.wait_for(read_head(upstream_reader), CONNECT_TIMEOUT)
+                    if head is None:
+                        raise ConnectionResetError("upstream closed the connection")
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                    if not reused:  # a pooled connection might just be stale - not a failure
+                        self._report(upstream, False)
+                    continue
+
+                status_line, response_headers = head
+                status = split_status_line(status_line)
+                client_writer.write(build_head(status_line, response_headers))
+                # relay the response body (the end of the body tells if the upstream connection can be reused)
+                upstream_reusable = await relay_body(upstream_reader, client_writer, response_headers,
+                                                     no_body=method == "HEAD" or status in (204, 304)
+                                                     or 100 <= status < 200)
+                await client_writer.drain()
+                self._report(upstream, True, perf_counter() - start)
+                if upstream is not None and upstream_reusable and keep_alive(status_line.split(" ", 1)[0],
+                                                                             response_headers):
+                    self.connection_pool.put(upstream, upstream_reader, upstream_writer)
+                    upstream_writer = None  # (pooled - stays open)
+                return client_keep_alive and upstream_reusable
+            finally:
+                if upstream_writer is not None:
+                    upstream_writer.close()  # (a failed attempt, or a connection that can't be reused)
+        client_writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+        await client_writer.drain()
+        return client_keep_alive
+
+
+async def read_head(reader):
+    """
+    reads the start line and the headers of an HTTP message
+    :param reader: asyncio.StreamReader
+    :return: tuple (start line, list of (name, value) tuples), or None - the connection was closed
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise asyncio.IncompleteReadError(line, None)
+        if line in (b"\r\n", b"\n"):
+            break
+        name, value = line.decode('latin-1').split(":", 1)
+        headers.append((name.strip(), value.strip()))
+    return start_line.decode('latin-1').strip(), headers
+
+
+async def read_body(reader, headers):
+    """
+    reads the whole body of a request (by 'Content-Length' or 'Transfer-Encoding: chunked')
+    :return: bytes (in the same encoding - chunked bodies stay chunked)
+    """
+    if header_value(headers, "transfer-encoding").lower().endswith("chunked"):
+        data = b""
+        while True:
+            size_line = await reader.readline()
+            data += size_line
+            size = int(size_line.split(b";")[0].strip() or b"0", 16)
+            data += await reader.readexactly(size + 2)  # the chunk & the CRLF after it
+            if size == 0:
+                if not data.endswith(b"\r\n\r\n"):  # trailer headers
+                    while True:
+                        line = await reader.readline()
+                        data += line
+                        if line in (b"\r\n", b"\n", b""):
+                            break
+                return data
+    length = header_value(headers, "content-length")
+    return await reader.readexactly(int(length)) if length else b""
+
+
+async def relay_body(reader, writer, headers, no_body=False):
+    """
+    relays the body of a response from reader to writer
+    :return: True - if the end of the body is known (the connection can be reused), or False
+    """
+    if no_body:
+        return True
+    if header_value(headers, "transfer-encoding").lower().endswith("chunked"):
+        writer.write(await read_body(reader, headers))
+        return True
+    length = header_value(headers, "content-length")
+    if length:
+        remaining = int(length)
+        while remaining:
+            chunk = await reader.read(min(remaining, BUFFER_SIZE))
+            if not chunk:
+                return False
+            writer.write(chunk)
+            await writer.drain()
+            remaining -= len(chunk)
+        return True
+    # the body ends when the connection is closed
+    while True:
+        chunk = await reader.read(BUFFER_SIZE)
+        if not chunk:
+            return False
+        writer.write(chunk)
+        await writer.drain()
+
+
+async def pipe(reader, writer):
+    """
+    copies data from reader to writer, until the connection is closed
+    :return:
+    """
+    try:
+        while True:
+            chunk = await reader.read(BUFFER_SIZE)
+            if not chunk:
+                break
+            writer.write(chunk)
+            await writer.drain()
+    except OSError:
+        pass
+    finally:
+        writer.close()
+
+
+def build_head(start_line, headers):
+    """
+    :return: bytes - the start line and the headers of an HTTP message
+    """
+    return ("\r\n".join([start_line] + ["%s: %s" % (name, value) for name, value in headers]) + "\r\n\r\n") \
+        .encode('latin-1')
+
+
+def header_value(headers, name):
+    """
+    :param headers: list of (name, value) tuples
+    :param name: header name (lowercase)
+    :return: the value of the header (string), or an empty string
+    """
+    for header_name, value in headers:
+        if header_name.lower() == name:
+            return value
+    return ""
+
+
+def keep_alive(version, headers):
+    """
+    :param version: HTTP version (like 'HTTP/1.1')
+    :param headers: list of (name, value) tuples
+    :return: True - if the connection stays open after the message, or False
+    """
+    connection = header_value(headers, "connection").lower()
+    if version == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+def split_request_line(start_line):
+    """
+    :return: tuple (method, target, version)
+    """
+    method, target, version = start_line.split(" ", 2)
+    return method.upper(), target, version
+
+
+def split_status_line(start_line):
+    """
+    :return: status code (int)
+    """
+    return int(start_line.split(" ", 2)[1])
+
+
+def main():
+    """
+    The main function - runs the local proxy until the user hits Ctrl+C
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILE", dest="file_name", type=str,
+                        help="Enter a path to a text file with upstream proxies (IP:PORT on each line)")
+    parser.add_argument("-p", "--PORT", dest="port", type=int, default=PORT)
+    parser.add_argument("-m", "--MODE", dest="mode", type=str, choices=ROTATION_MODES, default='request')
+    parser.add_argument("-n", "--EVERY", dest="every", type=int, default=ROTATE_EVERY)
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    upstreams = []
+    if args.file_name:
+        with codecs.open(args.file_name, 'r', encoding='utf-8') as in_f:
+            upstreams = [line.strip() for line in in_f if line.strip()]
+
+    rotating_proxy = RotatingProxy(upstreams, port=args.port, mode=args.mode, every=args.every)
+    print("listening on %s (%d upstream proxies, '%s' rotation)" % (rotating_proxy.start(), len(upstreams),
+                                                                   args.mode))
+    try:
+        rotating_proxy.thread.join()
+    except KeyboardInterrupt:
+        rotating_proxy.stop()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,38 +5,86 @@
 responses using the requests library and parsed HTML using BeautifulSoup)
 
 The script scrapes artists' data on https://www.lyrics.com/, and stores text (bio and albums) 
-from an HTML page source of each artist's page in file (text&csv files)."""
+from an HTML page source of each artist's page in file (text&csv files).
+
+In the concurrent mode ('-c'), many artists are scraped at the same time by a pool of threads - the search
+request is built directly ('serp.php?st=<artist>', without fetching and submitting the form, and without going
+back in the browser history), and all the threads share one requests Session (a pool of keep-alive connections),
+with a limit on the number of requests to the same host at the same time:
+python your\\path\\to\\scrape_artist_data.py -c -w 8 -kw "Lady Gaga" "Michael Jackson"
+
+With '-o', the albums of all the artists are streamed to one dataset of (artist, album, track_no, song) rows
+(CSV/TSV, JSON Lines or Parquet - by the extension, see 'albums_export'):
+python your\\path\\to\\scrape_artist_data.py -c -o "albums.parquet" -kw "Lady Gaga" "Michael Jackson"
+"""
 
 import sys
 import os
 import codecs
 import argparse
-import pandas as pd
+import threading
+import requests
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote_plus, urljoin
+from requests.adapters import HTTPAdapter
 from robobrowser import RoboBrowser
 from bs4 import BeautifulSoup
-from time import sleep
+from pacing import PACER, host_of
+from albums_export import AlbumsExporter, iter_album_rows
 
 __email__ = "knifef@protonmail.com"
 
 BASE_URL = "https://www.lyrics.com/"
+SEARCH_URL = BASE_URL + "serp.php?st=%s"  # the URL of the search results (of a keyword)
 ARTISTS_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP", "artists")
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 ' \
+             '(KHTML, like Gecko) Chrome/57.0.2987.133 Safari/537.36'
+# links to artists' pages (in search results - the value is quoted, a '/' is not allowed in a bare CSS value)
+ARTIST_LINKS = 'body p[class~=serp-flat-list] a[href^="artist/"]'
+WORKERS = 8  # number of threads (artists at the same time) in the concurrent mode
+PER_HOST = 4  # max number of requests to the same host at the same time
+TIMEOUT = 10  # timeout (seconds) of a request
+
 
+class HostLimiter:
+
+    def __init__(self, per_host=PER_HOST):
+        """
+        creates new instance of HostLimiter Object - limits the number of requests to the same host at the same time
+        :param per_host: max number of requests to the same host at the same time
+        """
+        self.per_host = per_host
+        self.slots = {}  # host --> BoundedSemaphore
+        self.lock = threading.Lock()
 
-def scrape_bio_and_albums(keywords):
+    def slot(self, target):
+        """
+        :param target: URL or host name (string)
+        :return: the semaphore of the host (use it with 'with')
+        """
+        host = host_of(target)
+        with self.lock:
+            if host not in self.slots:
+                self.slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self.slots[host]
+
+
+def scrape_bio_and_albums(keywords, exporter=None):
     """
     scrapes artists' data on https://www.lyrics.com/, and stores text (bio and albums)
     from an HTML page source of each artist's page in file (text&csv files).
     :param keywords: list of keywords that should represent artists' names (list)
+    :param exporter: AlbumsExporter object (one dataset of the albums of all the artists),
+    or None - a csv file per artist
     :return:
     """
     if keywords and isinstance(keywords, list):
 
         # builds new object of RoboBrowser with given params
-        browser = RoboBrowser(parser='html.parser',
-                              user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
-                                         '(KHTML, like Gecko) Chrome/57.0.2987.133 Safari/537.36',
-                              history=True, timeout=10)
+        browser = RoboBrowser(parser='html.parser', user_agent=USER_AGENT, history=True, timeout=TIMEOUT)
         # Open a URL (using 'RoboBrowser' library).
+        PACER.wait(BASE_URL)
         browser.open(BASE_URL)
 
         for keyword in keywords:
@@ -48,13 +96,15 @@ def scrape_bio_and_albums(keywords):
                 # trying to search keyword on 'lyrics.com' (using RoboBrowser's methods to handle forms)
                 form = browser.get_form(id='search-frm')  # Find form by ID 'search-frm'
                 form['st'].value = keyword  # sets query value 'st' with given keyword
+                PACER.wait(BASE_URL)  # wait for the turn of the host (adapts to its responses)
                 browser.submit_form(form)  # Submit a form - to search given keyword
+                report_response(browser.response)
 
                 # check if the url is changed (after searching a keyword)
                 if old_url != browser.url:
 
                     # select required <a> tags, using CSS Selectors (see on BeautifulSoup's documentation)
-                    a_tags = browser.select('body p[class~=serp-flat-list] a[href^=artist/]')
+                    a_tags = browser.select(ARTIST_LINKS)
 
                     if a_tags:
                         # browser.follow_link(a_tags[0])
@@ -64,7 +114,9 @@ def scrape_bio_and_albums(keywords):
                         first_artist_url = a_tags[0]['href'].replace("artist", BASE_URL+"artist")
 
                         # Open URL (should get url of the first suggested artist's page in results)
+                        PACER.wait(BASE_URL)
                         browser.open(first_artist_url)
+                        report_response(browser.response)
 
                         # parse response content (bs4 obj), using HTML parser specified by the browser
                         soup = browser.parsed
@@ -76,12 +128,110 @@ def scrape_bio_and_albums(keywords):
                                 save_source(keyword+" - bio", artist_bio_tag.get_text(),
                                             dir_path=os.path.join(ARTISTS_PATH, keyword))
                                 # parse albums&songs from html tables, and save the data to a csv file
-                                albums_to_csv(soup, keyword+" - albums", dir_path=os.path.join(ARTISTS_PATH, keyword))
+                                save_albums(soup, keyword, exporter)
 
                         browser.back()  # Go back in browser history.
                     browser.back()  # Go back in browser history.
 
 
+def scrape_concurrently(keywords, workers=WORKERS, per_host=PER_HOST, exporter=None):
+    """
+    scrapes artists' data concurrently (a pool of threads, that share one pool of keep-alive connections)
+    :param keywords: list of keywords that should represent artists' names (list)
+    :param workers: number of threads (artists at the same time)
+    :param per_host: max number of requests to the same host at the same time
+    :param exporter: AlbumsExporter object (one dataset of the albums of all the artists), or None
+    :return: dict - keyword --> True (the artist's data was saved), or False
+    """
+    # (each artist once - a duplicate keyword would be scraped twice, and collapse into one result)
+    keywords = list(dict.fromkeys(keyword for keyword in keywords or [] if keyword and len(keyword) > 1))
+    session = new_session(pool_size=per_host)
+    limiter = HostLimiter(per_host)
+    # (a burst of requests is allowed - up to the per-host limit - and the pacing still adapts to the responses)
+    PACER.configure(BASE_URL, delay=0.25, min_delay=0.1, max_delay=30.0, burst=per_host)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(zip(keywords, executor.map(lambda keyword: scrape_artist(session, limiter, keyword,
+                                                                                     exporter), keywords)))
+    finally:
+        session.close()
+    return results
+
+
+def new_session(pool_size=PER_HOST):
+    """
+    :param pool_size: max number of keep-alive connections per host
+    :return: requests.Session (with a pool of keep-alive connections, shared by the threads)
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def fetch(session, limiter, url):
+    """
+    gets a page (waits for a free slot of the host, and for its turn - and adjusts its pacing by the response)
+    :param session: requests.Session
+    :param limiter: HostLimiter object
+    :param url: URL (string)
+    :return: requests.Response, or None - if the request failed
+    """
+    with limiter.slot(url):
+        PACER.wait(url)
+        try:
+            response = session.get(url, timeout=TIMEOUT)
+        except requests.RequestException as e:
+            PACER.report(url, ok=False)
+            print("failed to get %s --> %s" % (url, e))
+            return None
+    report_response(response)
+    return response if response.ok else None
+
+
+def scrape_artist(session, limiter, keyword, exporter=None):
+    """
+    searches an artist (a direct request of the search results), and saves the data of the first artist
+    :param session: requests.Session
+    :param limiter: HostLimiter object
+    :param keyword: keyword that should represent an artist's name (string)
+    :param exporter: AlbumsExporter object, or None - a csv file per artist
+    :return: True - if the artist's data was saved, or False (not found, or failed)
+    """
+    try:
+        response = fetch(session, limiter, SEARCH_URL % quote_plus(keyword))
+        a_tags = BeautifulSoup(response.text, 'html.parser').select(ARTIST_LINKS) if response is not None else None
+        if not a_tags:
+            return False
+        # the first suggested artist's page (relative to the final URL of the search - after redirects)
+        response = fetch(session, limiter, urljoin(response.url, a_tags[0]['href']))
+        if response is None:
+            return False
+        soup = BeautifulSoup(response.text, 'html.parser')
+        artist_bio_tag = soup.find(class_='artist-bio')  # find tag by class
+        if not artist_bio_tag:
+            return False
+        save_source(keyword+" - bio", artist_bio_tag.get_text(), dir_path=os.path.join(ARTISTS_PATH, keyword))
+        save_albums(soup, keyword, exporter)
+        print("<-- saved --> ", keyword)
+        return True
+    except Exception as e:  # (like an I/O error of the files, or an unexpected page - the other artists go on)
+        print("failed to scrape %s --> %s" % (keyword, e))
+        return False
+
+
+def report_response(response):
+    """
+    adjusts the pacing of the host by a response (a slow response, an error or a block page slows it down)
+    :param response: requests.Response object (of the browser)
+    :return:
+    """
+    if response is not None:
+        PACER.report(BASE_URL, ok=response.ok, latency=response.elapsed.total_seconds(), text=response.text)
+
+
 def save_source(file_name, res, dir_path=ARTISTS_PATH):
         """
         save page source data to a text file
@@ -92,7 +242,6 @@ def save_source(file_name, res, dir_path=ARTISTS_PATH):
         """
         if dir_path:
             if create_dir(dir_path):  # Test whether a path exists, and create dirs in path (if not exist)
-                sleep(1)  # delay
                 if file_name and res:
                     if not file_name.endswith(".txt"):
                         file_name += ".txt"
@@ -102,53 +251,46 @@ def save_source(file_name, res, dir_path=ARTISTS_PATH):
                     out_f.close()
 
 
-def albums_to_csv(soup_obj, file_name, dir_path=ARTISTS_PATH):
+def save_albums(soup_obj, keyword, exporter=None):
+    """
+    saves the albums&songs of an artist's page - to the dataset of all the artists, or to a csv file of the artist
+    :param soup_obj: Beautifulsoup obj
+    :param keyword: keyword that represents the artist's name (string)
+    :param exporter: AlbumsExporter object, or None - a csv file per artist
+    :return:
+    """
+    if exporter is not None:
+        exporter.write_rows(iter_album_rows(soup_obj, keyword))  # (streamed - row by row)
+    else:
+        albums_to_csv(soup_obj, keyword+" - albums", dir_path=os.path.join(ARTISTS_PATH, keyword), artist=keyword)
+
+
+def albums_to_csv(soup_obj, file_name, dir_path=ARTISTS_PATH, artist=None):
     """
-    trying to parse albums&songs from html tables, and save the data to a csv file (using pandas)
+    trying to parse albums&songs from html tables, and save the data to a csv file
+    (tab separated rows of artist, album, track_no and song - streamed, without pandas)
     :param soup_obj: Beautifulsoup obj
     :param file_name: the name for output file
     :param dir_path: path to dir to save the file
+    :param artist: the name of the artist, or None - the file name
     :return:
     """
     if soup_obj and isinstance(soup_obj, BeautifulSoup) and dir_path:
 
-        albums_elems = soup_obj.find_all(class_='clearfix')  # find tags by class
-        if albums_elems:
-            raw_data = {}
-            for album_elem in albums_elems:
-
-                album_title_elem = album_elem.find(class_='artist-album-label')  # find tag by class
-                if album_title_elem:
-                    album_title = album_title_elem.get_text()  # album title (str)
-                    if album_title:
-                        # initialize dict key (album's name) with an empty list
-                        raw_data[album_title] = []
-                        # select tr tags from table's body
-                        song_elems = album_elem.select('table tbody tr')
-                        for tr in song_elems:
-                            if tr:
-                                song_name_elem = tr.find('td')  # find first td elems
-                                if song_name_elem:
-                                    song_name = song_name_elem.get_text()  # text within tag
-                                    if song_name:
-                                        raw_data[album_title].append(song_name)  # append to list
-
-            if raw_data:
-                # new DataFrame from dict, and Transpose index and columns.
-                df = pd.DataFrame.from_dict(raw_data, orient='index').transpose()
-
-                if not df.empty:  # check if DataFrame is not empty
-
-                    if file_name.endswith(".csv"):  # str ends with ".csv"
-                        # Return a copy of the string with all occurrences of substring old replaced by new
-                        file_name = file_name.replace(".csv", "")
-
-                    # Test whether a path exists, and create dirs in path (if not exist)
-                    if create_dir(os.path.join(dir_path)):
-                        sleep(1)  # delay
-                        # save Pandas DataFrame to a CSV file
-                        df.to_csv(os.path.join(dir_path, file_name+".csv"), sep='\t',
-                                  encoding='utf-8-sig', index=False)
+        if file_name.endswith(".csv"):  # str ends with ".csv"
+            # Return a copy of the string with all occurrences of substring old replaced by new
+            file_name = file_name.replace(".csv", "")
+
+        rows = iter_album_rows(soup_obj, artist or file_name)
+        first_row = next(rows, None)
+        # Test whether a path exists, and create dirs in path (if not exist)
+        if first_row and create_dir(os.path.join(dir_path)):
+            file_path = os.path.join(dir_path, file_name+".csv")
+            if os.path.isfile(file_path):
+                os.remove(file_path)  # (a new file for each scrape of the artist)
+            # (utf-8-sig - Excel shows the non-ASCII names of the songs correctly)
+            with AlbumsExporter(file_path, fmt="tsv", encoding='utf-8-sig') as exporter:
+                exporter.write_rows(chain([first_row], rows))
 
 
 def create_dir(path):
@@ -175,10 +317,31 @@ if __name__ == '__main__':
         # Adding argument actions
         parser.add_argument("-kw", "--KEYWORD", dest="given_key_words", type=str, nargs='*',
                             help="Enter keywords (artists), to search them on 'https://www.lyrics.com/'")
+        parser.add_argument("-c", "--CONCURRENT", dest="concurrent", action="store_true",
+                            help="Scrape many artists at the same time (a pool of threads)")
+        parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                            help="Enter the number of artists to scrape at the same time (the concurrent mode)")
+        parser.add_argument("-p", "--PER-HOST", dest="per_host", type=int, default=PER_HOST,
+                            help="Enter the max number of requests to the same host at the same time")
+        parser.add_argument("-o", "--OUTPUT", dest="out_path", type=str, default=None,
+                            help="Enter a path to one dataset of the albums of all the artists "
+                                 "(.csv, .tsv, .jsonl or .parquet)")
         args = parser.parse_args()  # Command line argument parsing methods
         given_key_words = args.given_key_words
     else:
         given_key_words = ['Lady Gaga', 'Michael Jackson']
+        args = None
 
-    # scrapes artists' data on https://www.lyrics.com/
-    scrape_bio_and_albums(given_key_words)
+    albums_exporter = AlbumsExporter(args.out_path) if args is not None and args.out_path else None
+    try:
+        # scrapes artists' data on https://www.lyrics.com/
+        if args is not None and args.concurrent:
+            results = scrape_concurrently(given_key_words, workers=args.workers, per_host=args.per_host,
+                                          exporter=albums_exporter)
+            print("%d of %d artists saved" % (sum(results.values()), len(results)))
+        else:
+            scrape_bio_and_albums(given_key_words, exporter=albums_exporter)
+    finally:
+        if albums_exporter is not None:
+            albums_exporter.close()
+            print("%d album rows --> %s" % (albums_exporter.count, args.out_path))
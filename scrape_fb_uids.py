@@ -14,12 +14,26 @@ The script is using - Selenium Automation Tool (WebDriver) to scrape the web,
 import re
 import os
 import codecs
+from itertools import chain
 from selenium import webdriver
+from selenium.webdriver import DesiredCapabilities
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.expected_conditions import staleness_of
 from selenium.common.exceptions import *
-from time import sleep
+from time import sleep, perf_counter
 from bs4 import BeautifulSoup
 from random import randint
+from proxy_validator import ranked_proxies
+from proxy_pool import ProxyPool, parse_proxy_row
+from driver_pool import ChromeDriverPool
+from rotating_proxy import RotatingProxy
+from proxy_rotation import RotationService
+from username_stream import split_users
+from uid_cache import UidCache
+from uid_journal import UidJournal
+from network_capture import enable_performance_log, clear_network_log, wait_for_response
+from pacing import PACER
+from page_waits import wait_until, all_of, dom_ready
 
 __author__ = "KnifeF"
 __license__ = "MIT"
@@ -33,6 +47,13 @@ CHROME_DRIVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'c
 PREFERENCES_PATH = os.path.join(os.environ["HOMEPATH"], r'AppData\Local\Google\Chrome\User Data\Default')
 PROXIES_SITE = "https://free-proxy-list.net/"  # proxies' website URL
 FIND_FBID = "https://findmyfbid.com/"  # URL of a website that is used to convert fb usernames to uids
+FIND_FBID_DOMAIN = "findmyfbid.com"
+FIND_FBID_TITLE = "Find your Facebook ID"  # appears on the pages of "findmyfbid" (the search box)
+# appear on a result page of "findmyfbid" when the username has no uid (lowercase)
+NOT_FOUND_MARKERS = ("failed to find", "could not find", "couldn't find", "no facebook id", "user not found")
+# lookups on "findmyfbid" start 10 seconds apart (like the fixed delays before), and adapt between 2-60 seconds
+PACER.configure(FIND_FBID, delay=10.0, min_delay=2.0, max_delay=60.0)
+RESULT_TIMEOUT = 30  # max time (seconds) to wait for the result page of a username
 
 # ****************************************Folder paths for saving files*******************************************
 DESKTOP_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP")
@@ -40,18 +61,39 @@ DESKTOP_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP")
 
 class FbidScraper:
 
-    def __init__(self, f_path):
+    def __init__(self, f_path=None, proxy_pool=None, driver_pool=None, rotating_proxy=None, rotation=None,
+                 uid_cache=None, journal=None, capture_network=False):
         """
         creates new instance of FbidScraper Object
-        :param f_path: path to a file (string)
+        :param f_path: path to a file (string), or None - no usernames (a worker that gets its usernames in shards)
+        :param proxy_pool: ProxyPool object to store the scraped proxies in (with their history), or None
+        :param driver_pool: ChromeDriverPool object to take warm browsers from, or None
+        :param rotating_proxy: a running RotatingProxy object (the local proxy that switches the upstream
+        proxies, so the browser is not restarted), or None
+        :param rotation: RotationService/RotationClient object to draw proxies from (weighted by latency),
+        or None - for random choice from 'self.proxies'
+        :param uid_cache: UidCache object (username --> uid resolutions of previous runs), or None
+        :param journal: UidJournal object (checkpoint/resume of 'uids_from_users'), or None
+        :param capture_network: True - to take the results from the network responses of the browser
+        (performance log), as soon as they arrive, or False - to wait a fixed time and scan 'page_source'
         """
         # build the scraper object
+        self.proxy_pool = proxy_pool  # persistent pool of proxies (or None)
+        self.driver_pool = driver_pool  # pool of warm browsers (or None)
+        self.rotating_proxy = rotating_proxy  # local rotating proxy (or None)
+        self.rotation = rotation  # rotation service of proxies (or None)
+        self.uid_cache = uid_cache  # persistent cache of resolved usernames (or None)
+        self.journal = journal  # journal of the usernames that are done (or None)
+        self.capture_network = capture_network  # take the results from the network responses
         self.facebook_users = []  # list of facebook usernames
-        self.facebook_uids = []  # list of facebook uids
+        self.numeric_uids = []  # uids that are already numeric in the input (a lazy stream of the file)
+        self.facebook_uids = []  # list of facebook uids (resolved from usernames)
         self.driver = None  # the WebDriver
         self.proxies = []  # list of proxies
-        # filter users from text file, and fill data in 'self.facebook_users' & 'self.facebook_uids'
-        self.filter_users(f_path)
+        self.current_proxy = None  # the proxy that the WebDriver uses (or None)
+        # filter users from text file, and fill data in 'self.facebook_users' & 'self.numeric_uids'
+        if f_path is not None:
+            self.filter_users(f_path)
 
     def set_chrome_driver(self, activate_proxy=False):
         """
@@ -59,12 +101,29 @@ class FbidScraper:
         :param activate_proxy: True - to add proxy as argument in ChromeOptions, or False.
         :return:
         """
+        if self.driver_pool is not None and (not activate_proxy or self.rotating_proxy is not None):
+            # (with a rotating proxy - the browsers of the pool already use the local proxy)
+            self.current_proxy = self.rotating_proxy.current if activate_proxy else None
+            self.driver = self.driver_pool.acquire()  # take a warm browser from the pool (no launch, no delay)
+            return
+
         options = webdriver.ChromeOptions()
         options.add_argument("--incognito")  # incognito mode in chrome without using 'User Data'
         options.add_experimental_option("prefs", PREFERENCES)  # option that disables JavaScript in chrome
         options.add_argument(WITHOUT_EXTENSIONS)  # disable extensions in chrome
 
-        if activate_proxy:
+        self.current_proxy = None
+        if activate_proxy and self.rotating_proxy is not None:
+            # the local proxy switches the upstream proxies (the browser is never restarted to switch proxies)
+            options.add_argument('--proxy-server=%s' % self.rotating_proxy.address)
+            self.current_proxy = self.rotating_proxy.current
+        elif activate_proxy and self.rotation is not None:
+            rnd_proxy = self.rotation.draw_proxy()  # faster & healthier proxies are drawn more often
+            if rnd_proxy:
+                options.add_argument('--proxy-server=%s' % rnd_proxy)  # adds proxy as argument of ChromeOptions
+                print("Chosen Proxy --> "+rnd_proxy)
+                self.current_proxy = rnd_proxy
+        elif activate_proxy:
             if self.proxies:
                 if len(self.proxies) > 1:
                     rnd_proxy = self.proxies[randint(0, len(self.proxies)-1)]  # random proxy from list
@@ -72,10 +131,17 @@ class FbidScraper:
                     rnd_proxy = self.proxies[0]
                 options.add_argument('--proxy-server=%s' % rnd_proxy)  # adds proxy as argument of ChromeOptions
                 print("Chosen Proxy --> "+rnd_proxy)
+                self.current_proxy = rnd_proxy
         sleep(5)
 
+        capabilities = None
+        if self.capture_network:
+            # log the network events of the browser (the responses are taken from the performance log)
+            capabilities = enable_performance_log(DesiredCapabilities.CHROME.copy())
+
         # creating object (webdriver.Chrome)
-        chrome_driver = webdriver.Chrome(executable_path=CHROME_DRIVER_PATH, chrome_options=options)
+        chrome_driver = webdriver.Chrome(executable_path=CHROME_DRIVER_PATH, chrome_options=options,
+                                         desired_capabilities=capabilities)
         chrome_driver.maximize_window()  # maximize window's size of the browser ('webdriver')
         chrome_driver.delete_all_cookies()  # deletes all stored cookies
         self.driver = chrome_driver
@@ -88,8 +154,11 @@ class FbidScraper:
         """
         # close the drivers and set the WebDriver value to 'None'
         if self.driver:
-            self.driver.delete_all_cookies()
-            self.driver.close()  # close WebDriver
+            if self.driver_pool is not None and self.driver_pool.owns(self.driver):
+                self.driver_pool.release(self.driver)  # return the browser to the pool (recycled, not closed)
+            else:
+                self.driver.delete_all_cookies()
+                self.driver.close()  # close WebDriver
             self.driver = None  # change value to None
         enable_js_preference()  # fix javascript to be enabled on chrome browser Preferences
 
@@ -112,8 +181,7 @@ class FbidScraper:
         :return:
         """
         if self.driver and self.facebook_users:
-            self.driver.get(PROXIES_SITE)
-            sleep(randint(5, 15))
+            PACER.get(self.driver, PROXIES_SITE)  # (waits for the turn of the host)
             source = self.driver.page_source  # Gets the source of the current page
 
             soup = BeautifulSoup(source, 'html.parser')  # new BeautifulSoup Obj
@@ -148,6 +216,10 @@ class FbidScraper:
                             # append the proxy to the list as string (proxy:port)
                             good_proxies.append(split_proxy_str[0]+":"+split_proxy_str[1])
 
+                            pool_row = parse_proxy_row(self.proxies[index])  # (proxy, country, anonymity, https)
+                            if self.proxy_pool is not None and pool_row:
+                                self.proxy_pool.add(*pool_row)  # keep the proxy (and its history) on disk
+
                 self.proxies = None
                 if good_proxies:  # found good proxies
                     self.proxies = good_proxies
@@ -156,96 +228,125 @@ class FbidScraper:
                 self.driver.delete_all_cookies()  # delete cookies
                 self.destroy_driver()  # destroy the webdriver
 
-    def filter_users(self, f_path):
+    def filter_users(self, f_path, capacity=None):
         """
-        filter profiles' usernames from text file. append the ids to facebook_uids list
+        filter profiles' usernames from text file (lazily - the file is streamed, not loaded to memory).
+        'self.facebook_users' becomes a stream of normalized usernames that need to be resolved,
+        and 'self.numeric_uids' a stream of numeric uids (or profile URLs with uids) - they're not kept in memory,
+        and are streamed to the output file ('save_uids').
         :param f_path: path to a file (string)
+        :param capacity: expected number of unique lines (the size of the seen-set of the duplicates),
+        or None - the number of lines of the file
         :return:
         """
 
         # users_file = os.path.join(DESKTOP_PATH, 'users_to_check.txt')
-        self.facebook_users = text_from_file(f_path)
-        if self.facebook_users:
-            print(self.facebook_users)
-            count = len(self.facebook_users)
-            index = 0
-            while index < count:
-                fb_user = self.facebook_users[index]
-                if fb_user:
-                    fb_user = self.facebook_users[index].replace(" ", "")
-
-                    # check is fb_user does not contain a proper username
-                    if (not fb_user) or ("profile.php?id=" in fb_user) or (fb_user.isdigit()):
-                        if fb_user.isdigit():  # the string is from digits only
-                            self.facebook_uids.append(fb_user)
-
-                        elif "profile.php?id=" in fb_user:  # a part from URL that is already includes the uid
-                            tmp_uid = fb_user.split("profile.php?id=")[1]
-                            if "&" in tmp_uid:
-                                tmp_uid = tmp_uid.split("&")[0]
-                            elif "?" in tmp_uid:
-                                tmp_uid = tmp_uid.split("?")[0]
-                            self.facebook_uids.append(tmp_uid)
-                        self.facebook_users.pop(index)  # pop index from list
-                        count -= 1
-                        index -= 1
-                    else:
-                        if "facebook.com/" in fb_user:  # given username might be within a facebook url
-
-                            # a list of the words in the string, using sep as the delimiter string
-                            split_address = fb_user.split("facebook.com/")
-                            fb_user = split_address[1]  # index 1 of the list
-
-                            # all occurrences of substring old replaced by new
-                            fb_user.replace("ref=br_rs", "")
-                            if "/" in fb_user:
-                                fb_user = fb_user.split("/")[0]
-                            elif "?" in fb_user:
-                                fb_user = fb_user.split("?")[0]
-                            elif "&" in fb_user:
-                                fb_user = fb_user.split("&")[0]
-                        self.facebook_users[index] = fb_user
-                else:
-                    self.facebook_users.pop(index)  # pop index from list
-                    index -= 1
-                index += 1
+        # two lazy streams (duplicates are dropped)
+        self.numeric_uids, self.facebook_users = split_users(f_path, capacity=capacity)
+
+    def save_uids(self, f_path=os.path.join(DESKTOP_PATH, "facebook_uids.txt")):
+        """
+        saves the uids to a text file - the numeric uids of the input (streamed from the input file),
+        and the uids that were resolved
+        :param f_path: path to the output file (string)
+        :return: True - if there were uids to save, or False
+        """
+        if not (self.facebook_uids or self.numeric_uids):
+            return False
+        with codecs.open(f_path, 'w', encoding='utf-8') as out_f:
+            for uid in chain(self.numeric_uids, self.facebook_uids):
+                out_f.write(str(uid)+"\n")
+        return True
 
     def uids_from_users(self):
         """
         scrape ids of facebook users (convert username to uid through "findmyfbid" website),
-        and sometimes change proxies (to stay more anonymous)
+        and sometimes change proxies (to stay more anonymous).
+        usernames that are in the uid cache are not resolved again - the browser is opened only for the first
+        username that is not in cache. with a journal - each username is recorded as soon as it is done,
+        and usernames that were done in a previous run are skipped.
         :return:
         """
 
-        # check if there are existing proxies and facebook usernames
-        if self.proxies and self.facebook_users:
-
-            proxy_worked = self.till_proxy_work_loop()  # loop till the proxy will work
-            if proxy_worked:  # found proxy that works
-                sleep(randint(7, 14))
-                count = 0
-
-                for index in self.facebook_users:
-                    proxy_worked = True
-                    if (count % 10 == 0) and (count != 0):  # count divides by 10
-                        # trying to change proxy - loop till the proxy will work
-                        proxy_worked = self.till_proxy_work_loop()
-                    if proxy_worked:
-                        sleep(randint(8, 14))
-                        self.scrape_find_my_fbid(index)  # scrape facebook uids
-                        count += 1
+        # check if there are facebook usernames
+        if self.facebook_users:
+            proxy_worked = None  # None - the browser is not opened yet
+            count = 0
+
+            for position, index in enumerate(self.facebook_users):
+                if self.journal is not None and self.journal.is_done(position):
+                    continue  # done in a previous run
+
+                if self.uid_cache is not None:
+                    found, uid = self.uid_cache.lookup(index)
+                    if found:  # resolved before (uid, or a negative result)
+                        if uid:
+                            self.facebook_uids.append(uid)
+                        if self.journal is not None:
+                            self.journal.record(position, index, uid)
+                        continue
+
+                if proxy_worked is None:
+                    # check if there are existing proxies, and loop till the proxy will work
+                    proxy_worked = bool(self.proxies) and self.till_proxy_work_loop()
+                    if not proxy_worked:
+                        break
+                elif (count % 10 == 0) and (count != 0):  # count divides by 10
+                    # trying to change proxy - loop till the proxy will work
+                    proxy_worked = self.till_proxy_work_loop()
+                if proxy_worked:
+                    PACER.wait(FIND_FBID)  # wait for the turn of "findmyfbid" (adapts to its responses)
+                    uid = self.scrape_find_my_fbid(index)  # scrape facebook uids
+                    if self.uid_cache is not None and uid is not None:
+                        self.uid_cache.put(index, uid)  # uid, or a negative result (empty string)
+                    if self.journal is not None:
+                        # record the username as done (or as pending - if it wasn't searched)
+                        self.journal.record(position, index, uid, pending=uid is None)
+                    count += 1
+                elif self.journal is not None:
+                    self.journal.record(position, index, pending=True)  # no working proxy - retry on restart
+            else:
+                if self.journal is not None:
+                    self.journal.finish()  # every username was read (complete - unless some are pending)
+            if proxy_worked is not None:
                 self.destroy_driver()  # destroy the webdriver
 
+    def has_uncached_users(self):
+        """
+        :return: True - if there are usernames that are not in the uid cache (and need the browser), or False
+        """
+        for position, user in enumerate(self.facebook_users):
+            if self.journal is not None and self.journal.is_done(position):
+                continue  # done in a previous run
+            if self.uid_cache is None or not self.uid_cache.lookup(user)[0]:
+                return True
+        return False
+
     def till_proxy_work_loop(self):
         """
         reopens WebDriver from random proxy servers in a loop, till good connection with "findmyfbid" website.
+        (with a rotating proxy - switches the upstream proxy in a loop, without reopening the WebDriver)
         :return:
         """
         proxy_worked = False
         count = 0
         while count < 15 and not proxy_worked:
-            self.reopen_driver(activate_proxy=True)  # close and open the webdriver
+            if self.rotating_proxy is not None:
+                if not self.driver:
+                    self.set_chrome_driver(activate_proxy=True)
+                # switch the upstream proxy of the local rotating proxy (the browser keeps running)
+                self.current_proxy = self.rotating_proxy.rotate()
+            else:
+                self.reopen_driver(activate_proxy=True)  # close and open the webdriver
             proxy_worked = self.is_proxy_works()  # the proxy works
+            if self.rotation is not None and self.current_proxy and self.rotating_proxy is None:
+                self.rotation.report(self.current_proxy, proxy_worked)  # (the rotating proxy reports by itself)
+            if self.proxy_pool is not None and self.current_proxy:
+                # keep the success/failure history of the proxy
+                if proxy_worked:
+                    self.proxy_pool.record_success(self.current_proxy)
+                else:
+                    self.proxy_pool.record_failure(self.current_proxy)
             count += 1
         return proxy_worked
 
@@ -257,12 +358,13 @@ class FbidScraper:
 
         try:
             if self.driver:
+                start = perf_counter()
                 self.driver.get(FIND_FBID)  # navigates to the web page
-                sleep(randint(3, 6))
                 current_source = self.driver.page_source  # Gets the source of the current page
 
                 # indicates that the proxy connection works (the string should appear on the web page)
-                if "Find your Facebook ID" in current_source:
+                if FIND_FBID_TITLE in current_source:
+                    PACER.report(FIND_FBID, latency=perf_counter() - start)  # (a failure is of the proxy)
                     return True
                 else:
                     return False
@@ -276,33 +378,91 @@ class FbidScraper:
         takes facebook username and convert it to facebook uid, through "https://findmyfbid.com/"
         enter the username as input, press enter, and parse the uid from result's page source.
         :param user: input username to convert
-        :return:
+        :return: the uid (string), an empty string - if the website didn't find a uid,
+        or None - if the search box is not found, or the result is not a result page (the username is retried)
         """
+        if self.capture_network:
+            return self.find_my_fbid_from_network(user)
 
+        uid = None
         # Finds a list of elements within this element's children by name
         url_elems = self.driver.find_elements_by_name("url")
         if url_elems:
             # click on the first element, by the name "url" (query search box) - from the list
             url_elems[0].click()
-            sleep(1)
+            PACER.pause(FIND_FBID, 0.1)
             url_elems[0].clear()  # clear the search box
-            sleep(1)
+            PACER.pause(FIND_FBID, 0.1)
             url_elems[0].send_keys(user)  # send the username to the search box
-            sleep(1)
+            PACER.pause(FIND_FBID, 0.1)
+            start = perf_counter()
             url_elems[0].send_keys(Keys.ENTER)  # hit ENTER to search for the uid of the current username
-            sleep(randint(8, 16))
+            try:
+                # wait for the result page (the search box of the old page is gone, and the new page is loaded),
+                # so only the response time of the site is reported (the pacing is done before the search)
+                wait_until(self.driver, all_of(staleness_of(url_elems[0]), dom_ready()), timeout=RESULT_TIMEOUT)
+            except TimeoutException:
+                PACER.report(FIND_FBID, ok=False)  # (no result - slows down the next lookups)
+                return None
             current_source = self.driver.page_source  # Gets the source of the current page
-            if r'{"id":' in current_source:
-                # find a result with the uid (in page source)
-                uid_tags = re.findall(r'\{"id":[^>]+\}', current_source)
-                if uid_tags:
-                    # using replace method to remove unwanted occurrences from the string
-                    uid = uid_tags[0].replace(r'{"id":', '').replace('}', '').replace(' ', '')
-                    if len(uid) > 0 and uid.isdigit():
-                        self.facebook_uids.append(uid)  # append uid to list
-                        sleep(3)
-            sleep(randint(3, 6))
+            PACER.report(FIND_FBID, latency=perf_counter() - start, text=current_source)
+            uid = parse_uid(current_source)
+            if uid:
+                self.facebook_uids.append(uid)  # append uid to list
             self.driver.execute_script("window.history.go(-1)")  # going back to previous page
+        return uid
+
+    def find_my_fbid_from_network(self, user):
+        """
+        takes facebook username and convert it to facebook uid, through "https://findmyfbid.com/" -
+        submits the username, and takes the uid from the response (in the performance log of the browser)
+        as soon as it arrives. the result page has a search box too, so the next username is submitted from
+        the result page (without navigating back).
+        :param user: input username to convert
+        :return: the uid (string), an empty string - if the website didn't find a uid,
+        or None - if the search box is not found (or there was no response, or an error response)
+        """
+        url_elems = self.driver.find_elements_by_name("url")
+        if not url_elems:
+            self.driver.get(FIND_FBID)  # (not a page with a search box - like an error page)
+            url_elems = self.driver.find_elements_by_name("url")
+            if not url_elems:
+                return None
+        clear_network_log(self.driver)  # only responses of this search
+        url_elems[0].clear()  # clear the search box
+        start = perf_counter()
+        url_elems[0].send_keys(user + Keys.ENTER)  # send the username, and hit ENTER to search for the uid
+        response = wait_for_response(self.driver, url_part=FIND_FBID_DOMAIN)
+        if response is None or response.body is None:
+            PACER.report(FIND_FBID, ok=False)  # (slows down the next lookups)
+            return None
+        PACER.report(FIND_FBID, ok=response.status < 400, latency=perf_counter() - start, text=response.body)
+        if not 200 <= response.status < 300:
+            return None  # an error/block page - not a result (not cached)
+        uid = parse_uid(response.body)
+        if uid:
+            self.facebook_uids.append(uid)  # append uid to list
+        return uid
+
+
+def parse_uid(source):
+    """
+    :param source: a page source (or a response body) of "https://findmyfbid.com/" (string)
+    :return: the uid (string), an empty string - if the page says that the user was not found,
+    or None - if it's not a result page (like a captcha, an error or a block page - not cached)
+    """
+    if r'{"id":' in source:
+        # find a result with the uid (in page source)
+        uid_tags = re.findall(r'\{"id":[^>]+\}', source)
+        if uid_tags:
+            # using replace method to remove unwanted occurrences from the string
+            uid = uid_tags[0].replace(r'{"id":', '').replace('}', '').replace(' ', '')
+            if len(uid) > 0 and uid.isdigit():
+                return uid
+    lower_source = source.lower()
+    if FIND_FBID_TITLE.lower() in lower_source and any(marker in lower_source for marker in NOT_FOUND_MARKERS):
+        return ""  # (a result page of "findmyfbid" without a uid)
+    return None
 
 
 def enable_js_preference():
@@ -341,6 +501,32 @@ def text_from_file(file_name):
     return res
 
 
+def get_proxies(scraper, proxy_pool):
+    """
+    fills 'scraper.proxies' with working proxies - proxies that worked recently (from the proxy pool),
+    or new proxies from 'https://free-proxy-list.net/' (checked concurrently against "findmyfbid")
+    :param scraper: FbidScraper object
+    :param proxy_pool: ProxyPool object
+    :return: list of proxies (fastest first)
+    """
+    # warm restart - use proxies that worked recently (skip scraping & validation)
+    scraper.proxies = proxy_pool.working_proxies()
+    if scraper.proxies:
+        print("using %d proxies from the proxy pool" % len(scraper.proxies))
+    else:
+        # Creates a new instance of the chrome driver with required parameters
+        scraper.proxies = []
+        scraper.set_chrome_driver()
+
+        # trying to find available proxies on 'https://free-proxy-list.net/'
+        scraper.extract_proxies()
+
+        if scraper.proxies:
+            # check the proxies concurrently against "findmyfbid", and keep the working ones (fastest first)
+            scraper.proxies = ranked_proxies(scraper.proxies, target=FIND_FBID, pool=proxy_pool)
+    return scraper.proxies or []
+
+
 def receive_user_input():
     """
     Receive input from user (path to a file)
@@ -357,27 +543,45 @@ def main():
     :return:
     """
     file_path = receive_user_input()  # receive file path from user
-    scraper = FbidScraper(file_path)  # build new FbidScraper object
+    proxy_pool = ProxyPool()  # persistent pool of proxies (on desktop)
+    proxy_pool.evict()  # remove stale/failing proxies from the pool
+
+    # proxies are drawn by their latency & success rate (that the local rotating proxy reports)
+    rotation = RotationService()
+    # local proxy that switches upstream proxies on demand (direct connection until it gets proxies)
+    rotating_proxy = RotatingProxy(port=0, mode='sticky', chooser=rotation.draw_proxy, on_result=rotation.report)
+    rotating_proxy.start()
+    # pool of warm headless browsers (with JavaScript disabled), that use the local rotating proxy
+    driver_pool = ChromeDriverPool(size=1, arguments=["--window-size=1920,1080"], prefs=PREFERENCES,
+                                   proxy_server=rotating_proxy.address, capabilities=enable_performance_log({}))
+    uid_cache = UidCache()  # persistent cache of resolved usernames (on desktop)
+    uid_cache.evict()  # remove expired resolutions from the cache
+    # checkpoint/resume journal (next to the input file)
+    journal = UidJournal(file_path) if os.path.isfile(file_path) else None
+    # build new FbidScraper object
+    scraper = FbidScraper(file_path, proxy_pool=proxy_pool, driver_pool=driver_pool, rotating_proxy=rotating_proxy,
+                          rotation=rotation, uid_cache=uid_cache, journal=journal, capture_network=True)
+    if journal is not None:
+        scraper.facebook_uids.extend(journal.uids)  # uids that were resolved before a crash/stop
 
     if scraper.facebook_users:  # check if there are facebook users to search for their uids
 
-        # Creates a new instance of the chrome driver with required parameters
-        scraper.set_chrome_driver()
-
-        # trying to find available proxies on 'https://free-proxy-list.net/'
-        scraper.extract_proxies()
-        sleep(3)
-
-        if scraper.proxies:  # found proxies on 'https://free-proxy-list.net/'
-            sleep(2)
-            scraper.uids_from_users()  # scrape uids from the given usernames
-
-            if scraper.facebook_uids:  # found uids
-                # save the uids to a Text file on Desktop (called 'facebook_uids')
-                with codecs.open(os.path.join(DESKTOP_PATH, "facebook_uids.txt"), 'w', encoding='utf-8') as out_f:
-                    for i in scraper.facebook_uids:
-                        out_f.write(str(i)+"\n")
-                out_f.close()
+        # proxies are needed only for usernames that are not in the uid cache
+        if scraper.has_uncached_users():
+            get_proxies(scraper, proxy_pool)
+            if scraper.proxies:  # found proxies on 'https://free-proxy-list.net/'
+                rotation.add_proxies(scraper.proxies)  # the local proxy chains to these proxies
+
+        # scrape uids from the given usernames (cached usernames are not resolved again)
+        scraper.uids_from_users()
+
+        # save the uids (if found) to a Text file on Desktop (called 'facebook_uids')
+        scraper.save_uids()
+    if journal is not None:
+        journal.close()
+    uid_cache.close()
+    driver_pool.close()  # quit the browsers of the pool
+    rotating_proxy.stop()  # stop the local rotating proxy
 
 
 if __name__ == '__main__':
@@ -10,10 +10,12 @@ The script is using - Selenium Automation Tool (WebDriver) to search terms with
 import codecs
 import re
 import os
-from time import sleep
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
 from bs4 import BeautifulSoup
+from page_waits import wait_until, all_of, dom_present, url_changed
 
 __author__ = "KnifeF"
 __license__ = "MIT"
@@ -103,15 +105,20 @@ def bing_search(driver, key_word):
         # navigate to Bing's url in the current browser session
         driver.get(BING_URL)
 
-        sleep(3)  # Delay execution for a given number of seconds
+        try:
+            # wait for the search query box element (by it's name 'q')
+            search_box = wait_until(driver, dom_present((By.NAME, 'q')))
+        except TimeoutException:
+            return
+        old_url = driver.current_url
 
-        search_box = driver.find_elements_by_name('q')  # find the search query box element by it's name ('q')
-
-        if len(search_box) > 0:
-            # send keyword to the query box element, and hit ENTER to search the term with Bing
-            search_box[0].send_keys(key_word, Keys.ENTER)
-
-            # driver.find_elements_by_name('go').click()
+        # send keyword to the query box element, and hit ENTER to search the term with Bing
+        search_box.send_keys(key_word, Keys.ENTER)
+        try:
+            # wait for the results page (a new URL, with the results element)
+            wait_until(driver, all_of(url_changed(old_url), dom_present((By.ID, 'b_results'))))
+        except TimeoutException:
+            print("Bing didn't return results in time")
 
 
 def scraping_process(driver, key_word):
@@ -120,9 +127,7 @@ def scraping_process(driver, key_word):
     :param driver - the webdriver is used for web scraping (webdriver.Chrome)
     :param key_word - (search term) string
     """
-    bing_search(driver, key_word)  # search the keyword with Bing
-
-    sleep(3)  # Delay execution for a given number of seconds
+    bing_search(driver, key_word)  # search the keyword with Bing (returns when the results appear)
 
     # Return whether the given object is an instance of webdriver.Chrome
     if isinstance(driver, webdriver.Chrome):
@@ -3,6 +3,9 @@
 
 """This simple script searches hashtag on twitter (linux and Windows only), using pyautogui,
 and saves text from search results to a text file (.txt)
+
+For a list of hashtags without a desktop browser, see 'hashtag_harvester' (headless - the posts are
+extracted from the DOM while scrolling the results, and streamed to a JSON Lines file).
 """
 
 import os
@@ -14,6 +17,7 @@ import pyperclip
 from pathlib import Path
 from time import sleep
 from validators import url
+from template_matcher import MATCHER
 
 
 __author__ = "KnifeF"
@@ -104,8 +108,8 @@ def locate_and_click(path):
     """
     # path exists, is file, and ends with 'png' extension
     if path and path.endswith('.png') and os.path.exists(path) and os.path.isfile(path):
-        # locate image/pattern on screen
-        search_box = pyautogui.locateOnScreen(path, minSearchTime=5)
+        # locate image/pattern on screen (a cached template - near its last location first)
+        search_box = MATCHER.locate(path, timeout=5)
         if search_box:
             loc_x, loc_y = pyautogui.center(search_box)  # center of found image loc
             # Moves the mouse cursor to a point on the screen
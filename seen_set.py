@@ -0,0 +1,71 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A compact, memory-bounded "seen" set (a Bloom filter) - to deduplicate huge streams of strings
+(like usernames or post ids) in constant memory.
+
+The memory size is fixed when the set is created (by the expected number of items and the false positive
+rate), and doesn't grow with the stream. A false positive means that a new item is reported as already seen
+(it's rare - one in a million by default), and an item that was seen is never reported as new.
+The false positive rate holds only up to the capacity - past it, the rate climbs quickly (3x the capacity -->
+about one in a hundred), so the capacity should be sized from the input (like the number of lines of a file).
+"""
+
+import math
+from hashlib import blake2b
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+CAPACITY = 1000000  # expected number of items (when the size of the input is unknown)
+ERROR_RATE = 1e-6  # false positive rate (at full capacity)
+
+
+class SeenSet:
+
+    def __init__(self, capacity=CAPACITY, error_rate=ERROR_RATE):
+        """
+        creates new instance of SeenSet Object (a Bloom filter)
+        :param capacity: expected number of items
+        :param error_rate: false positive rate (at full capacity), between 0 and 1
+        """
+        # number of bits, and number of hash functions, for the given capacity and error rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0  # number of added (new) items
+
+    def __len__(self):
+        return self.count
+
+    def _positions(self, item):
+        """
+        :param item: string or bytes
+        :return: list of bit positions of the item (double hashing with two 64-bit hashes)
+        """
+        if isinstance(item, str):
+            item = item.encode('utf-8')
+        digest = blake2b(item, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item):
+        """
+        adds an item to the set
+        :param item: string or bytes
+        :return: True - if the item is new (was not seen before), or False
+        """
+        is_new = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                is_new = True
+        if is_new:
+            self.count += 1
+        return is_new
@@ -9,7 +9,6 @@ import os
 import sys
 import argparse
 import re
-from time import sleep
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
@@ -17,6 +16,7 @@ from selenium.common.exceptions import WebDriverException, NoSuchElementExceptio
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
+from pacing import PACER
 
 __email__ = "knifef@protonmail.com"
 
@@ -81,8 +81,8 @@ class SearchWithSelenium:
                             or isinstance(self.driver, webdriver.Firefox)
                             or isinstance(self.driver, webdriver.Edge)):
 
-            # Loads a web page in the current browser session.
-            self.driver.get(BASE_URL)
+            # Loads a web page in the current browser session (waits for the turn of the host).
+            PACER.get(self.driver, BASE_URL)
             try:
                 # WebDriver waits up to 10 seconds before throwing a TimeoutException
                 # unless it finds the element (search box) to return within 10 seconds.
@@ -90,7 +90,7 @@ class SearchWithSelenium:
                     ec.presence_of_element_located((By.NAME, 'q'))
                 )
                 if search_box:
-                    sleep(2)
+                    PACER.pause(BASE_URL, 0.5)
                     # send keyword to search box
                     self.driver.find_element_by_name('q').send_keys(self.kw, Keys.ENTER)
 
@@ -102,13 +102,14 @@ class SearchWithSelenium:
                     if links:
                         # scroll down page
                         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                        sleep(2)  # delay
+                        PACER.pause(BASE_URL, 0.5)
 
                         # Finds multiple elements by css selector.
                         if self.driver.find_elements_by_css_selector(MORE_RESULTS):
-                            # Clicks the element
+                            # Clicks the element (loads more results - waits for the turn of the host)
+                            PACER.wait(BASE_URL)
                             self.driver.find_elements_by_css_selector(MORE_RESULTS)[0].click()
-                            sleep(2)  # delay
+                            PACER.pause(BASE_URL, 0.5)
 
                         # Gets the source of the current page, and add links from
                         # search results to a text file
@@ -0,0 +1,339 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A fast template matcher (locating image patterns on screen) - instead of 'pyautogui.locateOnScreen',
+that decodes the PNG template on every call, and searches in full resolution all over the screen.
+
+The templates (from 'imgs/') are decoded once, converted to grayscale and downscaled, and kept in a cache.
+The screen is grabbed, converted to grayscale and downscaled the same way, and the template is searched by
+normalized cross-correlation (NCC) - the correlation is computed with NumPy FFT, and normalized with integral
+images (sums of the windows of the screen). The last location of each template is remembered, and a new search
+starts in its neighbourhood (most of the time, the pattern didn't move) - the whole screen is searched only
+when the pattern isn't found there.
+
+Several templates can be located on one grab of the screen ('locate_all') - the grab is prepared once
+(grayscale, downscaled, its FFT and its integral images) and shared by all the templates, optionally
+only within a region of interest.
+
+The matcher works on saved screen captures as well, so it can be benchmarked offline
+(against 'pyautogui.locate' - the same search, without the screen):
+python your\\path\\to\\template_matcher.py -t "imgs/search_q.png" -c "capture1.png" "capture2.png" -n 20
+"""
+
+import os
+import argparse
+from collections import namedtuple
+from time import sleep, perf_counter
+import numpy as np
+from PIL import Image
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+SCALE = 0.5  # the search is done on a downscaled image (0.5 --> a quarter of the pixels)
+THRESHOLD = 0.8  # min NCC score (-1..1) of a match
+MARGIN = 64  # the margin (pixels) around the last location, that is searched first
+RETRY_INTERVAL = 0.1  # time (seconds) between two grabs of the screen, while the pattern isn't found
+EPSILON = 1e-6
+
+Box = namedtuple("Box", "left top width height")  # (like the Box of pyautogui - works with 'pyautogui.center')
+
+
+class TemplateMatcher:
+
+    def __init__(self, scale=SCALE, threshold=THRESHOLD, margin=MARGIN):
+        """
+        creates new instance of TemplateMatcher Object
+        :param scale: the scale of the search (0.5 --> half the width and half the height)
+        :param threshold: min NCC score (-1..1) of a match
+        :param margin: the margin (pixels) around the last location of a template, that is searched first
+        """
+        self.scale = scale
+        self.threshold = threshold
+        self.margin = margin
+        self.templates = {}  # path --> tuple (downscaled zero-mean template, its norm, the original size)
+        self.last_hits = {}  # path --> the last location (Box - in screen pixels)
+
+    def template(self, path):
+        """
+        :param path: path to the image of the template
+        :return: tuple (the downscaled zero-mean grayscale template, its norm, (width, height) of the original)
+        (decoded once - cached)
+        """
+        if path not in self.templates:
+            with Image.open(path) as image:
+                size = image.size
+                gray = prepare(image, self.scale)
+            zero_mean = gray - gray.mean()
+            self.templates[path] = (zero_mean, np.sqrt((zero_mean ** 2).sum()), size)
+        return self.templates[path]
+
+    def locate(self, path, screen=None, timeout=0, region=None):
+        """
+        locates a template on the screen (or on a saved capture of the screen)
+        :param path: path to the image of the template
+        :param screen: PIL Image (a capture of the screen), or None - grabs the screen
+        :param timeout: max time (seconds) to retry - while the pattern isn't found (grabs the screen again)
+        :param region: tuple (left, top, width, height) - the region of interest (screen pixels), or None
+        :return: the location (Box - left, top, width, height), or None - if not found
+        """
+        return self.locate_all([path], screen=screen, timeout=timeout, region=region)[path]
+
+    def locate_all(self, paths, screen=None, timeout=0, region=None):
+        """
+        locates a set of templates on one grab of the screen - the grab is prepared once (grayscale, downscaled,
+        its FFT and integral images), and shared by all the templates
+        :param paths: paths to the images of the templates
+        :param screen: PIL Image (a capture of the screen), or None - grabs the screen
+        :param timeout: max time (seconds) to retry - while some of the patterns aren't found (one new grab
+        for all of them)
+        :param region: tuple (left, top, width, height) - the region of interest (screen pixels), or None
+        :return: dict - path --> the location (Box), or None - if not found
+        """
+        found = dict.fromkeys(paths)
+        deadline = perf_counter() + timeout
+        while True:
+            missing = [path for path in paths if found[path] is None]
+            prepared = PreparedScreen(screen if screen is not None else grab_screen(), self.scale, region,
+                                      [self.template(path)[0].shape for path in missing])
+            for path in missing:
+                found[path] = self.locate_in(path, prepared)
+            if all(found.values()) or screen is not None or perf_counter() >= deadline:
+                return found
+            sleep(RETRY_INTERVAL)
+
+    def locate_in(self, path, prepared):
+        """
+        locates a template on a prepared screen - near its last location first, then all over the screen
+        :param path: path to the image of the template
+        :param prepared: PreparedScreen object
+        :return: the location (Box), or None - if not found
+        """
+        template, norm, (width, height) = self.template(path)
+        last_hit = self.last_hits.get(path)
+        found = None
+        if last_hit is not None:
+            window = self.around(last_hit, prepared)
+            if window is not None:
+                found = self.best(ncc(prepared.window(*window), template, norm), window[:2])
+        if found is None:
+            found = self.best(prepared.ncc(template, norm))
+        if found is None:
+            return None
+        box = Box(prepared.left + int(round(found[1] / self.scale)), prepared.top + int(round(found[0] / self.scale)),
+                  width, height)
+        self.last_hits[path] = box
+        return box
+
+    def around(self, box, prepared):
+        """
+        :param box: a location (Box - in screen pixels)
+        :param prepared: PreparedScreen object
+        :return: tuple (top, left, bottom, right) - the neighbourhood of the location (in downscaled pixels of the
+        prepared screen), or None - if it's out of the prepared screen
+        """
+        shape = prepared.gray.shape
+        top = max(0, int((box.top - prepared.top - self.margin) * self.scale))
+        left = max(0, int((box.left - prepared.left - self.margin) * self.scale))
+        bottom = min(shape[0], int((box.top - prepared.top + box.height + self.margin) * self.scale) + 1)
+        right = min(shape[1], int((box.left - prepared.left + box.width + self.margin) * self.scale) + 1)
+        if top >= bottom or left >= right:
+            return None
+        return top, left, bottom, right
+
+    def best(self, scores, offset=(0, 0)):
+        """
+        :param scores: NumPy array of NCC scores, or None
+        :param offset: tuple (y, x) of the scores in the prepared screen
+        :return: tuple (y, x) of the best match (downscaled pixels), or None - if its score is under the threshold
+        """
+        if scores is None:
+            return None
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        if scores[y, x] < self.threshold:
+            return None
+        return offset[0] + y, offset[1] + x
+
+
+class PreparedScreen:
+
+    def __init__(self, image, scale=SCALE, region=None, template_shapes=()):
+        """
+        creates new instance of PreparedScreen Object - a grab of the screen, prepared once for a set of templates
+        (the downscaled grayscale image, its integral images, and its FFT - padded for the largest template)
+        :param image: PIL Image (a capture of the screen)
+        :param scale: the scale of the search
+        :param region: tuple (left, top, width, height) - the region of interest (screen pixels), or None
+        :param template_shapes: the shapes of the (downscaled) templates that are searched
+        """
+        self.left, self.top = 0, 0
+        if region is not None:
+            self.left, self.top, width, height = region
+            image = image.crop((self.left, self.top, self.left + width, self.top + height))
+        self.gray = prepare(image, scale)
+        self.integral = integral_image(self.gray)
+        self.integral_sq = integral_image(self.gray ** 2)
+        pad = (max([shape[0] for shape in template_shapes] or [1]), max([shape[1] for shape in template_shapes] or [1]))
+        # (one FFT size for all the templates - large enough for the largest template)
+        self.shape = (self.gray.shape[0] + pad[0] - 1, self.gray.shape[1] + pad[1] - 1)
+        self.spectrum = None  # the FFT of the screen (computed on the first full search)
+
+    def window(self, top, left, bottom, right):
+        """
+        :return: a part of the prepared screen (NumPy array - downscaled pixels)
+        """
+        return self.gray[top:bottom, left:right]
+
+    def ncc(self, template, norm):
+        """
+        normalized cross-correlation of a template with each window of the whole prepared screen
+        (with the shared FFT and integral images)
+        :param template: zero-mean template (2D)
+        :param norm: the norm of the template
+        :return: NumPy array of the scores, or None - if the template is larger than the screen
+        """
+        height, width = template.shape
+        if height > self.gray.shape[0] or width > self.gray.shape[1] \
+                or height > self.shape[0] - self.gray.shape[0] + 1 or width > self.shape[1] - self.gray.shape[1] + 1:
+            return ncc(self.gray, template, norm)  # (not prepared for this template)
+        if self.spectrum is None:
+            self.spectrum = np.fft.rfft2(self.gray, self.shape)
+        correlation = np.fft.irfft2(self.spectrum * np.fft.rfft2(template[::-1, ::-1], self.shape), self.shape)
+        correlation = correlation[height - 1:self.gray.shape[0], width - 1:self.gray.shape[1]]
+        return normalize(correlation, window_sums(self.integral, height, width),
+                         window_sums(self.integral_sq, height, width), norm, height * width)
+
+
+def prepare(image, scale=SCALE):
+    """
+    :param image: PIL Image
+    :param scale: the scale of the search
+    :return: NumPy array (float64) - the downscaled grayscale image
+    """
+    gray = image.convert("L")
+    if scale != 1:
+        gray = gray.resize((max(1, int(gray.width * scale)), max(1, int(gray.height * scale))), Image.BILINEAR)
+    return np.asarray(gray, dtype=np.float64)
+
+
+def integral_image(array):
+    """
+    :param array: NumPy array (2D)
+    :return: the integral image of the array (with a leading row and column of zeros)
+    """
+    integral = np.zeros((array.shape[0] + 1, array.shape[1] + 1))
+    integral[1:, 1:] = array.cumsum(axis=0).cumsum(axis=1)
+    return integral
+
+
+def window_sums(integral, height, width):
+    """
+    :param integral: the integral image of an array
+    :param height: the height of the window
+    :param width: the width of the window
+    :return: the sum of each window (height x width) of the array
+    """
+    return integral[height:, width:] - integral[:-height, width:] - integral[height:, :-width] \
+        + integral[:-height, :-width]
+
+
+def normalize(correlation, sums, sums_sq, norm, size):
+    """
+    :param correlation: the correlation of a zero-mean template with each window of an image
+    :param sums: the sum of each window
+    :param sums_sq: the sum of squares of each window
+    :param norm: the norm of the template
+    :param size: the number of pixels of the template
+    :return: the NCC scores (-1..1)
+    """
+    denominator = np.sqrt(np.maximum(sums_sq - sums ** 2 / size, 0)) * norm
+    return np.where(denominator > EPSILON, correlation / np.maximum(denominator, EPSILON), 0)
+
+
+def ncc(image, template, norm):
+    """
+    normalized cross-correlation of a template with each window of an image
+    :param image: NumPy array (2D)
+    :param template: zero-mean template (2D)
+    :param norm: the norm of the template
+    :return: NumPy array of the scores (-1..1) - a score for each position of the template, or None
+    (if the template is larger than the image)
+    """
+    height, width = template.shape
+    if height > image.shape[0] or width > image.shape[1]:
+        return None
+    shape = (image.shape[0] + height - 1, image.shape[1] + width - 1)
+    # correlation = convolution with the flipped template (the template is zero-mean, so the mean of the
+    # window doesn't change the numerator)
+    correlation = np.fft.irfft2(np.fft.rfft2(image, shape) * np.fft.rfft2(template[::-1, ::-1], shape), shape)
+    correlation = correlation[height - 1:image.shape[0], width - 1:image.shape[1]]
+    return normalize(correlation, window_sums(integral_image(image), height, width),
+                     window_sums(integral_image(image ** 2), height, width), norm, height * width)
+
+
+def grab_screen():
+    """
+    :return: PIL Image - a capture of the screen
+    """
+    import pyautogui  # (imported here - the matcher works offline, on saved captures, without a display)
+    return pyautogui.screenshot()
+
+
+def benchmark(template_paths, capture_paths, repeat=10, compare=False):
+    """
+    benchmarks the matcher on saved screen captures (prints the time of a locate call of each template)
+    :param template_paths: paths to the images of the templates
+    :param capture_paths: paths to saved screen captures
+    :param repeat: number of locate calls per template and capture
+    :param compare: True - benchmark 'pyautogui.locate' as well (the same search, without the screen)
+    :return:
+    """
+    matcher = TemplateMatcher()
+    captures = [Image.open(capture_path).convert("RGB") for capture_path in capture_paths]
+    for template_path in template_paths:
+        for capture_path, capture in zip(capture_paths, captures):
+            times = []
+            found = None
+            for _ in range(repeat):
+                start = perf_counter()
+                found = matcher.locate(template_path, screen=capture)
+                times.append(perf_counter() - start)
+            print("%s in %s --> %s (first call %.1f ms, then %.1f ms)"
+                  % (os.path.basename(template_path), os.path.basename(capture_path), found,
+                     times[0] * 1000, 1000 * sum(times[1:]) / max(len(times) - 1, 1)))
+            if compare:
+                import pyautogui
+                start = perf_counter()
+                found = pyautogui.locate(template_path, capture)
+                print("    pyautogui.locate --> %s (%.1f ms)" % (found, (perf_counter() - start) * 1000))
+    for capture_path, capture in zip(capture_paths, captures):
+        start = perf_counter()
+        matcher.locate_all(template_paths, screen=capture)
+        print("all %d templates in %s, in one pass --> %.1f ms"
+              % (len(template_paths), os.path.basename(capture_path), (perf_counter() - start) * 1000))
+
+
+MATCHER = TemplateMatcher()  # the shared matcher (of all the scripts in the process - one cache)
+
+
+def main():
+    """
+    The main function - benchmarks the matcher offline, on saved screen captures
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-t", "--TEMPLATES", dest="templates", type=str, nargs='+', required=True,
+                        help="Enter paths to the images of the templates")
+    parser.add_argument("-c", "--CAPTURES", dest="captures", type=str, nargs='+', required=True,
+                        help="Enter paths to saved screen captures")
+    parser.add_argument("-n", "--REPEAT", dest="repeat", type=int, default=10,
+                        help="Enter the number of locate calls per template and capture")
+    parser.add_argument("-p", "--PYAUTOGUI", dest="compare", action="store_true",
+                        help="Benchmark 'pyautogui.locate' as well")
+    args = parser.parse_args()  # Command line argument parsing methods
+    benchmark(args.templates, args.captures, repeat=args.repeat, compare=args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'albums_export' - parsing the album rows of an artist's page, and appending them to a dataset
+(CSV/TSV/JSON Lines; Parquet - if pyarrow is installed).
+"""
+
+import csv
+import json
+import pytest
+from albums_export import AlbumsExporter, COLUMNS, iter_album_rows
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+ARTIST_PAGE = u"""
+<div class="clearfix">
+    <div class="artist-album-label">First Album</div>
+    <table><tbody>
+        <tr><td>Song One</td><td>3:00</td></tr>
+        <tr><td></td></tr>
+        <tr><td>Song Two</td></tr>
+    </tbody></table>
+</div>
+<div class="clearfix"><table><tbody><tr><td>No Album</td></tr></tbody></table></div>
+<div class="clearfix">
+    <div class="artist-album-label">שיר</div>
+    <table><tbody><tr><td>Third</td></tr></tbody></table>
+</div>
+"""
+ROWS = [("artist", "First Album", 1, "Song One"), ("artist", "First Album", 2, "Song Two"),
+        ("artist", u"שיר", 1, "Third")]
+
+
+def test_iter_album_rows():
+    bs4 = pytest.importorskip("bs4")
+    soup_obj = bs4.BeautifulSoup(ARTIST_PAGE, "html.parser")
+    assert list(iter_album_rows(soup_obj, "artist")) == ROWS
+
+
+@pytest.mark.parametrize("extension, delimiter", [(".csv", ","), (".tsv", "\t")])
+def test_csv_is_appended_with_one_header(tmp_path, extension, delimiter):
+    out_path = str(tmp_path / "out" / ("albums" + extension))
+    for rows in (ROWS[:2], ROWS[2:]):
+        with AlbumsExporter(out_path, encoding='utf-8-sig') as exporter:
+            assert exporter.write_rows(iter(rows)) == len(rows)
+    with open(out_path, encoding='utf-8', newline='') as in_f:
+        assert in_f.read(1) == u"\ufeff"  # (one BOM - at the start of the file)
+        lines = list(csv.reader(in_f, delimiter=delimiter))
+    assert lines == [list(COLUMNS)] + [[str(value) for value in row] for row in ROWS]
+
+
+def test_jsonl_records(tmp_path):
+    out_path = str(tmp_path / "albums.jsonl")
+    with AlbumsExporter(out_path) as exporter:
+        exporter.write_rows(ROWS)
+    with open(out_path, encoding='utf-8') as in_f:
+        records = [json.loads(line) for line in in_f]
+    assert records[2] == {"artist": "artist", "album": u"שיר", "track_no": 1, "song": "Third"}
+    assert exporter.count == 3
+
+
+def test_parquet_row_groups(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out_path = str(tmp_path / "albums.parquet")
+    with AlbumsExporter(out_path, batch_size=2) as exporter:
+        exporter.write_rows(ROWS)
+    table = pq.read_table(out_path)
+    assert table.column_names == list(COLUMNS)
+    assert [tuple(row.values()) for row in table.to_pylist()] == ROWS
+    with AlbumsExporter(out_path) as exporter:  # (another run in the same second - a new part)
+        exporter.write_rows(ROWS[:1])
+    assert pq.read_table(out_path).num_rows == 4
+
+
+def test_unsupported_format(tmp_path):
+    with pytest.raises(ValueError):
+        AlbumsExporter(str(tmp_path / "albums.xlsx"))
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'fbid_workers' - the shares of the proxies, the shared rate limit, and the coordinator without
+workers (no proxies - only the cached usernames are resolved).
+"""
+
+import os
+import pytest
+
+pytest.importorskip("selenium")
+pytest.importorskip("bs4")
+os.environ.setdefault("HOMEPATH", os.path.expanduser("~"))  # (the default files are on the Windows desktop)
+
+import fbid_workers
+from fbid_workers import FbidCoordinator, SharedRateLimit, proxy_shares
+from uid_cache import UidCache
+from uid_journal import UidJournal
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+USERS = ["cached1", "miss1", "negative", "miss2", "cached2", "cached3", "miss3"]
+
+
+@pytest.fixture
+def uid_cache():
+    cache = UidCache(":memory:")
+    cache.put("cached1", "11")
+    cache.put("cached2", "22")
+    cache.put("cached3", "33")
+    cache.put("negative", None)
+    yield cache
+    cache.close()
+
+
+def test_proxy_shares():
+    assert proxy_shares(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+    assert proxy_shares(["a"], 3) == [["a"], ["a"], ["a"]]  # (not enough proxies - all of them to each worker)
+
+
+def test_shared_rate_limit_spaces_the_lookups(monkeypatch):
+    clock = {"now": 100.0}
+    slept = []
+    monkeypatch.setattr(fbid_workers, "time", lambda: clock["now"])
+    monkeypatch.setattr(fbid_workers, "sleep", slept.append)
+    rate_limit = SharedRateLimit(per_minute=30)
+    for _ in range(3):
+        rate_limit.wait()
+    assert slept == [pytest.approx(2.0), pytest.approx(4.0)]
+
+
+def test_no_proxies_resolves_cached_usernames_in_order(uid_cache, tmp_path):
+    input_path = tmp_path / "users.txt"
+    input_path.write_text(u"\n".join(USERS), encoding='utf-8')
+    journal = UidJournal(str(input_path))
+    coordinator = FbidCoordinator(USERS, [], shard_size=2, uid_cache=uid_cache, journal=journal)
+    assert list(coordinator.run()) == [("cached1", "11"), ("miss1", None), ("negative", ""), ("miss2", None),
+                                       ("cached2", "22"), ("cached3", "33"), ("miss3", None)]
+    assert coordinator.searched == 0
+    journal.close()
+
+    journal = UidJournal(str(input_path))  # (resumed - the misses are pending, and retried)
+    try:
+        assert [journal.is_done(position) for position in range(len(USERS))] == \
+            [True, False, True, False, True, True, False]
+    finally:
+        journal.close()
+
+
+def test_no_proxies_and_every_username_cached_finishes_the_journal(uid_cache, tmp_path):
+    users = ["cached1", "negative", "cached2", "cached3"]
+    input_path = tmp_path / "users.txt"
+    input_path.write_text(u"\n".join(users), encoding='utf-8')
+    journal = UidJournal(str(input_path))
+    assert [uid for _, uid in FbidCoordinator(users, [], shard_size=1, uid_cache=uid_cache,
+                                                journal=journal).run()] == ["11", "", "22", "33"]
+    journal.close()
+
+    journal = UidJournal(str(input_path))  # (a complete job - a rerun starts over)
+    try:
+        assert not journal.is_done(0)
+    finally:
+        journal.close()
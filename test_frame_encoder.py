@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'frame_encoder' - dropping duplicate frames (exact and dHash), the reset of a new page,
+the bounded queue of frames, and the format of the saved files.
+"""
+
+import os
+import threading
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+features = pytest.importorskip("PIL.features")
+
+import frame_encoder
+from frame_encoder import FrameEncoder, dhash, hamming
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+def frame(color, size=(40, 30), dot=None):
+    """
+    :return: a small frame - a gradient with a color, and optionally a white dot at (x, y)
+    """
+    image = Image.new("RGB", size, color)
+    for x in range(size[0]):
+        image.putpixel((x, 0), (x * 6, x * 6, x * 6))
+    if dot is not None:
+        image.putpixel(dot, (255, 255, 255))
+    return image
+
+
+def test_identical_frames_are_dropped(tmp_path):
+    with FrameEncoder() as encoder:
+        assert encoder.submit(frame("red"), str(tmp_path / "a.png")) == str(tmp_path / "a.png")
+        assert encoder.submit(frame("red"), str(tmp_path / "b.png")) is None
+        assert encoder.submit(frame("blue"), str(tmp_path / "c.png"))
+        assert encoder.submit(frame("red"), str(tmp_path / "d.png"))  # (only the last kept frame is compared)
+    assert (encoder.saved, encoder.dropped) == (3, 1)
+    assert sorted(os.listdir(str(tmp_path))) == ["a.png", "c.png", "d.png"]
+
+
+def test_near_duplicates_within_the_threshold(tmp_path):
+    near = frame("red", dot=(20, 15))
+    assert hamming(dhash(frame("red")), dhash(near)) <= 4
+    with FrameEncoder(threshold=0) as encoder:
+        encoder.submit(frame("red"), str(tmp_path / "a.png"))
+        assert encoder.submit(near, str(tmp_path / "b.png"))  # (not identical - kept without a threshold)
+    with FrameEncoder(threshold=4) as encoder:
+        encoder.submit(frame("red"), str(tmp_path / "c.png"))
+        assert encoder.submit(near, str(tmp_path / "d.png")) is None
+
+
+def test_reset_for_a_new_page(tmp_path):
+    with FrameEncoder() as encoder:
+        encoder.submit(frame("red"), str(tmp_path / "page1.png"))
+        encoder.reset()
+        assert encoder.submit(frame("red"), str(tmp_path / "page2.png"))
+    assert encoder.dropped == 0
+
+
+@pytest.mark.parametrize("fmt, extension, image_format", [("png", ".png", "PNG"), ("webp", ".webp", "WEBP"),
+                                                          ("jpeg", ".jpg", "JPEG")])
+def test_extension_of_the_format(tmp_path, fmt, extension, image_format):
+    if fmt == "webp" and not features.check("webp"):
+        pytest.skip("PIL without WebP")
+    with FrameEncoder(fmt=fmt) as encoder:
+        file_path = encoder.submit(frame("red").convert("RGBA"), str(tmp_path / "scr0.png"))
+    assert file_path == str(tmp_path / ("scr0" + extension))
+    with Image.open(file_path) as image:
+        assert image.format == image_format
+
+
+def test_unsupported_format():
+    with pytest.raises(ValueError):
+        FrameEncoder(fmt="bmp")
+
+
+def test_capture_waits_while_the_queue_is_full(tmp_path, monkeypatch):
+    release = threading.Event()
+    real_encode = frame_encoder.encode_image
+
+    def slow_encode(*args):
+        release.wait(5)
+        return real_encode(*args)
+
+    monkeypatch.setattr(frame_encoder, "encode_image", slow_encode)
+    encoder = FrameEncoder(workers=1, queue_size=2)
+    encoder.submit(frame("red"), str(tmp_path / "a.png"))
+    encoder.submit(frame("blue"), str(tmp_path / "b.png"))
+    third = threading.Thread(target=encoder.submit, args=(frame("green"), str(tmp_path / "c.png")))
+    third.start()
+    third.join(0.3)
+    assert third.is_alive()  # (two frames in flight - the third one waits)
+    release.set()
+    third.join(5)
+    assert not third.is_alive()
+    encoder.close()
+    assert encoder.saved == 3
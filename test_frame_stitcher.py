@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'frame_stitcher' - frames of a synthetic scrolled page (with a fixed header and footer) are
+stitched back into the page.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from frame_stitcher import find_shift, fixed_rows, plan_segments, row_profile, stitch_frames, frames_in_dir
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+WIDTH = 64
+HEADER = 30  # rows of the fixed header of the page
+FOOTER = 20  # rows of the fixed footer
+BODY = 150  # visible rows of the body (between the header and the footer)
+
+
+@pytest.fixture
+def page():
+    rng = np.random.default_rng(0)
+    return {"header": rng.integers(0, 256, (HEADER, WIDTH, 3), dtype=np.uint8),
+            "body": rng.integers(0, 256, (600, WIDTH, 3), dtype=np.uint8),
+            "footer": rng.integers(0, 256, (FOOTER, WIDTH, 3), dtype=np.uint8)}
+
+
+def save_frames(page, offsets, dir_path):
+    """
+    :param offsets: the scroll offsets of the frames (rows of the body)
+    :return: paths of the frames
+    """
+    frame_paths = []
+    for number, offset in enumerate(offsets):
+        frame = np.vstack([page["header"], page["body"][offset:offset + BODY], page["footer"]])
+        file_path = str(dir_path / ("page - scr%d.png" % number))
+        Image.fromarray(frame).save(file_path)
+        frame_paths.append(file_path)
+    return frame_paths
+
+
+def test_find_shift_of_noisy_frames():
+    rng = np.random.default_rng(1)
+    page_profile = rng.uniform(0, 255, (400, 32))
+    prev = page_profile[:200]
+    cur = page_profile[73:273] + rng.normal(0, 0.5, (200, 32))
+    assert find_shift(prev, cur, 0, 0) == 73
+    assert find_shift(prev, rng.uniform(0, 255, (200, 32)), 0, 0) is None  # (no overlap)
+
+
+def test_fixed_rows_and_blank_frames():
+    frame = np.zeros((100, WIDTH, 3), dtype=np.uint8)
+    moved = frame.copy()
+    moved[10:90] = 255
+    assert fixed_rows(row_profile(frame), row_profile(moved)) == (10, 10)
+    # (a blank body - ties go to the largest shift, so no content is lost)
+    assert find_shift(row_profile(frame), row_profile(frame), 0, 0) == 100 - 20
+
+
+def test_plan_segments_skips_duplicates_and_keeps_the_footer_once(page, tmp_path):
+    frame_paths = save_frames(page, [0, 100, 100, 180], tmp_path)
+    width, segments = plan_segments(frame_paths)
+    assert width == WIDTH
+    assert segments == [(0, 0, HEADER + BODY), (1, HEADER + BODY - 100, HEADER + BODY),
+                        (3, HEADER + BODY - 80, HEADER + BODY + FOOTER)]
+
+
+def test_stitch_frames_rebuilds_the_page(page, tmp_path):
+    frame_paths = save_frames(page, [0, 120, 240, 360, 450], tmp_path)
+    out_path = str(tmp_path / "page.png")
+    assert frames_in_dir(str(tmp_path)) == frame_paths
+    size = stitch_frames(frame_paths, out_path)
+    expected = np.vstack([page["header"], page["body"][:450 + BODY], page["footer"]])
+    assert size == (WIDTH, len(expected))
+    with Image.open(out_path) as image:
+        assert np.array_equal(np.asarray(image.convert("RGB")), expected)
+
+
+def test_stitch_frames_of_different_sizes(page, tmp_path):
+    save_frames(page, [0], tmp_path)
+    Image.new("RGB", (WIDTH + 1, 10)).save(str(tmp_path / "page - scr1.png"))
+    with pytest.raises(ValueError):
+        stitch_frames(frames_in_dir(str(tmp_path)), str(tmp_path / "page.png"))
+    assert stitch_frames([], str(tmp_path / "none.png")) is None
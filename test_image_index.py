@@ -0,0 +1,104 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'image_index' - the BK-tree (against a linear scan), and the index of a tree of images
+(updates, near-duplicate groups, searched images).
+"""
+
+import os
+import random
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from image_index import BKTree, ImageIndex, INDEX_NAME, images_in_tree, image_hash
+from frame_encoder import hamming
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+def test_bk_tree_search_matches_a_linear_scan():
+    rnd = random.Random(0)
+    base = [rnd.getrandbits(64) for _ in range(20)]
+    # (clusters of near hashes - a few flipped bits of each base hash)
+    values = [value ^ sum(1 << rnd.randrange(64) for _ in range(rnd.randrange(4))) for value in base * 10]
+    tree = BKTree()
+    for item, value in enumerate(values):
+        tree.add(value, item)
+    for query in base[:5] + [rnd.getrandbits(64)]:
+        for radius in (0, 3, 10):
+            expected = sorted((hamming(query, value), item) for item, value in enumerate(values)
+                              if hamming(query, value) <= radius)
+            assert sorted(tree.search(query, radius)) == expected
+    assert BKTree().search(0, 64) == []
+
+
+def save_image(dir_path, name, seed, size=(64, 48)):
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (6, 8, 3), dtype=np.uint8)  # (blocks - a stable perceptual hash)
+    image = Image.fromarray(small).resize(size, Image.NEAREST)
+    file_path = os.path.join(dir_path, name)
+    image.save(file_path)
+    return file_path
+
+
+@pytest.fixture
+def tree(tmp_path):
+    os.makedirs(str(tmp_path / "sub"))
+    paths = {"a": save_image(str(tmp_path), "a.png", 1), "b": save_image(str(tmp_path), "b.png", 2),
+             "c": save_image(str(tmp_path / "sub"), "c.jpg", 3)}
+    with Image.open(paths["a"]) as image:  # (a near-duplicate of 'a' - larger, and re-encoded)
+        paths["a2"] = os.path.join(str(tmp_path), "sub", "a2.jpg")
+        image.resize((128, 96), Image.BILINEAR).save(paths["a2"], quality=90)
+    (tmp_path / "notes.txt").write_text(u"not an image")
+    return str(tmp_path), paths
+
+
+def test_image_hash_of_near_duplicates(tree):
+    _, paths = tree
+    hashes = {}
+    for name, file_path in paths.items():
+        with Image.open(file_path) as image:
+            hashes[name] = image_hash(image)
+    assert hamming(hashes["a"][2], hashes["a2"][2]) <= 6
+    assert hamming(hashes["a"][2], hashes["b"][2]) > 6
+
+
+def test_update_hashes_only_new_and_changed_files(tree):
+    root_path, paths = tree
+    assert images_in_tree(root_path) == sorted(paths.values())
+    index = ImageIndex(os.path.join(root_path, INDEX_NAME))
+    assert index.update(root_path) == 4
+    assert index.update(root_path) == 0
+    os.remove(paths["b"])
+    assert index.update(root_path) == 0
+    assert len(index) == 3
+
+
+def test_groups_and_searched_images(tree):
+    root_path, paths = tree
+    index = ImageIndex(os.path.join(root_path, INDEX_NAME), threshold=6)
+    index.update(root_path)
+    groups = sorted(index.groups(paths.values()))
+    assert groups == sorted([[paths["a"], paths["a2"]], [paths["b"]], [paths["c"]]])
+
+    index.mark_searched([paths["a2"]])
+    assert index.is_searched(paths["a"])  # (a near-duplicate was searched)
+    assert not index.is_searched(paths["b"])
+    assert [paths["a2"], paths["a"]] in index.groups(paths.values())  # (the searched image represents its group)
+
+
+def test_save_and_load(tree):
+    root_path, paths = tree
+    index = ImageIndex(os.path.join(root_path, INDEX_NAME))
+    index.update(root_path)
+    index.mark_searched([paths["c"]])
+    index.save()
+    loaded = ImageIndex(os.path.join(root_path, INDEX_NAME))
+    assert loaded.paths == index.paths
+    assert np.array_equal(loaded.hashes, index.hashes)
+    assert loaded.is_searched(paths["c"])
+    assert loaded.update(root_path) == 0
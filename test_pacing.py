@@ -0,0 +1,96 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'pacing' - the token bucket of a host, its AIMD rate, and the pacer of the hosts
+(with a fake clock - nothing sleeps).
+"""
+
+import pytest
+import pacing
+from pacing import HostBucket, Pacer, host_of, is_block_page
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+class FakeClock:
+
+    def __init__(self):
+        """
+        a clock that moves only when it sleeps
+        """
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(pacing, "time", fake_clock.time)
+    monkeypatch.setattr(pacing, "sleep", fake_clock.sleep)
+    return fake_clock
+
+
+def test_bucket_reserves_tokens_at_the_rate(clock):
+    bucket = HostBucket(delay=2.0, burst=1)
+    assert bucket.reserve() == 0.0  # (the burst)
+    assert bucket.reserve() == pytest.approx(2.0)
+    assert bucket.reserve() == pytest.approx(4.0)  # (the previous token is reserved)
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+
+
+def test_aimd_rate_is_clamped(clock):
+    bucket = HostBucket(delay=2.0, min_delay=1.0, max_delay=8.0)
+    bucket.good()
+    assert bucket.rate == pytest.approx(0.5 + pacing.INCREASE)
+    for _ in range(100):
+        bucket.good()
+    assert bucket.delay == pytest.approx(1.0)
+    for _ in range(10):
+        bucket.bad()
+    assert bucket.delay == pytest.approx(8.0)
+
+
+def test_bad_response_empties_the_bucket(clock):
+    bucket = HostBucket(delay=1.0, max_delay=4.0, burst=3)
+    bucket.bad()
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_pacer_waits_per_host(clock):
+    pacer = Pacer(delay=2.0, jitter=0)
+    assert pacer.wait("https://www.example.com/a") == 0.0
+    assert pacer.wait("https://other.test/") == 0.0
+    assert pacer.wait("http://example.com/b") == pytest.approx(2.0)
+    assert clock.slept == [pytest.approx(2.0)]
+
+
+def test_pacer_report_and_configure(clock):
+    pacer = Pacer(delay=2.0, slow=5.0)
+    assert pacer.report("example.com", latency=1.0)
+    assert not pacer.report("example.com", latency=6.0)
+    assert not pacer.report("example.com", ok=False)
+    assert not pacer.report("example.com", text="<h1>Too Many Requests</h1>")
+    assert pacer.bucket("example.com").delay > 2.0
+    pacer.configure("https://example.com/", delay=10.0)
+    assert pacer.bucket("www.example.com").delay == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize("target, host", [("https://www.Example.com:8080/path", "example.com"),
+                                          ("example.com", "example.com"), ("WWW.Test.org", "test.org")])
+def test_host_of(target, host):
+    assert host_of(target) == host
+
+
+def test_is_block_page():
+    assert is_block_page("Our systems have detected UNUSUAL TRAFFIC from your computer")
+    assert not is_block_page("<html>results</html>")
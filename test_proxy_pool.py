@@ -0,0 +1,78 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'proxy_pool' (an in-memory SQLite database).
+"""
+
+import pytest
+from proxy_pool import ProxyPool, parse_proxy_row
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+@pytest.fixture
+def pool():
+    proxy_pool = ProxyPool(":memory:", ttl=100, max_failures=2, alpha=0.5)
+    yield proxy_pool
+    proxy_pool.close()
+
+
+def row_of(pool, proxy):
+    return next(row for row in pool.stats() if row["proxy"] == proxy)
+
+
+def test_add_keeps_history_and_details(pool):
+    pool.add("1.1.1.1:80", country="US", https=True, seen_at=10)
+    pool.record_success("1.1.1.1:80", 1.0)
+    pool.add("1.1.1.1:80", seen_at=20)
+    row = row_of(pool, "1.1.1.1:80")
+    assert (row["country"], row["https"], row["last_seen"], row["successes"]) == ("US", 1, 20, 1)
+
+
+def test_seen_at_zero_is_kept(pool):
+    pool.add("1.1.1.1:80", seen_at=0)
+    assert row_of(pool, "1.1.1.1:80")["last_seen"] == 0
+
+
+def test_success_and_failure_upsert_unknown_proxies(pool):
+    pool.record_success("1.1.1.1:80", 2.0)
+    pool.record_failure("2.2.2.2:80")
+    assert len(pool) == 2
+    assert row_of(pool, "1.1.1.1:80")["successes"] == 1
+    failed = row_of(pool, "2.2.2.2:80")
+    assert (failed["failures"], failed["failures_in_row"]) == (1, 1)
+
+
+def test_latency_ewma(pool):
+    pool.record_success("1.1.1.1:80", 2.0)
+    pool.record_success("1.1.1.1:80", 4.0)
+    pool.record_success("1.1.1.1:80")  # (no sample - the EWMA is kept)
+    assert row_of(pool, "1.1.1.1:80")["latency_ewma"] == pytest.approx(3.0)
+
+
+def test_evict_stale_and_failing_proxies(pool):
+    pool.add("1.1.1.1:80", seen_at=1000)
+    pool.add("2.2.2.2:80", seen_at=1000)
+    pool.add("3.3.3.3:80", seen_at=500)  # (stale)
+    pool.record_failure("2.2.2.2:80")
+    pool.record_failure("2.2.2.2:80")  # (max_failures in a row)
+    pool.record_failure("1.1.1.1:80")
+    pool.record_success("1.1.1.1:80")  # (resets the failures in a row)
+    assert pool.evict(now=1050) == 2
+    assert pool.proxies() == ["1.1.1.1:80"]
+
+
+def test_proxies_healthiest_and_fastest_first(pool):
+    pool.record_success("1.1.1.1:80", 3.0)
+    pool.record_success("2.2.2.2:80", 1.0)
+    pool.record_failure("3.3.3.3:80")
+    assert pool.proxies() == ["2.2.2.2:80", "1.1.1.1:80", "3.3.3.3:80"]
+    assert pool.proxies(min_score=0.5) == ["2.2.2.2:80", "1.1.1.1:80"]
+
+
+def test_parse_proxy_row():
+    assert parse_proxy_row("1.2.3.4, 8080, US, United States, elite proxy, no, yes, 1 minute ago, ") == \
+        ("1.2.3.4:8080", "United States", "elite proxy", True)
+    assert parse_proxy_row("IP Address, Port, Code") is None
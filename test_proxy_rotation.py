@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'proxy_rotation' - the alias table, and the weighted/sticky draws of the rotation service.
+"""
+
+import random
+import pytest
+from proxy_rotation import AliasTable, RotationService
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+def table_probabilities(table):
+    """
+    :return: the exact probability of each index of an alias table (from its columns)
+    """
+    n = len(table.prob)
+    probabilities = [prob / n for prob in table.prob]
+    for i, prob in enumerate(table.prob):
+        probabilities[table.alias[i]] += (1.0 - prob) / n
+    return probabilities
+
+
+@pytest.mark.parametrize("weights", [[1, 1, 1, 1], [1, 2, 3, 4], [0, 5, 0, 1], [7], [0.001, 1000, 3.5]])
+def test_alias_table_is_proportional_to_the_weights(weights):
+    expected = [weight / float(sum(weights)) for weight in weights]
+    assert table_probabilities(AliasTable(weights)) == pytest.approx(expected)
+
+
+def test_alias_table_never_draws_a_zero_weight():
+    random.seed(1)
+    table = AliasTable([0, 3, 0, 1])
+    counts = [0] * 4
+    for _ in range(20000):
+        counts[table.draw()] += 1
+    assert counts[0] == counts[2] == 0
+    assert counts[1] / 20000.0 == pytest.approx(0.75, abs=0.02)
+
+
+def test_faster_and_healthier_proxies_get_more_weight():
+    service = RotationService(["fast:1", "slow:1", "failing:1"])
+    service.report("fast:1", True, 0.5)
+    service.report("slow:1", True, 3.0)
+    service.report("failing:1", False)
+    assert service.weight("fast:1") > service.weight("slow:1")
+    assert service.weight("slow:1") > service.weight("failing:1")
+
+
+def test_latency_ewma_and_unknown_proxies():
+    service = RotationService(["1.1.1.1:80"], alpha=0.5)
+    service.report("1.1.1.1:80", True, 2.0)
+    service.report("1.1.1.1:80", True, 4.0)
+    service.report("9.9.9.9:80", True, 1.0)  # (not in the rotation - ignored)
+    assert service.stats == {"1.1.1.1:80": [2, 0, 3.0]}
+
+
+def test_sticky_pairs_until_released():
+    random.seed(2)
+    service = RotationService(["%d.0.0.1:80" % i for i in range(10)], user_agents=["ua%d" % i for i in range(10)])
+    pair = service.draw("job")
+    assert all(service.draw("job") == pair for _ in range(20))
+    pairs = set()
+    for _ in range(20):
+        service.release("job")
+        pairs.add(service.draw("job"))
+    assert len(pairs) > 1
+
+
+def test_removed_proxy_is_not_drawn():
+    service = RotationService(["1.1.1.1:80", "2.2.2.2:80"])
+    service.draw("job")
+    service.remove_proxy("1.1.1.1:80")
+    assert "job" not in service.sticky or service.sticky["job"][0] == "2.2.2.2:80"
+    assert {service.draw_proxy() for _ in range(20)} == {"2.2.2.2:80"}
+
+
+def test_empty_service_and_socket_api_errors():
+    service = RotationService()
+    assert service.draw() == (None, None)
+    assert service.handle({"cmd": "draw"}) == {"proxy": None, "user_agent": None}
+    assert "error" in service.handle({"cmd": "unknown"})
@@ -0,0 +1,141 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'rotating_proxy' against two local stand-in upstream proxies (each one tags its responses with its name).
+"""
+
+import socket
+import threading
+import socketserver
+import pytest
+from rotating_proxy import RotatingProxy
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+TIMEOUT = 5  # max time (seconds) of a socket operation in the tests
+
+
+class StandInProxy(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, name):
+        """
+        a stand-in upstream proxy - answers plain requests with its name, and echoes the data of tunnels
+        (prefixed with its name)
+        :param name: the name of the proxy (bytes)
+        """
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.name = name
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def address(self):
+        return "127.0.0.1:%d" % self.server_address[1]
+
+
+class StandInHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        start_line = self.rfile.readline()
+        while self.rfile.readline() not in (b"\r\n", b"\n", b""):
+            pass  # (the headers)
+        if start_line.startswith(b"CONNECT"):
+            self.wfile.write(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            while True:
+                data = self.request.recv(1024)
+                if not data:
+                    break
+                self.wfile.write(self.server.name + b":" + data)
+        else:
+            self.wfile.write(b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\nConnection: close\r\n\r\n%s"
+                             % (len(self.server.name), self.server.name))
+
+
+@pytest.fixture
+def upstreams():
+    servers = [StandInProxy(b"A"), StandInProxy(b"B")]
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def start_proxy(upstreams, mode, **settings):
+    rotating_proxy = RotatingProxy([server.address for server in upstreams], port=0, mode=mode, **settings)
+    rotating_proxy.start()
+    return rotating_proxy
+
+
+def plain_get(address):
+    """
+    :return: the body of a plain http request through the proxy
+    """
+    host, port = address.rsplit(":", 1)
+    with socket.create_connection((host, int(port)), timeout=TIMEOUT) as sock:
+        sock.sendall(b"GET http://target.test/ HTTP/1.1\r\nHost: target.test\r\nConnection: close\r\n\r\n")
+        response = b""
+        while True:
+            chunk = sock.recv(1024)
+            if not chunk:
+                break
+            response += chunk
+    return response.split(b"\r\n\r\n", 1)[1]
+
+
+def open_tunnel(address):
+    """
+    :return: a socket of an https tunnel (HTTP CONNECT) through the proxy
+    """
+    host, port = address.rsplit(":", 1)
+    sock = socket.create_connection((host, int(port)), timeout=TIMEOUT)
+    sock.sendall(b"CONNECT target.test:443 HTTP/1.1\r\nHost: target.test:443\r\n\r\n")
+    assert sock.recv(1024).startswith(b"HTTP/1.1 200")
+    return sock
+
+
+def test_request_mode_rotates_on_every_request(upstreams):
+    rotating_proxy = start_proxy(upstreams, 'request')
+    try:
+        assert [plain_get(rotating_proxy.address) for _ in range(4)] == [b"A", b"B", b"A", b"B"]
+    finally:
+        rotating_proxy.stop()
+
+
+def test_count_mode_rotates_every_n_requests(upstreams):
+    rotating_proxy = start_proxy(upstreams, 'count', every=2)
+    try:
+        assert [plain_get(rotating_proxy.address) for _ in range(4)] == [b"A", b"A", b"B", b"B"]
+    finally:
+        rotating_proxy.stop()
+
+
+def test_sticky_mode_rotates_on_api_call(upstreams):
+    rotating_proxy = start_proxy(upstreams, 'sticky')
+    try:
+        assert plain_get(rotating_proxy.address) == b"A"
+        assert plain_get(rotating_proxy.address) == b"A"
+        assert rotating_proxy.rotate() == upstreams[1].address
+        assert plain_get(rotating_proxy.address) == b"B"
+    finally:
+        rotating_proxy.stop()
+
+
+def test_rotate_closes_open_tunnels(upstreams):
+    rotating_proxy = start_proxy(upstreams, 'sticky')
+    try:
+        sock = open_tunnel(rotating_proxy.address)
+        with sock:
+            sock.sendall(b"ping")
+            assert sock.recv(1024) == b"A:ping"
+            rotating_proxy.rotate()
+            assert sock.recv(1024) == b""  # (the tunnel of the old upstream proxy is closed)
+        with open_tunnel(rotating_proxy.address) as sock:
+            sock.sendall(b"ping")
+            assert sock.recv(1024) == b"B:ping"
+        assert not rotating_proxy.tunnels or set(rotating_proxy.tunnels) == {upstreams[1].address}
+    finally:
+        rotating_proxy.stop()
@@ -0,0 +1,126 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of the concurrent mode of 'scrape_artist_data' - the per-host limit of requests, and scraping artists
+with a stubbed session (no network).
+"""
+
+import os
+import threading
+from datetime import timedelta
+from time import sleep
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+pytest.importorskip("robobrowser")
+os.environ.setdefault("HOMEPATH", os.path.expanduser("~"))  # (the default files are on the Windows desktop)
+
+import scrape_artist_data
+from pacing import Pacer
+from scrape_artist_data import HostLimiter, scrape_artist, scrape_concurrently
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+SEARCH_PAGE = u"""<html><body><p class="serp-flat-list"><a href="artist/%s/1234">the artist</a></p></body></html>"""
+ARTIST_PAGE = u"""<html><body><div class="artist-bio">The bio of %s</div>
+<div class="clearfix"><div class="artist-album-label">Album</div>
+<table><tbody><tr><td>Song</td></tr></tbody></table></div></body></html>"""
+
+
+class StubResponse:
+
+    def __init__(self, url, text, status_code=200):
+        self.url = url
+        self.text = text
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.elapsed = timedelta(seconds=0.1)
+
+
+class StubSession:
+
+    def __init__(self, redirect_to=None):
+        """
+        a stand-in requests.Session - answers the search with a link to the artist, and the artist's page
+        :param redirect_to: the final URL of the search (after a redirect), or None
+        """
+        self.redirect_to = redirect_to
+        self.urls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, timeout=None):
+        with self.lock:
+            self.urls.append(url)
+        if "serp.php?st=" in url:
+            keyword = url.split("st=", 1)[1]
+            return StubResponse(self.redirect_to or url, SEARCH_PAGE % keyword)
+        return StubResponse(url, ARTIST_PAGE % url.rsplit("/", 2)[1])
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch, tmp_path):
+    monkeypatch.setattr(scrape_artist_data, "PACER", Pacer(delay=0.001, min_delay=0.001, burst=100, jitter=0))
+    monkeypatch.setattr(scrape_artist_data, "ARTISTS_PATH", str(tmp_path))
+
+
+def test_host_limiter_caps_concurrent_requests_per_host():
+    limiter = HostLimiter(per_host=2)
+    active = {"a.test": 0, "b.test": 0}
+    peak = {"a.test": 0, "b.test": 0}
+    lock = threading.Lock()
+
+    def request(url, host):
+        with limiter.slot(url):
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+            sleep(0.05)
+            with lock:
+                active[host] -= 1
+
+    threads = [threading.Thread(target=request, args=(url, host))
+               for url, host in [("https://www.a.test/%d" % i, "a.test") for i in range(6)]
+               + [("https://b.test/%d" % i, "b.test") for i in range(6)]]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == {"a.test": 2, "b.test": 2}
+    assert limiter.slot("http://a.test/") is limiter.slot("https://www.A.test/other")
+
+
+def test_scrape_artist_builds_the_search_url_and_follows_the_final_url(tmp_path):
+    session = StubSession(redirect_to="https://www.lyrics.com/search/results.php?st=Lady+Gaga")
+    assert scrape_artist(session, HostLimiter(), "Lady Gaga")
+    assert session.urls == ["https://www.lyrics.com/serp.php?st=Lady+Gaga",
+                            "https://www.lyrics.com/search/artist/Lady+Gaga/1234"]  # (relative to the redirect)
+    assert os.path.isfile(str(tmp_path / "Lady Gaga" / "Lady Gaga - bio.txt"))
+    assert os.path.isfile(str(tmp_path / "Lady Gaga" / "Lady Gaga - albums.csv"))
+
+
+def test_scrape_artist_without_results():
+    session = StubSession()
+    session.get = lambda url, timeout=None: StubResponse(url, u"<html><body>no results</body></html>")
+    assert not scrape_artist(session, HostLimiter(), "Nobody")
+
+
+def test_scrape_concurrently_dedups_and_isolates_failures(monkeypatch):
+    session = StubSession()
+    monkeypatch.setattr(scrape_artist_data, "new_session", lambda pool_size: session)
+    real_save_albums = scrape_artist_data.save_albums
+
+    def save_albums(soup_obj, keyword, exporter=None):
+        if keyword == "Broken":
+            raise IOError("disk full")
+        real_save_albums(soup_obj, keyword, exporter)
+
+    monkeypatch.setattr(scrape_artist_data, "save_albums", save_albums)
+    results = scrape_concurrently(["Lady Gaga", "Broken", "Lady Gaga", "x", "Michael Jackson"], workers=3)
+    assert results == {"Lady Gaga": True, "Broken": False, "Michael Jackson": True}
+    assert sum("serp.php" in url for url in session.urls) == 3  # (each artist is searched once)
@@ -0,0 +1,51 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'seen_set' - the Bloom filter that deduplicates streams of strings.
+"""
+
+from seen_set import SeenSet
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+def test_add_reports_new_items_once():
+    seen = SeenSet(capacity=1000)
+    assert seen.add("zuck")
+    assert not seen.add("zuck")
+    assert seen.add(b"other")
+    assert len(seen) == 2
+
+
+def test_seen_items_are_never_reported_as_new():
+    seen = SeenSet(capacity=1000)
+    items = ["user%d" % i for i in range(1000)]
+    for item in items:
+        seen.add(item)
+    assert all(item in seen for item in items)
+    assert not any(seen.add(item) for item in items)
+
+
+def test_false_positive_rate_at_full_capacity():
+    seen = SeenSet(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        seen.add("seen%d" % i)
+    false_positives = sum("new%d" % i in seen for i in range(10000))
+    assert false_positives < 200  # (about 1% expected)
+
+
+def test_size_is_fixed_by_the_capacity():
+    seen = SeenSet(capacity=1000, error_rate=1e-6)
+    size = len(seen.bits)
+    for i in range(5000):
+        seen.add("user%d" % i)
+    assert len(seen.bits) == size
+    assert seen.num_hashes == 20
+
+
+def test_false_positive_rate_climbs_past_the_capacity():
+    seen = SeenSet(capacity=1000, error_rate=1e-3)
+    false_positives = sum(not seen.add("user%d" % i) for i in range(3000))
+    assert false_positives > 3000 * 1e-3  # (way more than the error rate - the filter must be sized from the input)
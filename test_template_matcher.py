@@ -0,0 +1,88 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'template_matcher' - the FFT NCC (against a direct computation), the shared prepared screen,
+and locating templates on saved captures.
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from template_matcher import Box, PreparedScreen, TemplateMatcher, ncc
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+def direct_ncc(image, template):
+    """
+    :return: the NCC scores of a template with each window of an image (computed window by window)
+    """
+    height, width = template.shape
+    zero_mean = template - template.mean()
+    scores = np.zeros((image.shape[0] - height + 1, image.shape[1] - width + 1))
+    for y in range(scores.shape[0]):
+        for x in range(scores.shape[1]):
+            window = image[y:y + height, x:x + width]
+            window = window - window.mean()
+            denominator = np.sqrt((window ** 2).sum() * (zero_mean ** 2).sum())
+            scores[y, x] = (window * zero_mean).sum() / denominator if denominator > 1e-6 else 0
+    return scores
+
+
+@pytest.fixture
+def screen():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (120, 160, 3), dtype=np.uint8)
+
+
+@pytest.fixture
+def templates(screen, tmp_path):
+    paths = {}
+    for name, (top, left) in (("first", (10, 20)), ("second", (70, 100))):
+        paths[name] = str(tmp_path / (name + ".png"))
+        Image.fromarray(screen[top:top + 24, left:left + 32]).save(paths[name])
+    return paths
+
+
+def test_ncc_matches_the_direct_computation():
+    rng = np.random.default_rng(1)
+    image = rng.uniform(0, 255, (30, 40))
+    image[:10, :10] = 7.0  # (flat windows - a zero denominator)
+    template = image[12:20, 15:26].copy()
+    zero_mean = template - template.mean()
+    scores = ncc(image, zero_mean, np.sqrt((zero_mean ** 2).sum()))
+    assert scores == pytest.approx(direct_ncc(image, template), abs=1e-6)
+    assert np.unravel_index(np.argmax(scores), scores.shape) == (12, 15)
+    assert ncc(image[:5, :5], zero_mean, 1.0) is None  # (a template larger than the image)
+
+
+def test_prepared_screen_shares_the_fft(screen):
+    gray = np.asarray(Image.fromarray(screen).convert("L"), dtype=np.float64)
+    small, large = gray[5:15, 5:20], gray[30:70, 40:100]
+    prepared = PreparedScreen(Image.fromarray(screen), scale=1, template_shapes=[small.shape, large.shape])
+    for template in (small, large):
+        zero_mean = template - template.mean()
+        norm = np.sqrt((zero_mean ** 2).sum())
+        assert prepared.ncc(zero_mean, norm) == pytest.approx(ncc(gray, zero_mean, norm), abs=1e-6)
+
+
+@pytest.mark.parametrize("scale", [1, 0.5])
+def test_locate_all_on_one_grab(screen, templates, scale):
+    matcher = TemplateMatcher(scale=scale)
+    found = matcher.locate_all(list(templates.values()), screen=Image.fromarray(screen))
+    assert found[templates["first"]] == Box(20, 10, 32, 24)
+    assert found[templates["second"]] == Box(100, 70, 32, 24)
+
+
+def test_locate_near_the_last_hit_and_in_a_region(screen, templates):
+    matcher = TemplateMatcher(scale=1, margin=8)
+    assert matcher.locate(templates["first"], screen=Image.fromarray(screen)) == Box(20, 10, 32, 24)
+    moved = np.roll(screen, (3, 5), axis=(0, 1))  # (moved a little - found in the neighbourhood of the last hit)
+    assert matcher.locate(templates["first"], screen=Image.fromarray(moved)) == Box(25, 13, 32, 24)
+    assert matcher.locate(templates["second"], screen=Image.fromarray(screen), region=(90, 60, 60, 50)) \
+        == Box(100, 70, 32, 24)
+    assert matcher.locate(templates["second"], screen=Image.fromarray(screen), region=(0, 0, 60, 50)) is None
@@ -0,0 +1,95 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'uid_cache' - positive/negative TTLs, batched 'last used' updates, and LRU eviction
+(with a fake clock).
+"""
+
+import pytest
+import uid_cache
+from uid_cache import UidCache
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+class FakeClock:
+
+    def __init__(self):
+        """
+        a clock that moves only when the test moves it
+        """
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake_clock = FakeClock()
+    monkeypatch.setattr(uid_cache, "time", fake_clock.time)
+    return fake_clock
+
+
+@pytest.fixture
+def cache(clock):
+    uid_cache_obj = UidCache(":memory:", ttl=100, negative_ttl=10, max_entries=3)
+    yield uid_cache_obj
+    uid_cache_obj.close()
+
+
+def last_used(cache, username):
+    return cache.conn.execute("SELECT last_used FROM uid_cache WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_lookup_of_positive_and_negative_results(cache, clock):
+    cache.put("zuck", "4")
+    cache.put("nobody", None)
+    assert cache.lookup("zuck") == (True, "4")
+    assert cache.lookup("nobody") == (True, None)
+    assert cache.lookup("missing") == (False, None)
+
+
+def test_ttl_and_negative_ttl_expiry(cache, clock):
+    cache.put("zuck", "4")
+    cache.put("nobody", "")
+    clock.now += 11
+    assert cache.lookup("nobody") == (False, None)  # (after the negative TTL)
+    assert cache.lookup("zuck") == (True, "4")
+    clock.now += 90
+    assert cache.lookup("zuck") == (False, None)  # (after the TTL)
+
+
+def test_put_overwrites_a_negative_result(cache, clock):
+    cache.put("zuck", None)
+    clock.now += 5
+    cache.put("zuck", "4")
+    clock.now += 50  # (past the negative TTL - the uid has the positive TTL)
+    assert cache.lookup("zuck") == (True, "4")
+    assert len(cache) == 1
+
+
+def test_last_used_is_updated_in_batches(cache, clock, monkeypatch):
+    monkeypatch.setattr(uid_cache, "TOUCH_BATCH", 2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    clock.now += 5
+    cache.lookup("a")
+    assert last_used(cache, "a") == 1000.0  # (not written yet)
+    cache.lookup("b")
+    assert (last_used(cache, "a"), last_used(cache, "b")) == (1005.0, 1005.0)
+    assert cache.touched == []
+
+
+def test_evict_keeps_the_most_recently_used(cache, clock):
+    for i, username in enumerate(["a", "b", "c", "d", "e"]):
+        clock.now = 1000.0 + i
+        cache.put(username, str(i))
+    clock.now = 1010.0
+    cache.lookup("a")  # (used lately - kept)
+    cache.put("nobody", None)
+    clock.now = 1021.0  # (past the negative TTL - expired)
+    assert cache.evict() == 3
+    assert sorted(row[0] for row in cache.conn.execute("SELECT username FROM uid_cache")) == ["a", "d", "e"]
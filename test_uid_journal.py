@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'uid_journal' - resuming a job from its journal (and starting over after a changed input,
+or a complete job).
+"""
+
+import os
+import pytest
+from uid_journal import UidJournal
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+@pytest.fixture
+def input_path(tmp_path):
+    f_path = tmp_path / "users.txt"
+    f_path.write_text(u"zuck\nother\nthird\n", encoding='utf-8')
+    return str(f_path)
+
+
+def test_resume_skips_done_and_retries_pending(input_path):
+    journal = UidJournal(input_path)
+    journal.record(0, "zuck", "4")
+    journal.record(1, "other", pending=True)
+    journal.record(2, "third", "")
+    journal.close()
+
+    journal = UidJournal(input_path)
+    try:
+        assert [journal.is_done(position) for position in range(4)] == [True, False, True, False]
+        assert journal.uids == ["4"]
+    finally:
+        journal.close()
+
+
+def test_torn_last_line_is_ignored(input_path):
+    journal = UidJournal(input_path)
+    journal.record(0, "zuck", "4")
+    journal.close()
+    with open(journal.journal_path, 'a', encoding='utf-8') as out_f:
+        out_f.write('{"pos": 1, "us')  # (a crash in the middle of a record)
+
+    journal = UidJournal(input_path)
+    journal.record(1, "other", "5")
+    journal.close()
+    journal = UidJournal(input_path)
+    try:
+        assert journal.uids == ["4", "5"]
+    finally:
+        journal.close()
+
+
+def test_changed_input_starts_a_new_journal(input_path):
+    journal = UidJournal(input_path)
+    journal.record(0, "zuck", "4")
+    journal.close()
+    with open(input_path, 'a', encoding='utf-8') as out_f:
+        out_f.write(u"fourth\n")
+
+    journal = UidJournal(input_path)
+    try:
+        assert not journal.is_done(0)
+        assert os.path.isfile(journal.journal_path + ".old")
+    finally:
+        journal.close()
+
+
+def test_complete_job_starts_over(input_path):
+    journal = UidJournal(input_path)
+    journal.record(0, "zuck", "4")
+    journal.record(1, "other", pending=True)
+    assert not journal.finish()  # (a pending username)
+    journal.record(1, "other", "5")
+    assert journal.finish()
+    journal.close()
+
+    journal = UidJournal(input_path)
+    try:
+        assert not journal.is_done(0)
+        assert journal.uids == []
+    finally:
+        journal.close()
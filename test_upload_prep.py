@@ -0,0 +1,101 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'upload_prep' - downscaling (with the EXIF orientation), stripping the metadata, the cache of the
+prepared images, and its eviction.
+"""
+
+import os
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import upload_prep
+from upload_prep import prepare_image, evict_cache, UploadPreprocessor
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+ORIENTATION = 0x0112  # the EXIF tag of the orientation
+
+
+@pytest.fixture
+def photo(tmp_path):
+    """
+    :return: path to a 3000x2000 camera-like JPEG - rotated 90 degrees (Orientation=6), with EXIF and ICC
+    """
+    exif = Image.Exif()
+    exif[ORIENTATION] = 6
+    exif[0x010F] = "Camera"  # (the make of the camera)
+    file_path = str(tmp_path / "photo.jpg")
+    Image.new("RGB", (3000, 2000), "red").save(file_path, "JPEG", exif=exif.tobytes(),
+                                               icc_profile=b"\0" * 128)
+    return file_path
+
+
+def test_orientation_is_applied_and_metadata_stripped(photo, tmp_path):
+    prepared_path = prepare_image(photo, cache_dir=str(tmp_path / "cache"), max_dim=1024, quality=85)
+    with Image.open(prepared_path) as image:
+        assert image.size == (683, 1024)
+        assert image.format == "JPEG"
+        assert not image.info.get("exif") and not image.info.get("icc_profile")
+        assert ORIENTATION not in image.getexif()
+    assert os.listdir(str(tmp_path / "cache")) == [os.path.basename(prepared_path)]
+
+
+def test_second_call_is_taken_from_the_cache(photo, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    prepared_path = prepare_image(photo, cache_dir=cache_dir)
+
+    def no_decoding(*args, **kwargs):
+        raise AssertionError("a cached image was decoded again")
+
+    monkeypatch.setattr(upload_prep.Image, "open", no_decoding)
+    assert prepare_image(photo, cache_dir=cache_dir) == prepared_path
+
+
+def test_cache_name_depends_on_the_settings(photo, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    names = {os.path.basename(prepare_image(photo, cache_dir=cache_dir, max_dim=max_dim, quality=quality))
+             for max_dim, quality in ((1024, 85), (512, 85), (1024, 70))}
+    assert len(names) == 3
+    assert all(name.endswith(".jpg") for name in names)
+
+
+def test_failed_save_leaves_no_part_file(photo, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    real_save = Image.Image.save
+
+    def broken_save(self, file_path, *args, **kwargs):
+        real_save(self, file_path, *args, **kwargs)  # (a partial file is written)
+        raise IOError("disk full")
+
+    monkeypatch.setattr(Image.Image, "save", broken_save)
+    with pytest.raises(IOError):
+        prepare_image(photo, cache_dir=cache_dir)
+    assert os.listdir(cache_dir) == []
+
+
+def test_evict_cache_removes_the_least_recently_used(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    for age, name in enumerate(["new.jpg", "older.jpg", "oldest.jpg"]):
+        file_path = cache_dir / name
+        file_path.write_bytes(b"\0" * 100)
+        os.utime(str(file_path), (1000 - age, 1000 - age))
+    (cache_dir / "notes.txt").write_bytes(b"\0" * 1000)  # (not a prepared image - kept)
+    assert evict_cache(str(cache_dir), max_size=150) == 2
+    assert sorted(os.listdir(str(cache_dir))) == ["new.jpg", "notes.txt"]
+    assert evict_cache(str(tmp_path / "missing")) == 0
+
+
+def test_preprocessor_streams_in_input_order(photo, tmp_path):
+    small_path = str(tmp_path / "small.png")
+    Image.new("RGBA", (100, 50)).save(small_path)
+    with UploadPreprocessor(workers=1, cache_dir=str(tmp_path / "cache")) as preprocessor:
+        results = list(preprocessor.imap([photo, small_path, photo]))
+    assert [image_path for image_path, _ in results] == [photo, small_path, photo]
+    assert results[0][1] == results[2][1]
+    with Image.open(results[1][1]) as image:
+        assert (image.size, image.mode) == ((100, 50), "RGB")
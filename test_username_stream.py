@@ -0,0 +1,68 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'username_stream' - the normalizer of usernames/uids/profile URLs, and the lazy streams of a dump.
+"""
+
+import pytest
+from username_stream import UID, USER, normalize_user, normalized_users, split_users, iter_lines, count_lines
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("100001234567890", (UID, "100001234567890")),
+    ("https://www.facebook.com/profile.php?id=100001234567890&ref=br_rs", (UID, "100001234567890")),
+    ("https://www.facebook.com/profile.php?id=abc", None),
+    ("https://www.facebook.com/zuck?ref=br_rs", (USER, "zuck")),
+    ("facebook.com/Zuck/about", (USER, "zuck")),
+    ("Mark Zuck", (USER, "markzuck")),
+    ("https://www.facebook.com/", None),
+    ("", None),
+])
+def test_normalize_user(line, expected):
+    assert normalize_user(line) == expected
+
+
+@pytest.fixture
+def dump_path(tmp_path):
+    f_path = tmp_path / "users.txt"
+    f_path.write_text(u"\ufeffZuck\n100001234567890\nfacebook.com/zuck\n\n"
+                      u"https://www.facebook.com/profile.php?id=100001234567890\nother\n", encoding='utf-8')
+    return str(f_path)
+
+
+def test_iter_lines_strips_the_bom(dump_path, tmp_path):
+    assert next(iter_lines(dump_path)) == "Zuck"
+    empty_path = tmp_path / "empty.txt"
+    empty_path.write_bytes(b"")
+    assert list(iter_lines(str(empty_path))) == []
+    assert list(iter_lines(str(tmp_path / "missing.txt"))) == []
+
+
+def test_normalized_users_drops_duplicates(dump_path):
+    assert list(normalized_users(dump_path)) == [(USER, "zuck"), (UID, "100001234567890"), (USER, "other")]
+
+
+def test_split_users_streams_are_re_iterable(dump_path, tmp_path):
+    uids, users = split_users(dump_path)
+    assert list(uids) == ["100001234567890"]
+    assert list(users) == ["zuck", "other"]
+    assert list(users) == ["zuck", "other"]
+    assert uids and users
+    empty_path = tmp_path / "empty.txt"
+    empty_path.write_bytes(b"")
+    assert not split_users(str(empty_path))[0]
+
+
+def test_seen_set_is_sized_from_the_input(tmp_path):
+    f_path = tmp_path / "big.txt"
+    f_path.write_text(u"".join(u"user%d\n" % i for i in range(30000)) + u"last", encoding='utf-8')
+    assert count_lines(str(f_path)) == 30001
+    # (a seen-set for 1000 lines drops new usernames as duplicates - past its capacity)
+    assert len(list(normalized_users(str(f_path), capacity=1000, error_rate=1e-3))) < 30001
+    uids, users = split_users(str(f_path))
+    assert sum(1 for _ in users) == 30001
+    assert users.capacity == 30001
@@ -0,0 +1,90 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""Tests of 'visual_diff' - the tiles of a capture, the changed tiles of a run, and the reconstruction of a run.
+"""
+
+import os
+import pytest
+
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("slugify")
+os.environ.setdefault("HOMEPATH", os.path.expanduser("~"))  # (the default store is on the Windows desktop)
+
+from visual_diff import VisualDiff, split_tiles
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+URL = "https://www.example.com/page?id=1"
+TILE = 16
+
+
+@pytest.fixture
+def visual_diff(tmp_path):
+    return VisualDiff(str(tmp_path), tile=TILE, tolerance=24, min_pixels=4)
+
+
+@pytest.fixture
+def capture():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (40, 50, 3), dtype=np.uint8)  # (3x4 tiles, the edge tiles are partial)
+
+
+def test_split_tiles_pads_the_edges(capture):
+    tiles = split_tiles(capture, TILE)
+    assert tiles.shape == (3, 4, TILE, TILE, 3)
+    assert np.array_equal(tiles[1, 2], capture[16:32, 32:48])
+    assert np.array_equal(tiles[2, 3, :8, :2], capture[32:40, 48:50])
+    assert not tiles[2, 3, 8:].any() and not tiles[2, 3, :, 2:].any()
+
+
+def test_first_run_is_all_changed(visual_diff, capture):
+    manifest = visual_diff.record(URL, Image.fromarray(capture), run="run1")
+    assert len(manifest["changed"]) == 12
+    assert manifest["changed_percent"] == 100.0
+    assert visual_diff.runs(URL) == ["run1"]
+
+
+def test_small_edit_marks_its_tile_only(visual_diff, capture):
+    visual_diff.record(URL, Image.fromarray(capture), run="run1")
+    edited = capture.copy()
+    edited[20:22, 40:42] ^= 0xFF  # (a small edit - 4 pixels of one tile)
+    noisy = edited.astype(np.int16)
+    noisy[:16] += 10  # (rendering noise - within the tolerance)
+    noisy[35, 5] += 100  # (a single noisy pixel - less than 'min_pixels')
+    manifest = visual_diff.record(URL, Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8)), run="run2")
+    assert manifest["changed"] == [[1, 2]]
+    assert manifest["changed_percent"] == round(100.0 * 16 * 16 / (40 * 50), 2)
+    assert manifest["grid"][0] == visual_diff.manifest(URL, "run1")["grid"][0]
+
+
+def test_reconstruct_any_run(visual_diff, capture):
+    visual_diff.record(URL, Image.fromarray(capture), run="run1")
+    edited = capture.copy()
+    edited[:16, :16] = 0
+    visual_diff.record(URL, Image.fromarray(edited), run="run2")
+    assert np.array_equal(np.asarray(visual_diff.reconstruct(URL, "run1")), capture)
+    assert np.array_equal(np.asarray(visual_diff.reconstruct(URL)), edited)
+    assert visual_diff.reconstruct(URL, "missing") is None
+
+
+def test_repeated_tiles_are_stored_once(visual_diff):
+    blank = np.zeros((32, 64, 3), dtype=np.uint8)
+    visual_diff.record(URL, Image.fromarray(blank), run="run1")
+    assert len(os.listdir(os.path.join(visual_diff.page_dir(URL), "tiles"))) == 1
+
+
+def test_page_dir_per_url(visual_diff):
+    page_dir = visual_diff.page_dir(URL)
+    assert os.path.basename(os.path.dirname(page_dir)) == "example-com"
+    assert page_dir != visual_diff.page_dir("https://www.example.com/page?id=2")
+
+
+def test_runs_in_the_same_second_are_kept(visual_diff, capture):
+    first = visual_diff.record(URL, Image.fromarray(capture))
+    second = visual_diff.record(URL, Image.fromarray(capture[::-1].copy()))
+    assert visual_diff.runs(URL) == [first["run"], second["run"]]  # (distinct names, in time order)
+    assert np.array_equal(np.asarray(visual_diff.reconstruct(URL, first["run"])), capture)
@@ -0,0 +1,149 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A persistent cache of facebook username --> uid resolutions, stored in a SQLite database on desktop.
+
+Every username that was resolved (through "https://findmyfbid.com/") is kept with its uid and the time it
+was resolved, so the next runs don't resolve it again. Usernames that couldn't be resolved are kept too,
+with a negative-result marker (a NULL uid), and are retried only after a shorter TTL.
+The cache is size-bounded - the least recently used entries are evicted.
+"""
+
+import os
+import sqlite3
+import argparse
+from time import time
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+CACHE_PATH = os.path.join(os.environ.get("HOMEPATH", os.path.expanduser("~")), "DESKTOP", "uid_cache.sqlite3")
+TTL = 90 * 24 * 60 * 60  # keep resolved uids for 90 days (seconds) - uids don't change
+NEGATIVE_TTL = 24 * 60 * 60  # retry usernames that couldn't be resolved after a day (seconds)
+MAX_ENTRIES = 5000000  # max number of usernames in cache
+TOUCH_BATCH = 1000  # number of cache hits to update (the time they were last used) in one transaction
+
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS uid_cache (
+    username TEXT PRIMARY KEY,
+    uid TEXT,
+    resolved_at REAL NOT NULL,
+    last_used REAL NOT NULL
+)"""
+CREATE_INDEX = "CREATE INDEX IF NOT EXISTS uid_cache_last_used ON uid_cache (last_used)"
+
+
+class UidCache:
+
+    def __init__(self, db_path=CACHE_PATH, ttl=TTL, negative_ttl=NEGATIVE_TTL, max_entries=MAX_ENTRIES):
+        """
+        creates new instance of UidCache Object (opens/creates the SQLite database)
+        :param db_path: path to the SQLite database file (string), or ':memory:'
+        :param ttl: time (in seconds) to keep a resolved uid
+        :param negative_ttl: time (in seconds) to keep a negative result (a username that couldn't be resolved)
+        :param max_entries: max number of usernames in cache
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.touched = []  # (last used, username) of cache hits, that are not updated in database yet
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # cheap commits (no full sync of the database on each one)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(CREATE_TABLE)
+            self.conn.execute(CREATE_INDEX)
+
+    def close(self):
+        """
+        close the database connection
+        :return:
+        """
+        if self.conn:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM uid_cache").fetchone()[0]
+
+    def lookup(self, username):
+        """
+        :param username: normalized facebook username (string)
+        :return: tuple (found, uid) - (True, uid) for a cached uid, (True, None) for a cached negative result,
+        or (False, None) - not in cache (or expired)
+        """
+        row = self.conn.execute("SELECT uid, resolved_at FROM uid_cache WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return False, None
+        uid, resolved_at = row
+        now = time()
+        if now - resolved_at > (self.ttl if uid is not None else self.negative_ttl):
+            return False, None  # expired
+        self.touched.append((now, username))
+        if len(self.touched) >= TOUCH_BATCH:
+            self.flush()
+        return True, uid
+
+    def flush(self):
+        """
+        updates the time that cache hits were last used (in one transaction)
+        :return:
+        """
+        if self.touched:
+            with self.conn:
+                self.conn.executemany("UPDATE uid_cache SET last_used = ? WHERE username = ?", self.touched)
+            self.touched = []
+
+    def put(self, username, uid):
+        """
+        stores a resolution in cache
+        :param username: normalized facebook username (string)
+        :param uid: the uid of the username (string), or None - a negative result (couldn't be resolved)
+        :return:
+        """
+        now = time()
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO uid_cache (username, uid, resolved_at, last_used) "
+                              "VALUES (?, ?, ?, ?)", (username, uid or None, now, now))
+
+    def evict(self):
+        """
+        removes expired entries, and the least recently used entries above 'max_entries'
+        :return: number of evicted entries
+        """
+        self.flush()
+        now = time()
+        with self.conn:
+            count = self.conn.execute("DELETE FROM uid_cache WHERE (uid IS NOT NULL AND resolved_at < ?) "
+                                      "OR (uid IS NULL AND resolved_at < ?)",
+                                      (now - self.ttl, now - self.negative_ttl)).rowcount
+            extra = len(self) - self.max_entries
+            if extra > 0:
+                count += self.conn.execute("DELETE FROM uid_cache WHERE username IN (SELECT username FROM uid_cache "
+                                           "ORDER BY last_used LIMIT ?)", (extra,)).rowcount
+        return count
+
+
+def main():
+    """
+    The main function - evicts expired entries, and looks up usernames in cache
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-c", "--CACHE", dest="db_path", type=str, default=CACHE_PATH,
+                        help="Enter a path to the uid cache (SQLite database)")
+    parser.add_argument("-u", "--USERS", dest="users", type=str, nargs='*', default=[],
+                        help="Enter usernames to look up in cache")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    cache = UidCache(args.db_path)
+    print("evicted %d entries, %d usernames in cache" % (cache.evict(), len(cache)))
+    for username in args.users:
+        found, uid = cache.lookup(username.lower())
+        print("%s --> %s" % (username, uid if found and uid else ("not found" if found else "not in cache")))
+    cache.close()
+
+
+if __name__ == '__main__':
+    main()
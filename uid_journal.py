@@ -0,0 +1,176 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""An append-only journal (checkpoint/resume) for long-running username --> uid jobs.
+
+Each username is recorded as soon as it is done - with its position in the input stream and its uid
+(one JSON object per line), so a crash (or a proxy dead-end after hours) doesn't lose the work.
+A restart reads the journal, skips everything that was already done, and continues from the last position.
+Usernames that were skipped (no working proxy) are recorded as pending, and are retried on restart.
+
+Writes are fsync-batched (every N records, or every few seconds), so the overhead per username is negligible.
+The first line of the journal describes the input file - a journal of a changed input file is not resumed.
+A job that is done (no pending usernames) is marked complete - a rerun of the same input file starts a new
+journal (so the negative results are retried, after they expire in the uid cache).
+"""
+
+import os
+import json
+from time import time
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+SYNC_EVERY = 100  # fsync the journal every 100 records
+SYNC_INTERVAL = 2.0  # ... or every 2 seconds (the first record after the interval)
+JOURNAL_SUFFIX = ".journal"
+
+
+class UidJournal:
+
+    def __init__(self, input_path, journal_path=None, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL):
+        """
+        creates new instance of UidJournal Object - loads the journal of the input file (if exists),
+        and opens it for appending
+        :param input_path: path to the input file (usernames)
+        :param journal_path: path to the journal file, or None - next to the input file ('<input>.journal')
+        :param sync_every: fsync the journal every N records
+        :param sync_interval: ... or every N seconds
+        """
+        self.input_path = input_path
+        self.journal_path = journal_path or input_path + JOURNAL_SUFFIX
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.last_position = -1  # the last position (in the input stream) that was recorded
+        self.pending = set()  # positions (up to the last position) that were skipped - to retry
+        self.uids = []  # uids that were resolved in previous runs (in input order)
+        self.unsynced = 0  # number of records since the last fsync
+        self.last_sync = time()
+
+        header = input_header(input_path)
+        if not self.load(header):
+            # a new journal (or a journal of a changed input file)
+            if os.path.exists(self.journal_path):
+                os.replace(self.journal_path, self.journal_path + ".old")
+            with open(self.journal_path, 'w', encoding='utf-8') as out_f:
+                out_f.write(json.dumps(header) + "\n")
+        self.out_f = open(self.journal_path, 'a', encoding='utf-8')
+        if not ends_with_newline(self.journal_path):
+            self.out_f.write("\n")  # end a torn last line (after a crash), so the next record starts a new line
+
+    def load(self, header):
+        """
+        reads the journal (a torn last line - after a crash - is ignored)
+        :param header: description of the current input file (dict)
+        :return: True - if the journal belongs to the current input file (and was loaded), or False
+        """
+        if not os.path.isfile(self.journal_path):
+            return False
+        uids = {}
+        with open(self.journal_path, encoding='utf-8') as in_f:
+            first_line = in_f.readline()
+            try:
+                if json.loads(first_line) != header:
+                    return False
+            except ValueError:
+                return False
+            for line in in_f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get("complete"):
+                    self.last_position, self.pending = -1, set()
+                    return False  # (a job that was done - a rerun starts over)
+                position = record["pos"]
+                self.last_position = max(self.last_position, position)
+                if record.get("pending"):
+                    self.pending.add(position)
+                else:
+                    self.pending.discard(position)
+                    if record.get("uid"):
+                        uids[position] = record["uid"]
+        self.uids = [uids[position] for position in sorted(uids)]
+        return True
+
+    def is_done(self, position):
+        """
+        :param position: position of a username in the input stream
+        :return: True - if the username was done in a previous run (skip it), or False
+        """
+        return position <= self.last_position and position not in self.pending
+
+    def record(self, position, user, uid=None, pending=False):
+        """
+        records a username that is done (or skipped)
+        :param position: position of the username in the input stream
+        :param user: the username (string)
+        :param uid: the uid (string), or None/empty string - no uid
+        :param pending: True - the username was skipped (retry it on restart), or False
+        :return:
+        """
+        record = {"pos": position, "user": user, "uid": uid or None}
+        if pending:
+            record["pending"] = True
+            self.pending.add(position)
+        else:
+            self.pending.discard(position)
+        self.last_position = max(self.last_position, position)
+        self.out_f.write(json.dumps(record) + "\n")
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every or time() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def finish(self):
+        """
+        marks the job as complete - if every username of the input was done (called after the last username)
+        :return: True - if the job is complete, or False - there are pending usernames (retried on restart)
+        """
+        if self.pending:
+            return False
+        self.out_f.write(json.dumps({"complete": True}) + "\n")
+        self.sync()
+        return True
+
+    def sync(self):
+        """
+        flushes the records to disk (fsync)
+        :return:
+        """
+        self.out_f.flush()
+        os.fsync(self.out_f.fileno())
+        self.unsynced = 0
+        self.last_sync = time()
+
+    def close(self):
+        """
+        syncs and closes the journal
+        :return:
+        """
+        if self.out_f:
+            self.sync()
+            self.out_f.close()
+            self.out_f = None
+
+
+def ends_with_newline(path):
+    """
+    :param path: path to a file
+    :return: True - if the file ends with a newline (or is empty), or False
+    """
+    with open(path, 'rb') as in_f:
+        in_f.seek(0, os.SEEK_END)
+        if in_f.tell() == 0:
+            return True
+        in_f.seek(-1, os.SEEK_END)
+        return in_f.read(1) == b"\n"
+
+
+def input_header(input_path):
+    """
+    :param input_path: path to the input file
+    :return: description of the input file (dict) - its path, size and modification time
+    """
+    stat = os.stat(input_path)
+    return {"input": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
@@ -0,0 +1,190 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A preprocessing stage of images before they are uploaded (reverse image search) - multi-megabyte camera images
+are downscaled and re-encoded, so the uploads are small and the searches are fast.
+
+Each image is downscaled to a max dimension (the aspect ratio is kept, and the EXIF orientation is applied first),
+its metadata is stripped (EXIF, GPS, ICC ...), and it's re-encoded as JPEG at a target quality. The images are
+streamed through a pool of processes (the decoding/encoding is CPU bound), and the results are cached by the
+content hash of the original file (and the settings) - an image that was prepared before isn't decoded again,
+even if it was renamed or copied. The cache (in the temp dir) is size-bounded - when the pool is closed,
+the least recently used prepared images above the max size are removed.
+
+An input from command prompt/terminal should look like:
+python your\\path\\to\\upload_prep.py -f "photo1.jpg" "photo2.jpg" -m 1024 -q 85
+"""
+
+import os
+import hashlib
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageOps
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+CACHE_PATH = os.path.join(tempfile.gettempdir(), "upload_cache")  # path to the cache of the prepared images
+MAX_DIM = 1024  # max width/height (pixels) of a prepared image
+QUALITY = 85  # JPEG quality (1-100) of a prepared image
+WORKERS = 2  # number of processes
+CHUNK_SIZE = 1 << 20  # the original file is hashed in chunks of 1MB
+CACHE_SIZE = 512 << 20  # max size (bytes) of the cache of the prepared images (512MB)
+
+
+class UploadPreprocessor:
+
+    def __init__(self, max_dim=MAX_DIM, quality=QUALITY, workers=WORKERS, cache_dir=CACHE_PATH,
+                 cache_size=CACHE_SIZE):
+        """
+        creates new instance of UploadPreprocessor Object - a pool of processes that prepares images for upload
+        :param max_dim: max width/height (pixels) of a prepared image
+        :param quality: JPEG quality (1-100)
+        :param workers: number of processes
+        :param cache_dir: path to the cache of the prepared images
+        :param cache_size: max size (bytes) of the cache (the least recently used images are removed on close)
+        """
+        self.max_dim = max_dim
+        self.quality = quality
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.cache_size = cache_size
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, image_path):
+        """
+        hands an image to the pool
+        :param image_path: path to the original image
+        :return: a Future of the path of the prepared image
+        """
+        return self.executor.submit(prepare_image, image_path, self.cache_dir, self.max_dim, self.quality)
+
+    def imap(self, image_paths):
+        """
+        streams images through the pool (a bounded number of images in flight - for long lists)
+        :param image_paths: iterable of paths to original images
+        :return: generator of tuples (path to the original image, path to the prepared image) - in input order
+        """
+        in_flight = deque()
+        for image_path in image_paths:
+            in_flight.append((image_path, self.submit(image_path)))
+            if len(in_flight) >= self.workers * 2:
+                image_path, future = in_flight.popleft()
+                yield image_path, future.result()
+        while in_flight:
+            image_path, future = in_flight.popleft()
+            yield image_path, future.result()
+
+    def close(self):
+        """
+        stops the pool, and trims the cache to its max size
+        :return:
+        """
+        self.executor.shutdown(wait=True)
+        evict_cache(self.cache_dir, self.cache_size)
+
+
+def content_hash(file_path):
+    """
+    :param file_path: path to a file
+    :return: the SHA-256 of the content of the file (hex string)
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as in_f:
+        for chunk in iter(lambda: in_f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def prepare_image(image_path, cache_dir=CACHE_PATH, max_dim=MAX_DIM, quality=QUALITY):
+    """
+    downscales an image, strips its metadata and re-encodes it as JPEG (or takes it from the cache)
+    :param image_path: path to the original image
+    :param cache_dir: path to the cache of the prepared images
+    :param max_dim: max width/height (pixels)
+    :param quality: JPEG quality (1-100)
+    :return: the path of the prepared image (in the cache)
+    """
+    cached_path = os.path.join(cache_dir, "%s-%d-q%d.jpg" % (content_hash(image_path), max_dim, quality))
+    if os.path.isfile(cached_path):
+        os.utime(cached_path)  # (used now - the least recently used images are evicted first)
+        return cached_path
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(image_path) as image:
+        image = ImageOps.exif_transpose(image)  # (the orientation is lost with the metadata - apply it first)
+        image.thumbnail((max_dim, max_dim), Image.LANCZOS)  # downscale (keeps the aspect ratio, never upscales)
+        if image.mode != "RGB":
+            image = image.convert("RGB")  # (JPEG has no alpha channel / palette)
+        # (a new file without 'exif'/'icc_profile' - the metadata is stripped)
+        part_path = "%s.%d.part" % (cached_path, os.getpid())  # (two processes might prepare the same content)
+        try:
+            image.save(part_path, "JPEG", quality=quality, optimize=True, progressive=True)
+        except Exception:
+            if os.path.exists(part_path):
+                os.remove(part_path)  # (no partial file is left in the cache)
+            raise
+    os.replace(part_path, cached_path)  # (a complete file, or no file - after a crash)
+    return cached_path
+
+
+def evict_cache(cache_dir=CACHE_PATH, max_size=CACHE_SIZE):
+    """
+    removes the least recently used prepared images, till the cache is within its max size
+    :param cache_dir: path to the cache of the prepared images
+    :param max_size: max size (bytes) of the cache
+    :return: number of removed images
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(".jpg"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    count = 0
+    for _, size, file_path in sorted(entries):  # (oldest first)
+        if total <= max_size:
+            break
+        try:
+            os.remove(file_path)
+        except OSError:
+            continue  # (removed by another process)
+        total -= size
+        count += 1
+    return count
+
+
+def main():
+    """
+    The main function - prepares images for upload, and prints the sizes before/after
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILES", dest="image_paths", type=str, nargs='+', required=True,
+                        help="Enter paths to images")
+    parser.add_argument("-m", "--MAX-DIM", dest="max_dim", type=int, default=MAX_DIM,
+                        help="Enter the max width/height (pixels) of a prepared image")
+    parser.add_argument("-q", "--QUALITY", dest="quality", type=int, default=QUALITY,
+                        help="Enter the JPEG quality (1-100) of a prepared image")
+    parser.add_argument("-w", "--WORKERS", dest="workers", type=int, default=WORKERS,
+                        help="Enter the number of processes")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    with UploadPreprocessor(max_dim=args.max_dim, quality=args.quality, workers=args.workers) as preprocessor:
+        for image_path, prepared_path in preprocessor.imap(args.image_paths):
+            print("%s (%d KB) --> %s (%d KB)" % (image_path, os.path.getsize(image_path) // 1024,
+                                                   prepared_path, os.path.getsize(prepared_path) // 1024))
+
+
+if __name__ == '__main__':
+    main()
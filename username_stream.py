@@ -0,0 +1,178 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""A streaming (lazy, memory-bounded) normalizer of facebook usernames, for huge username dumps.
+
+The input file is read lazily (through mmap), line after line, and each line is normalized:
+1. a numeric uid ('100001234567890'), or a profile URL that already includes the uid
+('https://www.facebook.com/profile.php?id=100001234567890&ref=br_rs') --> uid.
+2. a profile URL ('https://www.facebook.com/zuck?ref=br_rs', 'facebook.com/zuck/about') or a username
+('Zuck') --> username (lowercase - facebook usernames are case insensitive).
+
+Duplicates are dropped with a compact, memory-bounded seen-set, and the results are yielded as two
+streams: uids that are already numeric, and usernames that still need to be resolved.
+The seen-set is sized from the input (its number of lines - a fast first pass over the file), so its false
+positive rate holds for dumps of any size (a seen-set that is too small drops new usernames as duplicates).
+"""
+
+import os
+import mmap
+import argparse
+from seen_set import SeenSet, ERROR_RATE
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+UID = "uid"  # kind of a normalized line - a numeric uid
+USER = "user"  # kind of a normalized line - a username that needs to be resolved
+PROFILE_ID = "profile.php?id="
+FB_DOMAIN = "facebook.com/"
+URL_SEPARATORS = "/?&#"  # the username/uid ends at the first separator
+CHUNK_SIZE = 1 << 20  # the lines are counted in chunks of 1MB
+
+
+def iter_lines(f_path):
+    """
+    reads a text file lazily (through mmap), line after line
+    :param f_path: path to a file (string)
+    :return: generator of lines (strings, without end of line)
+    """
+    # file exists, is a regular file, and is not empty (an empty file can't be mapped)
+    if os.path.isfile(f_path) and os.path.getsize(f_path) > 0:
+        with open(f_path, 'rb') as in_f, mmap.mmap(in_f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for line in iter(mapped.readline, b""):
+                yield line.decode('utf-8', errors='replace').strip().lstrip(u'\ufeff')  # (and a BOM)
+
+
+def count_lines(f_path):
+    """
+    counts the lines of a text file (in chunks - without decoding it)
+    :param f_path: path to a file (string)
+    :return: number of lines (int)
+    """
+    if not os.path.isfile(f_path):
+        return 0
+    count = 0
+    last_chunk = b""
+    with open(f_path, 'rb') as in_f:
+        for chunk in iter(lambda: in_f.read(CHUNK_SIZE), b""):
+            count += chunk.count(b"\n")
+            last_chunk = chunk
+    return count + (1 if last_chunk and not last_chunk.endswith(b"\n") else 0)  # (a last line without a newline)
+
+
+def cut_at_separator(text):
+    """
+    :param text: part of a URL (string)
+    :return: the text until the first URL separator ('/', '?', '&' or '#')
+    """
+    for index, char in enumerate(text):
+        if char in URL_SEPARATORS:
+            return text[:index]
+    return text
+
+
+def normalize_user(line):
+    """
+    normalizes a line from a username dump
+    :param line: a username, uid, or profile URL (string)
+    :return: tuple (UID, uid) or (USER, username), or None - if the line doesn't contain a username/uid
+    """
+    fb_user = line.replace(" ", "")
+    if PROFILE_ID in fb_user:  # a part from URL that already includes the uid
+        fb_user = cut_at_separator(fb_user.split(PROFILE_ID, 1)[1])
+        return (UID, fb_user) if fb_user.isdigit() else None
+    if FB_DOMAIN in fb_user:  # given username might be within a facebook url
+        fb_user = cut_at_separator(fb_user.split(FB_DOMAIN, 1)[1])
+    if not fb_user:
+        return None
+    if fb_user.isdigit():  # the string is from digits only
+        return UID, fb_user
+    return USER, fb_user.lower()
+
+
+def normalized_users(f_path, kinds=(UID, USER), capacity=None, error_rate=ERROR_RATE):
+    """
+    reads a username dump lazily, normalizes each line, and drops duplicates
+    :param f_path: path to a file (string)
+    :param kinds: the kinds to yield (UID and/or USER)
+    :param capacity: expected number of unique lines (the memory size of the seen-set), or None - the number of
+    lines of the file
+    :param error_rate: false positive rate of the seen-set (a new item that is dropped as a duplicate)
+    :return: generator of tuples (kind, value)
+    """
+    seen = SeenSet(capacity=max(1, capacity or count_lines(f_path)), error_rate=error_rate)
+    for line in iter_lines(f_path):
+        normalized = normalize_user(line)
+        if normalized and normalized[0] in kinds and seen.add("%s:%s" % normalized):
+            yield normalized
+
+
+class UserStream:
+
+    def __init__(self, f_path, kind=USER, capacity=None, error_rate=ERROR_RATE):
+        """
+        creates new instance of UserStream Object - a lazy, re-iterable stream of normalized uids or usernames
+        (the file is read again on each iteration, so the memory use stays constant)
+        :param f_path: path to a file (string)
+        :param kind: UID - numeric uids, or USER - usernames that need to be resolved
+        :param capacity: expected number of unique lines (the memory size of the seen-set), or None - the number
+        of lines of the file (counted on the first iteration)
+        :param error_rate: false positive rate of the seen-set
+        """
+        self.f_path = f_path
+        self.kind = kind
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.not_empty = None  # True/False - if the stream has an item (checked once), or None - not checked yet
+
+    def __iter__(self):
+        if not self.capacity:
+            self.capacity = max(1, count_lines(self.f_path))  # (counted once - the stream is re-iterable)
+        for kind, value in normalized_users(self.f_path, kinds=(self.kind,), capacity=self.capacity,
+                                            error_rate=self.error_rate):
+            yield value
+
+    def __bool__(self):
+        # True - if the stream has at least one item (the file is scanned only on the first call)
+        if self.not_empty is None:
+            self.not_empty = any(True for _ in self)
+        return self.not_empty
+
+
+def split_users(f_path, capacity=None, error_rate=ERROR_RATE):
+    """
+    :param f_path: path to a file (string)
+    :param capacity: expected number of unique lines, or None - the number of lines of the file
+    :return: tuple of two lazy streams (uids, usernames) - see 'UserStream'
+    """
+    return (UserStream(f_path, kind=UID, capacity=capacity, error_rate=error_rate),
+            UserStream(f_path, kind=USER, capacity=capacity, error_rate=error_rate))
+
+
+def main():
+    """
+    The main function - normalizes a username dump into two text files (uids, and usernames to resolve)
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-f", "--FILE", dest="file_name", type=str, required=True,
+                        help="Enter a path to a text file with facebook usernames/uids/profile URLs")
+    parser.add_argument("-c", "--CAPACITY", dest="capacity", type=int, default=None,
+                        help="Enter the expected number of unique lines (default - the number of lines of the file)")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    base_path = os.path.splitext(args.file_name)[0]
+    uids, users = split_users(args.file_name, capacity=args.capacity)
+    for stream, suffix in ((uids, "_uids.txt"), (users, "_users.txt")):
+        count = 0
+        with open(base_path + suffix, 'w', encoding='utf-8') as out_f:
+            for value in stream:
+                out_f.write(value + "\n")
+                count += 1
+        print("%d %ss --> %s" % (count, stream.kind, base_path + suffix))
+
+
+if __name__ == '__main__':
+    main()
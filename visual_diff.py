@@ -0,0 +1,248 @@
+#!/usr/bin/python
+# -*- coding: UTF-8 -*-
+
+"""An incremental (visual-diff) store of repeated full-page screenshots of the same URLs.
+
+Each new capture of a page is cut into tiles (128x128 pixels), and compared with the previous run of the same URL
+with NumPy (the number of pixels of each tile that changed by more than a small per-pixel tolerance - a row of
+tiles at once), so a small edit (a digit, a date) marks its tile as changed. Only the changed tiles are saved,
+and each run is described by a manifest (JSON) - the grid of the tiles of the capture (tile digests), the changed
+tiles, and the changed area (percentage of the page). The tiles are stored by their digest (content-addressed),
+so a tile that repeats (blank areas, a tile that changed back) is stored once.
+
+The store of a page ('<diff dir>/<domain>/<slugified URL>/'):
+    tiles/<digest>.png - the tiles
+    runs/<run>.json - the manifests (a run is named by its time - 'YYYYmmdd-HHMMSS-<nanoseconds>')
+
+A full image of any run can be reconstructed from its manifest:
+python your\\path\\to\\visual_diff.py -u "https://selenium-python.readthedocs.io" -o "page.png"
+"""
+
+import os
+import json
+import hashlib
+import argparse
+from time import strftime, localtime, time_ns
+from urllib.parse import urlparse
+import numpy as np
+from PIL import Image
+from slugify import slugify
+
+__author__ = "KnifeF"
+__license__ = "MIT"
+__email__ = "knifef@protonmail.com"
+
+DIFF_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP", "all_screenshots", "diffs")
+TILE = 128  # the size (pixels) of a tile
+TOLERANCE = 24  # max difference (0-255, of any channel) of an unchanged pixel (ignores tiny rendering noise)
+MIN_PIXELS = 4  # min number of changed pixels of a changed tile (ignores single noisy pixels)
+MAX_SLUG = 100  # max length of the slugified part of a dir name
+
+
+class VisualDiff:
+
+    def __init__(self, diff_dir=DIFF_PATH, tile=TILE, tolerance=TOLERANCE, min_pixels=MIN_PIXELS):
+        """
+        creates new instance of VisualDiff Object
+        :param diff_dir: path to the dir of the store
+        :param tile: the size (pixels) of a tile
+        :param tolerance: max difference (0-255, of any channel) of an unchanged pixel
+        :param min_pixels: min number of changed pixels of a changed tile
+        """
+        self.diff_dir = diff_dir
+        self.tile = tile
+        self.tolerance = tolerance
+        self.min_pixels = min_pixels
+
+    def page_dir(self, current_url):
+        """
+        :param current_url: URL (string)
+        :return: the path of the store of the URL - '<domain>/<slugified URL>-<short hash>'
+        """
+        parsed = urlparse(current_url)
+        host = (parsed.hostname or "").lower()
+        slug = slugify(parsed.path + ("?" + parsed.query if parsed.query else ""), lowercase=False)[:MAX_SLUG]
+        digest = hashlib.sha1(current_url.encode('utf-8')).hexdigest()[:8]
+        return os.path.join(self.diff_dir, slugify(host[4:] if host.startswith("www.") else host),
+                            "%s-%s" % (slug or "index", digest))
+
+    def runs(self, current_url):
+        """
+        :param current_url: URL (string)
+        :return: the runs of the URL (list of run names - oldest first)
+        """
+        runs_dir = os.path.join(self.page_dir(current_url), "runs")
+        if not os.path.isdir(runs_dir):
+            return []
+        return sorted(file_name[:-5] for file_name in os.listdir(runs_dir) if file_name.endswith(".json"))
+
+    def manifest(self, current_url, run=None):
+        """
+        :param current_url: URL (string)
+        :param run: the name of the run, or None - the last run
+        :return: the manifest of the run (dict), or None - if there is no such run
+        """
+        if run is None:
+            runs = self.runs(current_url)
+            if not runs:
+                return None
+            run = runs[-1]
+        file_path = os.path.join(self.page_dir(current_url), "runs", run + ".json")
+        if not os.path.isfile(file_path):
+            return None
+        with open(file_path, encoding='utf-8') as in_f:
+            return json.load(in_f)
+
+    def record(self, current_url, image, run=None):
+        """
+        compares a new capture of a page with the last run, saves the changed tiles and the manifest of the run
+        :param current_url: URL (string)
+        :param image: PIL Image (the full-page capture)
+        :param run: the name of the run, or None - the current time
+        :return: the manifest of the run (dict) - with 'changed_percent' (the changed area of the page)
+        """
+        page_dir = self.page_dir(current_url)
+        for sub_dir in ("tiles", "runs"):
+            os.makedirs(os.path.join(page_dir, sub_dir), exist_ok=True)
+        array = np.asarray(image.convert("RGB"))
+        height, width = array.shape[:2]
+        tiles = split_tiles(array, self.tile)
+        rows, cols = tiles.shape[:2]
+
+        changed = np.ones((rows, cols), dtype=bool)
+        previous = self.manifest(current_url)
+        if previous is not None and previous["tile"] == self.tile:
+            prev_tiles = split_tiles(self.load_array(page_dir, previous), self.tile)
+            same_rows, same_cols = min(rows, prev_tiles.shape[0]), min(cols, prev_tiles.shape[1])
+            # the changed pixels of each tile (of the common part of the grids) - a row of tiles at once
+            for row in range(same_rows):
+                diff = np.abs(tiles[row, :same_cols].astype(np.int16)
+                              - prev_tiles[row, :same_cols].astype(np.int16)).max(axis=3)
+                changed[row, :same_cols] = (diff > self.tolerance).sum(axis=(1, 2)) >= self.min_pixels
+
+        grid = []
+        for row in range(rows):
+            grid.append([])
+            for col in range(cols):
+                if changed[row, col]:
+                    grid[row].append(self.save_tile(page_dir, tiles[row, col]))
+                else:
+                    grid[row].append(previous["grid"][row][col])  # (the tile of the last run)
+
+        # the changed area - the pixels of the changed tiles within the page (the edge tiles are partial)
+        tile_heights = np.minimum(self.tile, height - np.arange(rows) * self.tile)
+        tile_widths = np.minimum(self.tile, width - np.arange(cols) * self.tile)
+        changed_area = int((np.outer(tile_heights, tile_widths) * changed).sum())
+        manifest = {"url": current_url, "run": run or new_run_name(os.path.join(page_dir, "runs")),
+                    "width": width, "height": height, "tile": self.tile, "grid": grid,
+                    "changed": np.argwhere(changed).tolist(),
+                    "changed_percent": round(100.0 * changed_area / max(width * height, 1), 2)}
+        file_path = os.path.join(page_dir, "runs", manifest["run"] + ".json")
+        with open(file_path + ".part", 'w', encoding='utf-8') as out_f:
+            json.dump(manifest, out_f)
+        os.replace(file_path + ".part", file_path)  # (a complete manifest, or no manifest - after a crash)
+        return manifest
+
+    def save_tile(self, page_dir, tile):
+        """
+        saves a tile by its digest (if it's not stored yet)
+        :param page_dir: the path of the store of the page
+        :param tile: NumPy array (tile, tile, 3)
+        :return: the digest of the tile (string)
+        """
+        digest = hashlib.blake2b(tile.tobytes(), digest_size=16).hexdigest()
+        file_path = os.path.join(page_dir, "tiles", digest + ".png")
+        if not os.path.isfile(file_path):
+            Image.fromarray(tile).save(file_path + ".part", "PNG")
+            os.replace(file_path + ".part", file_path)
+        return digest
+
+    def load_array(self, page_dir, manifest):
+        """
+        :param page_dir: the path of the store of the page
+        :param manifest: the manifest of a run (dict)
+        :return: NumPy array (height, width, 3) of the full image of the run
+        """
+        tile = manifest["tile"]
+        grid = manifest["grid"]
+        canvas = np.zeros((len(grid) * tile, len(grid[0]) * tile if grid else 0, 3), dtype=np.uint8)
+        loaded = {}  # digest --> tile (a repeated tile is read once)
+        for row, digests in enumerate(grid):
+            for col, digest in enumerate(digests):
+                if digest not in loaded:
+                    with Image.open(os.path.join(page_dir, "tiles", digest + ".png")) as tile_image:
+                        loaded[digest] = np.asarray(tile_image.convert("RGB"))
+                canvas[row * tile:(row + 1) * tile, col * tile:(col + 1) * tile] = loaded[digest]
+        return canvas[:manifest["height"], :manifest["width"]]
+
+    def reconstruct(self, current_url, run=None):
+        """
+        reconstructs the full image of a run
+        :param current_url: URL (string)
+        :param run: the name of the run, or None - the last run
+        :return: PIL Image, or None - if there is no such run
+        """
+        manifest = self.manifest(current_url, run)
+        if manifest is None:
+            return None
+        return Image.fromarray(self.load_array(self.page_dir(current_url), manifest))
+
+
+def new_run_name(runs_dir):
+    """
+    :param runs_dir: the path of the manifests of a page
+    :return: the name of a new run - its time, to the nanosecond (the names sort in time order, and two runs
+    in the same second don't overwrite each other), that is not used in the dir
+    """
+    now = time_ns()
+    while True:
+        run = "%s-%09d" % (strftime("%Y%m%d-%H%M%S", localtime(now // 10 ** 9)), now % 10 ** 9)
+        if not os.path.exists(os.path.join(runs_dir, run + ".json")):
+            return run
+        now += 1  # (a clock with a coarse resolution)
+
+
+def split_tiles(array, tile):
+    """
+    :param array: NumPy array (height, width, 3)
+    :param tile: the size (pixels) of a tile
+    :return: NumPy array (rows, cols, tile, tile, 3) - the tiles of the image (the edges are padded with zeros)
+    """
+    height, width = array.shape[:2]
+    rows, cols = -(-height // tile), -(-width // tile)
+    padded = np.zeros((rows * tile, cols * tile, 3), dtype=np.uint8)
+    padded[:height, :width] = array
+    return padded.reshape(rows, tile, cols, tile, 3).swapaxes(1, 2)
+
+
+def main():
+    """
+    The main function - reconstructs the full image of a run of a URL (or lists the runs of the URL)
+    :return:
+    """
+    parser = argparse.ArgumentParser()  # Object for parsing command line strings into Python objects.
+    parser.add_argument("-u", "--URL", dest="given_url", type=str, required=True,
+                        help="Enter the URL of the page")
+    parser.add_argument("-r", "--RUN", dest="run", type=str, default=None,
+                        help="Enter the name of the run (default - the last run)")
+    parser.add_argument("-o", "--OUTPUT", dest="out_path", type=str, default=None,
+                        help="Enter a path to save the full image (without it - the runs are listed)")
+    parser.add_argument("-d", "--DIR", dest="diff_dir", type=str, default=DIFF_PATH,
+                        help="Enter a path to the dir of the diff store")
+    args = parser.parse_args()  # Command line argument parsing methods
+
+    visual_diff = VisualDiff(args.diff_dir)
+    if not args.out_path:
+        for run in visual_diff.runs(args.given_url):
+            print("%s - %.2f%% changed" % (run, visual_diff.manifest(args.given_url, run)["changed_percent"]))
+        return
+    image = visual_diff.reconstruct(args.given_url, args.run)
+    if image is None:
+        print("no such run of %s" % args.given_url)
+    else:
+        image.save(args.out_path)
+        print("saved --> %s" % args.out_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -14,17 +14,40 @@ python your\path\to\web_pages_screenshots.py -u "https://selenium-python.readthe
 
 python your\path\to\web_pages_screenshots.py --URL
 "https://selenium-python.readthedocs.io" "https://www.seleniumhq.org/docs/"
+
+In headless mode ('-H'), each page is captured in one call - the whole document, not only the visible part
+(Firefox full-page screenshot, or Chrome DevTools 'captureBeyondViewport') - one image per URL,
+without scrolling and without grabbing the desktop:
+python your\path\to\web_pages_screenshots.py -H -u "https://selenium-python.readthedocs.io"
+
+The screenshots are encoded off the capture thread (PNG, WebP or JPEG - '-F webp -q 80'), and frames that
+are identical to the previous one (or within a dHash threshold of it - '-t 4') are dropped.
+
+With '-S', the overlapping screenshots of each scrolled page are stitched into one tall image
+('all_screenshots/<title>.png' - the fixed header of the screen is kept once):
+python your\path\to\web_pages_screenshots.py -S -u "https://selenium-python.readthedocs.io"
+
+With '-D' (headless mode), each capture is compared with the previous run of the same URL - only the changed
+tiles are saved (with a manifest), and the changed area of each page is printed (see 'visual_diff'):
+python your\path\to\web_pages_screenshots.py -H -D -u "https://selenium-python.readthedocs.io"
 """
 
 import os
+import io
 import sys
+import base64
 import argparse
 import pyscreenshot as img_grab
 from selenium import webdriver
 from validators import url
 from slugify import slugify
-from time import sleep
-from random import randint
+from pacing import PACER
+from page_waits import settle
+from driver_pool import chrome_options, execute_cdp
+from frame_encoder import FrameEncoder, FORMATS
+from frame_stitcher import stitch_dir
+from visual_diff import VisualDiff
+from PIL import Image
 
 __author__ = "KnifeF"
 __license__ = "MIT"
@@ -32,6 +55,13 @@ __email__ = "knifef@protonmail.com"
 
 # path to WebDriver for Firefox ('geckodriver.exe')
 GECKO_DRIVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geckodriver')
+CHROME_DRIVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chromedriver')
+WINDOW_WIDTH = 1920  # the width (pixels) of a headless browser window
+WINDOW_HEIGHT = 1080
+MAX_PAGE_HEIGHT = 32000  # max height (pixels) of a full-page screenshot (a limit of the browsers' textures)
+# the height of the whole document (pixels)
+SCROLL_HEIGHT_SCRIPT = "return Math.max(document.documentElement.scrollHeight, " \
+                       "document.body ? document.body.scrollHeight : 0);"
 SCREENSHOTS_PATH = os.path.join(os.environ["HOMEPATH"], "DESKTOP", "all_screenshots")
 TEST_URLS = ['https://selenium-python.readthedocs.io',
              'https://selenium-python.readthedocs.io/installation.html']
@@ -39,11 +69,21 @@ TEST_URLS = ['https://selenium-python.readthedocs.io',
 
 class WebPagesScreenshots:
 
-    def __init__(self, url_addresses=None):
+    def __init__(self, url_addresses=None, headless=False, browser='firefox', encoder=None, visual_diff=None):
         """
         creates new instance of WebPagesScreenshots Object
         :param url_addresses: URL addresses to take screenshots from (list)
+        :param headless: True - a headless browser, that captures each page in one full-page screenshot,
+        or False - a visible browser, that scrolls each page and grabs the screen
+        :param browser: 'firefox' or 'chrome' (the browser of the headless mode)
+        :param encoder: FrameEncoder object (encodes & saves the screenshots off the capture thread),
+        or None - each screenshot is saved as PNG on the capture thread
+        :param visual_diff: VisualDiff object (headless mode - saves only the tiles that changed since the
+        previous run of the URL), or None - full images
         """
+        self.headless = headless
+        self.encoder = encoder
+        self.visual_diff = visual_diff
         self.url_addresses = []
         if url_addresses and isinstance(url_addresses, list):  # param is a list (not None)
             # trying to initialize list from given param (if the list includes URLs)
@@ -55,19 +95,56 @@ class WebPagesScreenshots:
         if not self.url_addresses:
             self.url_addresses = TEST_URLS  # initialize list of URLs from a default list
 
-        # Creates a new instance of the firefox driver.
-        self.driver = webdriver.Firefox(executable_path=GECKO_DRIVER_PATH)
-        self.driver.maximize_window()  # Maximizes the current window that webdriver is using
+        if headless:
+            self.driver = new_headless_driver(browser)
+        else:
+            # Creates a new instance of the firefox driver.
+            self.driver = webdriver.Firefox(executable_path=GECKO_DRIVER_PATH)
+            self.driver.maximize_window()  # Maximizes the current window that webdriver is using
 
         if not create_dir(SCREENSHOTS_PATH):  # create dir/dirs if not exist
             # Exit the interpreter by raising SystemExit(status).
             sys.exit("Error: failed to create a directory on desktop.")
 
+    def grab_full_page(self):
+        """
+        captures the whole page (headless mode) in one screenshot, and saves it to a PNG file
+        (named by the title of the page) - or only its changed tiles (diff mode)
+        :return: the path of the image file (diff mode - the manifest of the run), or None
+        """
+        if self.driver:
+            page_title = slugify(self.driver.title, lowercase=False)  # Make a slug from the given text
+            file_path = os.path.join(SCREENSHOTS_PATH, "%s.png" % (page_title or "untitled"))
+            try:
+                png = full_page_png(self.driver)
+            except Exception as e:
+                print("An error occurred while trying to take a screenshot --> %s" % e)
+                return None
+            if self.visual_diff is not None:
+                manifest = self.visual_diff.record(self.driver.current_url, Image.open(io.BytesIO(png)))
+                print("<-- %.2f%% changed (%d tiles) --> %s" % (manifest["changed_percent"], len(manifest["changed"]),
+                                                               self.driver.current_url))
+                return os.path.join(self.visual_diff.page_dir(self.driver.current_url), "runs",
+                                    manifest["run"] + ".json")
+            if self.encoder is not None:
+                self.encoder.reset()  # (a new page - not compared with the screenshot of the previous page)
+                # (decoded here, and encoded to the required format off the capture thread)
+                file_path = self.encoder.submit(Image.open(io.BytesIO(png)), file_path)
+                if file_path is None:
+                    print("<-- dropped page (a duplicate) --> ", self.driver.current_url)
+                    return None
+            else:
+                with open(file_path, 'wb') as out_f:
+                    out_f.write(png)
+            print("<-- captured page --> ", self.driver.current_url)
+            return file_path
+        return None
+
     def scroll_down_and_grab_screen(self):
         """
         scrolling page down with selenium WebDriver to get more data from target url,
         and taking screenshots from page.
-        :return:
+        :return: the path of the dir of the screenshots, or None
         """
         if self.driver:
             page_title = self.driver.title  # Returns the title of the current page
@@ -76,7 +153,9 @@ class WebPagesScreenshots:
             # creates dir path to save web page screenshots
             current_dir_path = os.path.join(SCREENSHOTS_PATH, page_title)
             if not create_dir(current_dir_path):
-                return
+                return None
+            if self.encoder is not None:
+                self.encoder.reset()  # (the first screenshot of the page is not compared with the previous page)
 
             # get height of the current window and divide by 2
             half_window_height = str(self.driver.get_window_size()['height']/2)
@@ -93,16 +172,15 @@ class WebPagesScreenshots:
                 if count == 0:
                     # takes a screenshot and saves image to file
                     take_a_screenshot(os.path.join(current_dir_path,
-                                                   "%s - %s.png" % (page_title, "scr"+str(scr))))
+                                                   "%s - %s.png" % (page_title, "scr"+str(scr))),
+                                      encoder=self.encoder)
                     scr += 1
 
-                sleep(1)  # delay in seconds
-
                 # Scroll down to bottom
                 self.driver.execute_script("window.scrollBy(0,"+half_window_height+");")
 
-                # Wait to load page
-                sleep(randint(1, 2))  # delay in seconds
+                # Wait to load page (till lazy-loaded content stops changing the DOM, at most 3 seconds)
+                settle(self.driver, timeout=3, quiet=0.3)
 
                 # get height of 'window.pageYOffset' after scrolling, and compare with last page's scroll height
                 new_scrolling_height = self.driver.execute_script("return window.pageYOffset;")
@@ -111,26 +189,77 @@ class WebPagesScreenshots:
                 if new_scrolling_height == last_scrolling_height:
                     count += 1
                     if count >= 3:
-                        sleep(randint(1, 2))
                         break  # exit while-loop
                 else:
                     count = 0
                 # updating the last scrolled height, before another scrolling
                 last_scrolling_height = new_scrolling_height
             print("<-- finished scrolling page --> ", self.driver.current_url)
+            return current_dir_path
+        return None
 
 
-def take_a_screenshot(file_path):
+def new_headless_driver(browser='firefox'):
+    """
+    Creates a new instance of a headless browser (Firefox or Chrome)
+    :param browser: 'firefox' or 'chrome'
+    :return: the WebDriver
+    """
+    if browser == 'chrome':
+        options = chrome_options(arguments=["--window-size=%d,%d" % (WINDOW_WIDTH, WINDOW_HEIGHT),
+                                            "--hide-scrollbars"])
+        return webdriver.Chrome(executable_path=CHROME_DRIVER_PATH, chrome_options=options)
+    options = webdriver.FirefoxOptions()
+    options.add_argument("-headless")  # headless browser
+    driver = webdriver.Firefox(executable_path=GECKO_DRIVER_PATH, firefox_options=options)
+    driver.set_window_size(WINDOW_WIDTH, WINDOW_HEIGHT)
+    return driver
+
+
+def full_page_png(driver):
+    """
+    captures the whole document (not only the visible part) in one screenshot
+    (Firefox - the full-page screenshot of geckodriver, Chrome - DevTools 'captureBeyondViewport')
+    :param driver: the WebDriver
+    :return: PNG image (bytes)
+    """
+    # the height of the document is read once (instead of scrolling till the height stops changing)
+    page_height = driver.execute_script(SCROLL_HEIGHT_SCRIPT)
+    height = min(page_height, MAX_PAGE_HEIGHT)
+    if isinstance(driver, webdriver.Firefox):
+        # webdriver.Firefox (selenium 3) doesn't know the geckodriver endpoint - register it
+        driver.command_executor._commands["fullPageScreenshot"] = ("GET", "/session/$sessionId/moz/screenshot/full")
+        png = base64.b64decode(driver.execute("fullPageScreenshot")["value"])
+        if page_height <= height:
+            return png
+        # (geckodriver has no clip - a very tall page is cropped to the max height after the capture)
+        with Image.open(io.BytesIO(png)) as image:
+            out = io.BytesIO()
+            image.crop((0, 0, image.width, image.height * height // page_height)).save(out, "PNG")
+            return out.getvalue()
+    width = driver.execute_script("return document.documentElement.scrollWidth;")
+    result = execute_cdp(driver, "Page.captureScreenshot",
+                         {"format": "png", "captureBeyondViewport": True, "fromSurface": True,
+                          "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1}})
+    return base64.b64decode(result["data"])
+
+
+def take_a_screenshot(file_path, encoder=None):
     """
     takes a screenshot and saves image to file
     :param file_path: the path of the output file (string)
+    :param encoder: FrameEncoder object (the image is saved off the capture thread, and dropped if it's
+    a duplicate of the previous screenshot), or None
     :return:
     """
     try:
         # Copy the contents of the screen to PIL image memory (grab full screen)
         im = img_grab.grab()
-        # Saves this image under the given filename.
-        im.save(file_path)
+        if encoder is not None:
+            encoder.submit(im, file_path)
+        else:
+            # Saves this image under the given filename.
+            im.save(file_path)
     except (KeyError, IOError, Exception):
         print("An error occurred while trying to take a screenshot")
         pass
@@ -186,19 +315,59 @@ def main():
         # Adding argument actions
         parser.add_argument("-u", "--URL", dest="given_urls", type=str, nargs='*',
                             help="Enter URLs to take screenshots from the required web pages")
+        parser.add_argument("-H", "--HEADLESS", dest="headless", action="store_true",
+                            help="Capture each page in one full-page screenshot, with a headless browser")
+        parser.add_argument("-b", "--BROWSER", dest="browser", type=str, default="firefox",
+                            choices=["firefox", "chrome"], help="Enter the browser of the headless mode")
+        parser.add_argument("-F", "--FORMAT", dest="fmt", type=str, default="png", choices=sorted(FORMATS),
+                            help="Enter the image format of the screenshots")
+        parser.add_argument("-q", "--QUALITY", dest="quality", type=int, default=None,
+                            help="Enter the PNG compression level (0-9), or the WebP/JPEG quality (1-100)")
+        parser.add_argument("-t", "--THRESHOLD", dest="threshold", type=int, default=0,
+                            help="Enter the max dHash distance (0-64) of a duplicate screenshot (0 - identical only)")
+        parser.add_argument("-S", "--STITCH", dest="stitch", action="store_true",
+                            help="Stitch the screenshots of each scrolled page into one image")
+        parser.add_argument("-D", "--DIFF", dest="diff", action="store_true",
+                            help="Save only the tiles that changed since the previous run (headless mode)")
         args = parser.parse_args()  # Command line argument parsing methods
+        if args.diff and not args.headless:
+            parser.error("-D/--DIFF works only with -H/--HEADLESS (full-page captures)")
         given_urls = args.given_urls
+        headless, browser = args.headless, args.browser
+        encoder = FrameEncoder(fmt=args.fmt, quality=args.quality, threshold=args.threshold)
+        stitch = args.stitch
+        visual_diff = VisualDiff(os.path.join(SCREENSHOTS_PATH, "diffs")) if args.diff else None
     else:
         given_urls = get_user_inputs()  # tries to get a URL address as input from the user
+        headless, browser = False, "firefox"
+        encoder = FrameEncoder()
+        stitch = False
+        visual_diff = None
+
+    scrolled_dirs = []  # dirs of the screenshots of the scrolled pages
 
     if given_urls:
-        wp_scrs = WebPagesScreenshots(given_urls)  # creates new instance of WebPagesScreenshots Object
+        # creates new instance of WebPagesScreenshots Object
+        wp_scrs = WebPagesScreenshots(given_urls, headless=headless, browser=browser, encoder=encoder,
+                                      visual_diff=visual_diff)
         if wp_scrs and wp_scrs.url_addresses:
             for current_url in wp_scrs.url_addresses:
-                wp_scrs.driver.get(current_url)  # Loads a web page in the current browser session
-                wp_scrs.scroll_down_and_grab_screen()  # scroll down page & take screenshots
-                sleep(2)
+                # Loads a web page in the current browser session (waits for the turn of the host)
+                PACER.get(wp_scrs.driver, current_url)
+                settle(wp_scrs.driver)  # wait till the page settles (no requests, no DOM changes)
+                if wp_scrs.headless:
+                    wp_scrs.grab_full_page()  # capture the whole page in one screenshot
+                else:
+                    current_dir_path = wp_scrs.scroll_down_and_grab_screen()  # scroll down page & take screenshots
+                    if current_dir_path:
+                        scrolled_dirs.append(current_dir_path)
         wp_scrs.driver.quit()  # Quits the driver and close every associated window
+    encoder.close()  # wait for the screenshots in the queue to be saved
+    print("%d screenshots saved, %d duplicates dropped" % (encoder.saved, encoder.dropped))
+    if stitch:
+        for current_dir_path in scrolled_dirs:
+            # (after the encoder is closed - all the screenshots of the page are saved)
+            print("<-- stitched page --> ", stitch_dir(current_dir_path))
 
 if __name__ == '__main__':
     main()
@@ -9,7 +9,7 @@ import sys
 import argparse
 import webbrowser
 from validators import url
-from time import sleep
+from pacing import PACER
 
 __email__ = "knifef@protonmail.com"
 
@@ -26,9 +26,9 @@ if len(sys.argv) > 1:
 
     for current_url in given_urls:
         if url(current_url):  # Return whether or not given value is a valid URL.
+            PACER.wait(current_url)  # (tabs of the same host are opened a few seconds apart)
             # Open current url in a new “tab” of the browser, if possible, otherwise - in a new window of the browser.
             webbrowser.open_new_tab(current_url)
-            sleep(2)  # delay in seconds
 else:
     # Open url in a new “tab” of the browser, if possible, otherwise - in a new window of the browser.
     webbrowser.open_new_tab(BASE_URL)